@@ -1,3 +1,4 @@
 # flake8: noqa
 
 from starlette_web.common.caches.cache_handler import caches
+from starlette_web.common.caches.decorators import cached, cached_many
@@ -1,8 +1,25 @@
+import logging
+import math
+import random
+import time
+import uuid
 from typing import Type, Any, Optional, Dict, Sequence, AsyncContextManager, List
+from typing import AsyncIterator, Awaitable, Callable, NamedTuple, Tuple, Union
+
+import anyio
+import anyio.abc
+from anyio.lowlevel import checkpoint
 
 from starlette_web.common.http.exceptions import BaseApplicationError
-from starlette_web.common.utils import Singleton
-from starlette_web.common.utils.serializers import BaseSerializer, PickleSerializer
+from starlette_web.common.utils.regex import escape_redis_pattern
+from starlette_web.common.utils.serializers import (
+    BaseSerializer,
+    PickleSerializer,
+    make_serializer,
+)
+
+
+logger = logging.getLogger(__name__)
 
 
 class CacheError(BaseApplicationError):
@@ -13,17 +30,69 @@ class CacheLockError(CacheError):
     message = "Failed to lock or unlock a cache."
 
 
-class BaseCache(metaclass=Singleton):
+class _EarlyRecomputeEntry(NamedTuple):
+    value: Any
+    # Time in seconds, that took to compute value
+    delta: float
+    # Unix timestamp of expiration
+    expiry: float
+
+
+class _SoftExpiryEntry(NamedTuple):
+    value: Any
+    # Unix timestamp, after which value is stale and is refreshed in background
+    stale_at: float
+
+
+class _TaggedEntry(NamedTuple):
+    value: Any
+    # Versions of tags at the moment of writing
+    tags: Dict[str, str]
+
+
+class InFlightCall:
+    """
+    Computation of value, which is awaited by concurrent callers with the same key
+    within a process. Used by async_get_or_set and by memoization decorators.
+    """
+
+    def __init__(self):
+        self.event = anyio.Event()
+        self.completed = False
+        self.result: Any = None
+        self.exception: Optional[Exception] = None
+
+
+class BaseCache:
     serializer_class: Type[BaseSerializer] = PickleSerializer
     serializer: BaseSerializer
+    tag_version_prefix = "__tag_version__:"
+    tag_member_prefix = "__tag_member__:"
+    namespace_version_prefix = "__namespace_version__:"
 
     def __init__(self, options: Dict[str, Any]):
-        self.serializer = self.serializer_class()
+        self.serializer = make_serializer(self.serializer_class, options)
+        self._in_flight_calls: Dict[str, InFlightCall] = {}
+        # Patterns of keys, made unreachable by invalidation, which are removed by
+        # async_remove_orphans. Tuples of (kind, pattern, tag).
+        self._orphans: List[Tuple[str, str, Optional[str]]] = []
+        self._orphans_event = anyio.Event()
+        self._refresh_task_group: Optional[anyio.abc.TaskGroup] = None
+        self._refresh_warning_logged = False
 
     async def async_get(self, key: str) -> Any:
+        # Backends pass values through _async_check_tags,
+        # so that values with invalidated tags are returned as None
         raise NotImplementedError
 
-    async def async_set(self, key: str, value: Any, timeout: Optional[float] = 120) -> None:
+    async def async_set(
+        self,
+        key: str,
+        value: Any,
+        timeout: Optional[float] = 120,
+        tags: Optional[Sequence[str]] = None,
+    ) -> None:
+        # Backends wrap values with _async_tag_values, if tags are given
         raise NotImplementedError
 
     async def async_delete(self, key: str) -> None:
@@ -34,6 +103,15 @@ class BaseCache(metaclass=Singleton):
         # See docs: https://redis.io/commands/keys/
         raise NotImplementedError
 
+    async def async_iter_keys(self, pattern: str, count: int = 1000) -> AsyncIterator[str]:
+        # Yields keys, matching redis-like pattern, in batches of approximately count keys,
+        # yielding control to event loop between batches.
+        # Backends may yield the same key more than once.
+        for idx, key in enumerate(await self.async_keys(pattern)):
+            if idx % count == 0:
+                await checkpoint()
+            yield key
+
     async def async_has_key(self, key: str) -> bool:
         raise NotImplementedError
 
@@ -43,7 +121,14 @@ class BaseCache(metaclass=Singleton):
             result[key] = await self.async_get(key)
         return result
 
-    async def async_set_many(self, data: Dict[str, Any], timeout: Optional[float] = 120) -> None:
+    async def async_set_many(
+        self,
+        data: Dict[str, Any],
+        timeout: Optional[float] = 120,
+        tags: Optional[Sequence[str]] = None,
+    ) -> None:
+        if tags:
+            data = await self._async_tag_values(data, timeout, tags)
         for key, value in data.items():
             await self.async_set(key, value, timeout=timeout)
 
@@ -51,9 +136,176 @@ class BaseCache(metaclass=Singleton):
         for key in keys:
             await self.async_delete(key)
 
+    async def async_incr(self, key: str, delta: int = 1, timeout: Optional[float] = 120) -> int:
+        # Atomically increments integer value of key by delta and returns new value.
+        # Missing key is set to delta with given timeout, timeout of existing key is kept.
+        raise NotImplementedError
+
+    async def async_decr(self, key: str, delta: int = 1, timeout: Optional[float] = 120) -> int:
+        return await self.async_incr(key, -delta, timeout=timeout)
+
+    async def async_add(self, key: str, value: Any, timeout: Optional[float] = 120) -> bool:
+        # Atomically sets value, only if key does not exist. Returns whether value was set.
+        raise NotImplementedError
+
+    async def async_expire(self, key: str, timeout: Optional[float]) -> bool:
+        # Sets new timeout of existing key, None removes expiration.
+        # Returns whether key exists.
+        raise NotImplementedError
+
     async def async_clear(self) -> None:
         raise NotImplementedError
 
+    async def async_invalidate_tags(self, tags: Sequence[str]) -> None:
+        """
+        Makes all values, set with any of tags, unreachable in O(1) per tag,
+        by replacing version of tag. Stale values are removed by async_remove_orphans.
+        """
+        version_keys = [self.tag_version_prefix + tag for tag in tags]
+        old_versions = await self.async_get_many(version_keys)
+        await self.async_set_many(
+            {version_key: self._new_version() for version_key in version_keys},
+            timeout=None,
+        )
+
+        for tag, version_key in zip(tags, version_keys):
+            if old_versions[version_key] is not None:
+                member_prefix = self._tag_member_prefix(tag, old_versions[version_key])
+                self._orphans.append(("tag", escape_redis_pattern(member_prefix) + "*", tag))
+        self._orphans_event.set()
+
+    async def async_namespace_key(self, namespace: str, key: str) -> str:
+        """
+        Returns key within current version of namespace,
+        i.e. "users:<version>:42" for namespace "users" and key "42".
+        """
+        version = await self._async_get_or_create_version(self.namespace_version_prefix + namespace)
+        return f"{namespace}:{version}:{key}"
+
+    async def async_invalidate_namespace(self, namespace: str) -> None:
+        """
+        Makes all keys of namespace unreachable in O(1), by replacing version of namespace.
+        Keys of previous version are removed by async_remove_orphans.
+        """
+        version_key = self.namespace_version_prefix + namespace
+        old_version = await self.async_get(version_key)
+        await self.async_set(version_key, self._new_version(), timeout=None)
+
+        if old_version is not None:
+            pattern = escape_redis_pattern(f"{namespace}:{old_version}:") + "*"
+            self._orphans.append(("namespace", pattern, None))
+        self._orphans_event.set()
+
+    async def async_remove_orphans(self) -> int:
+        """
+        Removes entries, made unreachable by invalidations within this process.
+        Returns number of removed entries.
+        """
+        removed = 0
+        while self._orphans:
+            kind, pattern, tag = self._orphans.pop(0)
+            batch = []
+            async for key in self.async_iter_keys(pattern):
+                batch.append(key)
+                if len(batch) >= 1000:
+                    removed += await self._async_remove_orphans_batch(kind, batch, tag)
+                    batch = []
+            if batch:
+                removed += await self._async_remove_orphans_batch(kind, batch, tag)
+        return removed
+
+    async def async_run_orphan_cleanup(self) -> None:
+        """
+        Removes orphaned entries in background after each invalidation. Runs forever,
+        so it is supposed to be started in a task group, i.e. within application lifespan.
+        """
+        while True:
+            await self._orphans_event.wait()
+            self._orphans_event = anyio.Event()
+            await self.async_remove_orphans()
+
+    async def _async_remove_orphans_batch(
+        self, kind: str, keys: List[str], tag: Optional[str]
+    ) -> int:
+        if kind == "namespace":
+            await self.async_delete_many(keys)
+            return len(keys)
+
+        # Stale values are read as None, while values, that have been set again
+        # after invalidation, are kept
+        prefix_length = len(self.tag_member_prefix + tag) + 1
+        entry_keys = [key[prefix_length:].split(":", 1)[1] for key in keys]
+        values = await self.async_get_many(entry_keys)
+        stale_keys = [key for key, value in values.items() if value is None]
+        await self.async_delete_many(stale_keys + keys)
+        return len(stale_keys)
+
+    async def _async_tag_values(
+        self,
+        data: Dict[str, Any],
+        timeout: Optional[float],
+        tags: Sequence[str],
+    ) -> Dict[str, Any]:
+        # Wraps values together with current versions of tags,
+        # and records membership of keys in tags for cleanup
+        versions = {
+            tag: await self._async_get_or_create_version(self.tag_version_prefix + tag)
+            for tag in tags
+        }
+        members = {
+            self._tag_member_prefix(tag, version) + key: 1
+            for key in data
+            for tag, version in versions.items()
+        }
+        await self.async_set_many(members, timeout=timeout)
+        return {key: _TaggedEntry(value=value, tags=versions) for key, value in data.items()}
+
+    async def _async_check_tags(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        # Unwraps tagged values, and replaces values with outdated tags with None
+        tags = {
+            tag
+            for value in values.values()
+            if isinstance(value, _TaggedEntry)
+            for tag in value.tags
+        }
+        if not tags:
+            return values
+
+        version_keys = [self.tag_version_prefix + tag for tag in tags]
+        versions = await self.async_get_many(version_keys)
+        result = {}
+        for key, value in values.items():
+            if isinstance(value, _TaggedEntry):
+                is_valid = all(
+                    versions[self.tag_version_prefix + tag] == version
+                    for tag, version in value.tags.items()
+                )
+                value = value.value if is_valid else None
+            result[key] = value
+        return result
+
+    async def _async_check_tags_one(self, value: Any) -> Any:
+        if not isinstance(value, _TaggedEntry):
+            return value
+        return (await self._async_check_tags({"": value}))[""]
+
+    async def _async_get_or_create_version(self, version_key: str) -> str:
+        version = await self.async_get(version_key)
+        while version is None:
+            # Concurrent writers agree on a single version
+            version = self._new_version()
+            if not await self.async_add(version_key, version, timeout=None):
+                version = await self.async_get(version_key)
+        return version
+
+    def _tag_member_prefix(self, tag: str, version: str) -> str:
+        return f"{self.tag_member_prefix}{tag}:{version}:"
+
+    @staticmethod
+    def _new_version() -> str:
+        # Versions are random, so that a lost version key never revives stale values
+        return uuid.uuid4().hex[:16]
+
     def lock(
         self,
         name: str,
@@ -62,3 +314,251 @@ class BaseCache(metaclass=Singleton):
         **kwargs,
     ) -> AsyncContextManager:
         raise NotImplementedError
+
+    def rw_lock(
+        self,
+        name: str,
+        mode: str = "w",
+        timeout: Optional[float] = 20,
+        blocking_timeout: Optional[float] = None,
+        **kwargs,
+    ) -> AsyncContextManager:
+        # Reader-writer lock: shared in mode "r", exclusive in mode "w"
+        raise NotImplementedError
+
+    async def async_get_or_set(
+        self,
+        key: str,
+        async_factory: Callable[[], Awaitable[Any]],
+        timeout: Optional[float] = 120,
+        use_lock: bool = False,
+        lock_timeout: Optional[float] = 20,
+        early_recompute_beta: Optional[float] = None,
+        soft_timeout: Optional[float] = None,
+    ) -> Any:
+        """
+        Returns value of key, if it is present.
+        Otherwise, awaits async_factory() and stores its result with timeout.
+        None results are not stored, since None is read as missing key.
+
+        - Concurrent calls for the same key within a process await a single async_factory() call.
+        - use_lock - additionally serialize recomputation across processes with self.lock().
+        - early_recompute_beta - enables probabilistic early recomputation (XFetch),
+          so that hot keys are refreshed before they expire. Larger values mean earlier
+          recomputation, 1.0 is a reasonable default. Values are stored with extra metadata,
+          so such keys should only be read with async_get_or_set.
+        - soft_timeout - enables stale-while-revalidate. After soft_timeout seconds value
+          is stale, but is still returned immediately, while exactly one task (across processes)
+          refreshes it. After timeout value expires. Refresh never runs in the reading task,
+          but in async_run_background_refresh, which must be running within application lifespan.
+          Otherwise, stale value is not refreshed (which is logged as warning),
+          and is only recomputed after timeout. Values are stored with extra metadata,
+          so such keys should only be read with async_get_or_set.
+        """
+        value, entry = await self._async_get_or_set_lookup(key, early_recompute_beta, soft_timeout)
+        if isinstance(entry, _SoftExpiryEntry):
+            if time.time() >= entry.stale_at:
+                await self._async_refresh_stale(
+                    key, async_factory, timeout, lock_timeout, soft_timeout
+                )
+            return value
+
+        is_stale = entry is not None and self._should_recompute_early(entry, early_recompute_beta)
+        if value is not None and not is_stale:
+            return value
+
+        in_flight = self._in_flight_calls.get(key)
+        if in_flight is not None:
+            if value is not None:
+                # Early recomputation is already running, current value is still valid
+                return value
+
+            await in_flight.event.wait()
+            if in_flight.exception is not None:
+                raise in_flight.exception
+            if in_flight.completed:
+                return in_flight.result
+
+            # Computing task has been cancelled
+            return await self.async_get_or_set(
+                key,
+                async_factory,
+                timeout=timeout,
+                use_lock=use_lock,
+                lock_timeout=lock_timeout,
+                early_recompute_beta=early_recompute_beta,
+                soft_timeout=soft_timeout,
+            )
+
+        in_flight = InFlightCall()
+        self._in_flight_calls[key] = in_flight
+        try:
+            if use_lock:
+                async with self.lock(
+                    self._get_or_set_lock_name(key),
+                    timeout=lock_timeout,
+                    blocking_timeout=lock_timeout,
+                ):
+                    # Value might have been recomputed by another process
+                    _value, _entry = await self._async_get_or_set_lookup(
+                        key, early_recompute_beta, soft_timeout
+                    )
+                    if _value is not None and (entry is None or _entry != entry):
+                        in_flight.result = _value
+                    else:
+                        in_flight.result = await self._async_recompute(
+                            key, async_factory, timeout, early_recompute_beta, soft_timeout
+                        )
+            else:
+                in_flight.result = await self._async_recompute(
+                    key, async_factory, timeout, early_recompute_beta, soft_timeout
+                )
+
+            in_flight.completed = True
+            return in_flight.result
+
+        except Exception as exc:
+            in_flight.exception = exc
+            raise
+
+        finally:
+            self._in_flight_calls.pop(key, None)
+            in_flight.event.set()
+
+    async def _async_get_or_set_lookup(
+        self,
+        key: str,
+        early_recompute_beta: Optional[float],
+        soft_timeout: Optional[float] = None,
+    ) -> Tuple[Any, Union[_EarlyRecomputeEntry, _SoftExpiryEntry, None]]:
+        value = await self.async_get(key)
+        if soft_timeout is not None and isinstance(value, _SoftExpiryEntry):
+            return value.value, value
+        if early_recompute_beta is None or not isinstance(value, _EarlyRecomputeEntry):
+            return value, None
+        return value.value, value
+
+    async def _async_recompute(
+        self,
+        key: str,
+        async_factory: Callable[[], Awaitable[Any]],
+        timeout: Optional[float],
+        early_recompute_beta: Optional[float],
+        soft_timeout: Optional[float] = None,
+    ) -> Any:
+        start_time = anyio.current_time()
+        value = await async_factory()
+        delta = anyio.current_time() - start_time
+
+        if value is None:
+            # None is not stored, since it is read as missing key. Stale entry is removed,
+            # so that it is not returned as a hit with value None
+            if soft_timeout is not None or early_recompute_beta is not None:
+                await self.async_delete(key)
+        elif soft_timeout is not None:
+            await self.async_set(
+                key,
+                _SoftExpiryEntry(value=value, stale_at=time.time() + soft_timeout),
+                timeout=timeout,
+            )
+        elif early_recompute_beta is not None and timeout is not None:
+            await self.async_set(
+                key,
+                _EarlyRecomputeEntry(value=value, delta=delta, expiry=time.time() + timeout),
+                timeout=timeout,
+            )
+        else:
+            await self.async_set(key, value, timeout=timeout)
+
+        return value
+
+    async def async_run_background_refresh(self) -> None:
+        """
+        Runs stale-while-revalidate refreshes of async_get_or_set in background. Runs forever,
+        so it is supposed to be started in a task group, i.e. within application lifespan.
+        """
+        async with anyio.create_task_group() as task_group:
+            self._refresh_task_group = task_group
+            try:
+                await anyio.sleep_forever()
+            finally:
+                self._refresh_task_group = None
+
+    async def _async_refresh_stale(
+        self,
+        key: str,
+        async_factory: Callable[[], Awaitable[Any]],
+        timeout: Optional[float],
+        lock_timeout: Optional[float],
+        soft_timeout: float,
+    ) -> None:
+        # Within process, refresh is registered as in-flight call,
+        # across processes, only the task, that has added refresh marker, refreshes value
+        if key in self._in_flight_calls:
+            return
+
+        # Refresh does not run in reading task, so that stale reads do not wait for async_factory
+        if self._refresh_task_group is None:
+            if not self._refresh_warning_logged:
+                logger.warning(
+                    f"Stale value of cache key {key!r} is not refreshed, "
+                    "since async_run_background_refresh is not running"
+                )
+                self._refresh_warning_logged = True
+            return
+
+        in_flight = InFlightCall()
+        self._in_flight_calls[key] = in_flight
+        try:
+            is_refreshing = await self.async_add(
+                self._get_or_set_refresh_key(key), 1, timeout=lock_timeout
+            )
+        except BaseException:
+            self._in_flight_calls.pop(key, None)
+            in_flight.event.set()
+            raise
+
+        if not is_refreshing or self._refresh_task_group is None:
+            # Background refresh may have stopped, while refresh marker has been added
+            if is_refreshing:
+                await self.async_delete(self._get_or_set_refresh_key(key))
+            self._in_flight_calls.pop(key, None)
+            in_flight.event.set()
+        else:
+            self._refresh_task_group.start_soon(
+                self._async_run_refresh, key, in_flight, async_factory, timeout, soft_timeout
+            )
+
+    async def _async_run_refresh(
+        self,
+        key: str,
+        in_flight: InFlightCall,
+        async_factory: Callable[[], Awaitable[Any]],
+        timeout: Optional[float],
+        soft_timeout: float,
+    ) -> None:
+        try:
+            in_flight.result = await self._async_recompute(
+                key, async_factory, timeout, None, soft_timeout
+            )
+            in_flight.completed = True
+        except Exception as exc:
+            # Stale value is kept until it expires, or until next refresh succeeds
+            logger.exception(f"Failed to refresh stale value of cache key {key!r}")
+            in_flight.exception = exc
+        finally:
+            self._in_flight_calls.pop(key, None)
+            in_flight.event.set()
+            with anyio.CancelScope(shield=True):
+                await self.async_delete(self._get_or_set_refresh_key(key))
+
+    @staticmethod
+    def _should_recompute_early(entry: _EarlyRecomputeEntry, beta: float) -> bool:
+        # https://cseweb.ucsd.edu/~avattani/papers/cache_stampede.pdf
+        return time.time() - entry.delta * beta * math.log(1.0 - random.random()) >= entry.expiry
+
+    def _get_or_set_lock_name(self, key: str) -> str:
+        return f"get_or_set:{key}"
+
+    def _get_or_set_refresh_key(self, key: str) -> str:
+        return f"get_or_set_refresh:{key}"
@@ -1,19 +1,28 @@
 # Copy from https://github.com/django/django/blob/main/django/core/cache/__init__.py
 
-from typing import Dict, Type
+from typing import Any, Dict, Type
 
 from starlette_web.common.conf import settings
 from starlette_web.common.caches.base import BaseCache, CacheError
+from starlette_web.common.caches.instrumentation import InstrumentedCache
 from starlette_web.common.utils import import_string
 
 
 def _create_cache(alias: str) -> BaseCache:
     try:
         cache_class: Type[BaseCache] = import_string(settings.CACHES[alias]["BACKEND"])
-        return cache_class(settings.CACHES[alias]["OPTIONS"])
+        cache = cache_class(settings.CACHES[alias]["OPTIONS"])
     except (ImportError, KeyError) as exc:
         raise CacheError from exc
 
+    instrumentation_options = settings.CACHES[alias].get("INSTRUMENTATION")
+    if instrumentation_options:
+        if instrumentation_options is True:
+            instrumentation_options = {}
+        cache = InstrumentedCache(cache, alias, instrumentation_options)
+
+    return cache
+
 
 class CacheHandler:
     def __init__(self):
@@ -30,5 +39,13 @@ class CacheHandler:
             self._caches[alias] = _create_cache(alias)
             return self._caches[alias]
 
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        # Statistics of instrumented caches, created within this process
+        return {
+            alias: cache.snapshot()
+            for alias, cache in self._caches.items()
+            if isinstance(cache, InstrumentedCache)
+        }
+
 
 caches = CacheHandler()
@@ -0,0 +1,271 @@
+import functools
+import hashlib
+import inspect
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Union
+
+from starlette_web.common.caches.base import BaseCache, CacheError, InFlightCall
+from starlette_web.common.caches.cache_handler import caches
+from starlette_web.common.utils.regex import escape_redis_pattern
+
+
+CacheKey = Union[str, Callable[..., str], None]
+
+
+def _stable_repr(value: Any) -> str:
+    # Unlike repr/pickle, does not depend on order of dicts and sets,
+    # and refuses objects, whose repr contains memory address
+    if value is None or isinstance(value, (bool, int, float, str, bytes)):
+        return repr(value)
+
+    if isinstance(value, (list, tuple)):
+        return f"{type(value).__name__}({','.join(_stable_repr(item) for item in value)})"
+
+    if isinstance(value, (set, frozenset)):
+        return f"{type(value).__name__}({','.join(sorted(_stable_repr(item) for item in value))})"
+
+    if isinstance(value, dict):
+        items = sorted(f"{_stable_repr(key)}:{_stable_repr(item)}" for key, item in value.items())
+        return f"dict({','.join(items)})"
+
+    if type(value).__repr__ is object.__repr__:
+        raise CacheError(
+            details=f"Cannot derive stable cache key from argument of type "
+            f"{type(value).__qualname__}, pass key to decorator"
+        )
+
+    return f"{type(value).__module__}.{type(value).__qualname__}({value!r})"
+
+
+class _CachedFunctionBase:
+    def __init__(
+        self,
+        func: Callable[..., Awaitable[Any]],
+        alias: str,
+        timeout: Optional[float],
+        key: CacheKey,
+    ):
+        if not inspect.iscoroutinefunction(func):
+            raise TypeError(f"{func.__qualname__} must be a coroutine function")
+
+        self.func = func
+        self.alias = alias
+        self.timeout = timeout
+        self.key = key
+        self.key_prefix = f"cached:{func.__module__}.{func.__qualname__}"
+        self._signature = inspect.signature(func)
+
+    @property
+    def cache(self) -> BaseCache:
+        return caches[self.alias]
+
+    def _make_key(self, *args, **kwargs) -> str:
+        if callable(self.key):
+            return self.key(*args, **kwargs)
+
+        bound_arguments = self._signature.bind(*args, **kwargs)
+        bound_arguments.apply_defaults()
+        if isinstance(self.key, str):
+            return self.key.format(**bound_arguments.arguments)
+
+        arguments_repr = _stable_repr(dict(bound_arguments.arguments))
+        return f"{self.key_prefix}:{hashlib.sha256(arguments_repr.encode()).hexdigest()}"
+
+    async def invalidate_all(self) -> None:
+        """
+        Deletes all cached results of function. Only supported for default keys,
+        and iterates keys by prefix, so it is O(N).
+        """
+        if self.key is not None:
+            raise CacheError(details="invalidate_all is only supported for default keys")
+
+        pattern = escape_redis_pattern(self.key_prefix + ":") + "*"
+        keys = [key async for key in self.cache.async_iter_keys(pattern)]
+        if keys:
+            await self.cache.async_delete_many(keys)
+
+    def _wrap(self, wrapper: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        wrapper = functools.wraps(self.func)(wrapper)
+        wrapper.make_key = self.make_key
+        wrapper.invalidate = self.invalidate
+        wrapper.invalidate_all = self.invalidate_all
+        wrapper.cached_function = self
+        return wrapper
+
+
+class CachedFunction(_CachedFunctionBase):
+    def __init__(
+        self,
+        func: Callable[..., Awaitable[Any]],
+        alias: str,
+        timeout: Optional[float],
+        key: CacheKey,
+        soft_timeout: Optional[float] = None,
+    ):
+        super().__init__(func, alias, timeout, key)
+        self.soft_timeout = soft_timeout
+
+    async def __call__(self, *args, **kwargs) -> Any:
+        # async_get_or_set awaits a single call for concurrent calls with the same key
+        return await self.cache.async_get_or_set(
+            self.make_key(*args, **kwargs),
+            functools.partial(self.func, *args, **kwargs),
+            timeout=self.timeout,
+            soft_timeout=self.soft_timeout,
+        )
+
+    def make_key(self, *args, **kwargs) -> str:
+        return self._make_key(*args, **kwargs)
+
+    async def invalidate(self, *args, **kwargs) -> None:
+        await self.cache.async_delete(self.make_key(*args, **kwargs))
+
+
+class CachedManyFunction(_CachedFunctionBase):
+    """
+    Caches results of function, which accepts a list of items as first argument,
+    and returns a list of results in the same order, each of which is cached separately.
+    Only items, missing in cache, are passed to function.
+    """
+
+    def __init__(
+        self,
+        func: Callable[..., Awaitable[List[Any]]],
+        alias: str,
+        timeout: Optional[float],
+        key: CacheKey,
+    ):
+        super().__init__(func, alias, timeout, key)
+        self._in_flight_calls: Dict[str, InFlightCall] = {}
+
+    async def __call__(self, items: Sequence[Any], *args, **kwargs) -> List[Any]:
+        keys = self.make_keys(items, *args, **kwargs)
+        values = await self.cache.async_get_many(keys)
+        result = [values[key] for key in keys]
+        missing = {key: item for key, item in zip(keys, items) if values[key] is None}
+        if not missing:
+            return result
+
+        # Items, which are already being computed by concurrent calls, are awaited
+        own_calls = {}
+        other_calls = {}
+        for key in missing:
+            if key in self._in_flight_calls:
+                other_calls[key] = self._in_flight_calls[key]
+            else:
+                own_calls[key] = self._in_flight_calls[key] = InFlightCall()
+
+        computed = {}
+        if own_calls:
+            computed = await self._compute(own_calls, missing, *args, **kwargs)
+
+        for key, in_flight in other_calls.items():
+            await in_flight.event.wait()
+            if in_flight.exception is not None:
+                raise in_flight.exception
+            if in_flight.completed:
+                computed[key] = in_flight.result
+            else:
+                # Computing task has been cancelled
+                (computed[key],) = await self([missing[key]], *args, **kwargs)
+
+        return [computed[key] if key in missing else value for key, value in zip(keys, result)]
+
+    async def _compute(
+        self,
+        own_calls: Dict[str, InFlightCall],
+        missing: Dict[str, Any],
+        *args,
+        **kwargs,
+    ) -> Dict[str, Any]:
+        try:
+            results = await self.func([missing[key] for key in own_calls], *args, **kwargs)
+            if len(results) != len(own_calls):
+                raise CacheError(
+                    details=f"{self.func.__qualname__} returned {len(results)} results "
+                    f"for {len(own_calls)} items"
+                )
+
+            computed = dict(zip(own_calls, results))
+            await self.cache.async_set_many(
+                {key: value for key, value in computed.items() if value is not None},
+                timeout=self.timeout,
+            )
+            for key, in_flight in own_calls.items():
+                in_flight.result = computed[key]
+                in_flight.completed = True
+            return computed
+
+        except Exception as exc:
+            for in_flight in own_calls.values():
+                in_flight.exception = exc
+            raise
+
+        finally:
+            for key, in_flight in own_calls.items():
+                self._in_flight_calls.pop(key, None)
+                in_flight.event.set()
+
+    def make_keys(self, items: Sequence[Any], *args, **kwargs) -> List[str]:
+        return [self._make_key(item, *args, **kwargs) for item in items]
+
+    def make_key(self, item: Any, *args, **kwargs) -> str:
+        return self._make_key(item, *args, **kwargs)
+
+    async def invalidate(self, items: Sequence[Any], *args, **kwargs) -> None:
+        await self.cache.async_delete_many(self.make_keys(items, *args, **kwargs))
+
+
+def cached(
+    alias: str = "default",
+    timeout: Optional[float] = 120,
+    key: CacheKey = None,
+    soft_timeout: Optional[float] = None,
+):
+    """
+    Caches results of coroutine function in settings.CACHES[alias].
+
+    - key - either None (key is derived from hash of arguments),
+      or a template, formatted with arguments by name, i.e. "user:{user_id}",
+      or a callable, which accepts the same arguments as function and returns key.
+    - soft_timeout - enables stale-while-revalidate, see BaseCache.async_get_or_set.
+
+    Concurrent calls with the same key await a single call of function.
+    None results are not cached. Decorated function has attributes
+    make_key(*args, **kwargs), invalidate(*args, **kwargs) and invalidate_all().
+    """
+
+    def decorator(func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        cached_function = CachedFunction(func, alias, timeout, key, soft_timeout=soft_timeout)
+
+        async def wrapper(*args, **kwargs):
+            return await cached_function(*args, **kwargs)
+
+        return cached_function._wrap(wrapper)
+
+    return decorator
+
+
+def cached_many(
+    alias: str = "default",
+    timeout: Optional[float] = 120,
+    key: CacheKey = None,
+):
+    """
+    Caches results of coroutine function, which accepts a list of items as first argument
+    and returns a list of results in the same order, per item.
+    Keys are derived from item and the rest of arguments, as with cached,
+    where item is passed instead of list of items.
+
+    Decorated function has attributes make_key(item, *args, **kwargs),
+    invalidate(items, *args, **kwargs) and invalidate_all().
+    """
+
+    def decorator(func: Callable[..., Awaitable[List[Any]]]) -> Callable[..., Awaitable[List[Any]]]:
+        cached_function = CachedManyFunction(func, alias, timeout, key)
+
+        async def wrapper(items: Sequence[Any], *args, **kwargs):
+            return await cached_function(items, *args, **kwargs)
+
+        return cached_function._wrap(wrapper)
+
+    return decorator
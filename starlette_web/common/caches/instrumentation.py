@@ -0,0 +1,492 @@
+import bisect
+import heapq
+import math
+import os
+import socket
+import time
+from contextlib import contextmanager
+from typing import Any, AsyncContextManager, AsyncIterator, Awaitable, Callable, Dict, Iterator
+from typing import List, Optional, Sequence, Tuple
+
+import anyio
+
+from starlette_web.common.caches.base import BaseCache
+from starlette_web.common.utils.regex import escape_redis_pattern
+
+
+class LatencyHistogram:
+    """
+    Histogram of latencies in seconds with fixed exponential buckets,
+    so that histograms of different processes can be merged.
+    """
+
+    buckets = (
+        0.0001,
+        0.00025,
+        0.0005,
+        0.001,
+        0.0025,
+        0.005,
+        0.01,
+        0.025,
+        0.05,
+        0.1,
+        0.25,
+        0.5,
+        1.0,
+        2.5,
+        5.0,
+        math.inf,
+    )
+
+    def __init__(self):
+        self.counts = [0] * len(self.buckets)
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+
+    def merge(self, data: Dict[str, Any]) -> None:
+        for idx, count in enumerate(data["counts"]):
+            self.counts[idx] += count
+        self.total += data["total"]
+
+    def quantile(self, q: float) -> float:
+        # Returns upper bound of bucket, which contains q-quantile
+        count = sum(self.counts)
+        if not count:
+            return 0.0
+
+        cumulative = 0
+        for upper_bound, bucket_count in zip(self.buckets, self.counts):
+            cumulative += bucket_count
+            if cumulative >= q * count:
+                return upper_bound
+        return math.inf
+
+    def to_dict(self) -> Dict[str, Any]:
+        count = sum(self.counts)
+        return {
+            "counts": list(self.counts),
+            "total": self.total,
+            "mean": self.total / count if count else 0.0,
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+        }
+
+
+class OperationStats:
+    def __init__(self):
+        self.calls = 0
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.latency = LatencyHistogram()
+
+    def merge(self, data: Dict[str, Any]) -> None:
+        for counter in ("calls", "hits", "misses", "errors", "bytes_read", "bytes_written"):
+            setattr(self, counter, getattr(self, counter) + data[counter])
+        self.latency.merge(data["latency"])
+
+    def to_dict(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "calls": self.calls,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else None,
+            "errors": self.errors,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "latency": self.latency.to_dict(),
+        }
+
+
+class SpaceSavingSketch:
+    """
+    Top-K heavy hitters with bounded memory (Space-Saving algorithm, Metwally et al.).
+    Keeps at most capacity counters. When a new key arrives at full capacity,
+    it replaces the key with the smallest count and inherits it as error,
+    so counts are overestimated by at most error.
+
+    Key with the smallest count is found with a min-heap, which has a single entry per key.
+    Counts in heap are only updated on eviction, so they are lower bounds of actual counts,
+    and outdated entries are re-pushed, until the smallest entry is up to date.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._counters: Dict[str, List[int]] = {}
+        self._heap: List[Tuple[int, str]] = []
+
+    def add(self, key: str, count: int = 1) -> None:
+        counter = self._counters.get(key)
+        if counter is not None:
+            counter[0] += count
+            return
+
+        if len(self._counters) < self.capacity:
+            self._counters[key] = [count, 0]
+            heapq.heappush(self._heap, (count, key))
+            return
+
+        while True:
+            heap_count, min_key = self._heap[0]
+            min_count = self._counters[min_key][0]
+            if heap_count == min_count:
+                break
+            heapq.heapreplace(self._heap, (min_count, min_key))
+
+        del self._counters[min_key]
+        self._counters[key] = [min_count + count, min_count]
+        heapq.heapreplace(self._heap, (min_count + count, key))
+
+    def top(self, k: int) -> List[Tuple[str, int, int]]:
+        items = sorted(self._counters.items(), key=lambda item: item[1][0], reverse=True)
+        return [(key, count, error) for key, (count, error) in items[:k]]
+
+
+class CacheStats:
+    """
+    Statistics of cache alias within a process, grouped by operation and by key prefix.
+    Key prefix is a part of key before the first PREFIX_SEPARATOR.
+    """
+
+    other_prefix = "__other__"
+
+    def __init__(self, alias: str, options: Dict[str, Any]):
+        self.alias = alias
+        self.prefix_separator: str = options.get("PREFIX_SEPARATOR", ":")
+        self.max_prefixes: int = options.get("MAX_PREFIXES", 100)
+        self.top_k: int = options.get("TOP_K", 20)
+        self.reset()
+
+    def reset(self) -> None:
+        self.started_at = time.time()
+        self.prefixes: Dict[str, Dict[str, OperationStats]] = {}
+        self.hot_keys = SpaceSavingSketch(self.top_k * 5)
+
+    def get_prefix(self, key: str) -> str:
+        prefix, separator, _ = key.partition(self.prefix_separator)
+        if not separator:
+            return ""
+        if prefix not in self.prefixes and len(self.prefixes) >= self.max_prefixes:
+            return self.other_prefix
+        return prefix
+
+    def get_operation(self, prefix: str, operation: str) -> OperationStats:
+        operations = self.prefixes.setdefault(prefix, {})
+        if operation not in operations:
+            operations[operation] = OperationStats()
+        return operations[operation]
+
+    def snapshot(self) -> Dict[str, Any]:
+        totals: Dict[str, OperationStats] = {}
+        for operations in self.prefixes.values():
+            for operation, stats in operations.items():
+                totals.setdefault(operation, OperationStats()).merge(stats.to_dict())
+
+        return {
+            "alias": self.alias,
+            "host": socket.gethostname(),
+            "pid": os.getpid(),
+            "started_at": self.started_at,
+            "updated_at": time.time(),
+            "operations": {operation: stats.to_dict() for operation, stats in totals.items()},
+            "prefixes": {
+                prefix: {operation: stats.to_dict() for operation, stats in operations.items()}
+                for prefix, operations in self.prefixes.items()
+            },
+            "hot_keys": self.hot_keys.top(self.top_k),
+        }
+
+
+def merge_snapshots(snapshots: Sequence[Dict[str, Any]], top_k: int = 20) -> Dict[str, Any]:
+    """
+    Merges snapshots of CacheStats of several processes into a single snapshot.
+    """
+    totals: Dict[str, OperationStats] = {}
+    prefixes: Dict[str, Dict[str, OperationStats]] = {}
+    hot_keys: Dict[str, List[int]] = {}
+    for snapshot in snapshots:
+        for operation, data in snapshot["operations"].items():
+            totals.setdefault(operation, OperationStats()).merge(data)
+        for prefix, operations in snapshot["prefixes"].items():
+            for operation, data in operations.items():
+                prefixes.setdefault(prefix, {}).setdefault(operation, OperationStats()).merge(data)
+        for key, count, error in snapshot["hot_keys"]:
+            counter = hot_keys.setdefault(key, [0, 0])
+            counter[0] += count
+            counter[1] += error
+
+    sorted_hot_keys = sorted(hot_keys.items(), key=lambda item: item[1][0], reverse=True)
+    return {
+        "processes": len(snapshots),
+        "operations": {operation: stats.to_dict() for operation, stats in totals.items()},
+        "prefixes": {
+            prefix: {operation: stats.to_dict() for operation, stats in operations.items()}
+            for prefix, operations in prefixes.items()
+        },
+        "hot_keys": [(key, count, error) for key, (count, error) in sorted_hot_keys[:top_k]],
+    }
+
+
+class InstrumentedCache(BaseCache):
+    """
+    Wrapper of cache backend, which records hits, misses, bytes and latency of every
+    async_* call, per operation and per key prefix, and tracks the most frequently read keys.
+    It is applied by CacheHandler, if settings.CACHES[alias] contains key "INSTRUMENTATION".
+
+    Options (settings.CACHES[alias]["INSTRUMENTATION"], True means defaults):
+    - PREFIX_SEPARATOR: str (default: ":") - key prefix is a part of key before separator
+    - MAX_PREFIXES: int (default: 100) - keys with further prefixes are counted as "__other__"
+    - TOP_K: int (default: 20) - number of reported hot keys
+    - TRACK_BYTES: bool (default: False) - measure size of values with serializer of backend,
+      which serializes values once more
+    - PUBLISH_INTERVAL: float (default: 10.0) - interval in seconds,
+      with which async_run_stats_publisher stores snapshot of statistics in the cache itself,
+      so that it is available to other processes, i.e. to management command "cachestats"
+
+    Methods, specific to backend, are available as attributes of wrapper.
+    """
+
+    stats_key_prefix = "__cache_stats__:"
+
+    def __init__(self, cache: BaseCache, alias: str, options: Dict[str, Any]):
+        super().__init__(options)
+        self.cache = cache
+        self.alias = alias
+        self.serializer = cache.serializer
+        self.stats = CacheStats(alias, options)
+        self._track_bytes: bool = options.get("TRACK_BYTES", False)
+        self._publish_interval: float = options.get("PUBLISH_INTERVAL", 10.0)
+
+    def __getattr__(self, name: str) -> Any:
+        if name == "cache":
+            raise AttributeError(name)
+        return getattr(self.cache, name)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return self.stats.snapshot()
+
+    def reset_stats(self) -> None:
+        self.stats.reset()
+
+    async def async_publish_stats(self) -> None:
+        await self.cache.async_set(
+            self._get_stats_key(),
+            self.snapshot(),
+            timeout=self._publish_interval * 3,
+        )
+
+    async def async_run_stats_publisher(self) -> None:
+        """
+        Periodically publishes statistics of this process. Runs forever, so it is supposed
+        to be started in a task group, i.e. within application lifespan.
+        """
+        while True:
+            await self.async_publish_stats()
+            await anyio.sleep(self._publish_interval)
+
+    async def async_get_published_stats(self) -> List[Dict[str, Any]]:
+        pattern = escape_redis_pattern(f"{self.stats_key_prefix}{self.alias}:") + "*"
+        keys = [key async for key in self.cache.async_iter_keys(pattern)]
+        snapshots = await self.cache.async_get_many(keys)
+        return [snapshot for snapshot in snapshots.values() if snapshot is not None]
+
+    def _get_stats_key(self) -> str:
+        return f"{self.stats_key_prefix}{self.alias}:{socket.gethostname()}:{os.getpid()}"
+
+    @contextmanager
+    def _measure(self, operation: str, keys: Sequence[str]) -> Iterator[None]:
+        # Latency is recorded once for every prefix among keys
+        prefixes = dict.fromkeys(self.stats.get_prefix(key) for key in keys) or {"": None}
+        operations = [self.stats.get_operation(prefix, operation) for prefix in prefixes]
+        start_time = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            for stats in operations:
+                stats.errors += 1
+            raise
+        finally:
+            duration = time.perf_counter() - start_time
+            for stats in operations:
+                stats.calls += 1
+                stats.latency.observe(duration)
+
+    def _record_read(self, operation: str, key: str, value: Any) -> None:
+        stats = self.stats.get_operation(self.stats.get_prefix(key), operation)
+        self.stats.hot_keys.add(key)
+        if value is None:
+            stats.misses += 1
+        else:
+            stats.hits += 1
+            stats.bytes_read += self._get_size(value)
+
+    def _record_write(self, operation: str, key: str, value: Any) -> None:
+        stats = self.stats.get_operation(self.stats.get_prefix(key), operation)
+        stats.bytes_written += self._get_size(value)
+
+    def _get_size(self, value: Any) -> int:
+        if not self._track_bytes or value is None:
+            return 0
+        try:
+            data = self.serializer.serialize(value)
+        except Exception:
+            return 0
+        return len(data) if isinstance(data, (bytes, bytearray, str)) else 0
+
+    async def async_get(self, key: str) -> Any:
+        with self._measure("get", [key]):
+            value = await self.cache.async_get(key)
+        self._record_read("get", key, value)
+        return value
+
+    async def async_set(
+        self,
+        key: str,
+        value: Any,
+        timeout: Optional[float] = 120,
+        tags: Optional[Sequence[str]] = None,
+    ) -> None:
+        with self._measure("set", [key]):
+            await self.cache.async_set(key, value, timeout=timeout, tags=tags)
+        self._record_write("set", key, value)
+
+    async def async_delete(self, key: str) -> None:
+        with self._measure("delete", [key]):
+            await self.cache.async_delete(key)
+
+    async def async_keys(self, pattern: str) -> List[str]:
+        with self._measure("keys", [pattern]):
+            return await self.cache.async_keys(pattern)
+
+    async def async_iter_keys(self, pattern: str, count: int = 1000) -> AsyncIterator[str]:
+        # Latency includes time, spent by consumer between keys
+        with self._measure("iter_keys", [pattern]):
+            async for key in self.cache.async_iter_keys(pattern, count=count):
+                yield key
+
+    async def async_has_key(self, key: str) -> bool:
+        with self._measure("has_key", [key]):
+            result = await self.cache.async_has_key(key)
+        self._record_read("has_key", key, result or None)
+        return result
+
+    async def async_get_many(self, keys: Sequence[str]) -> Dict[str, Any]:
+        with self._measure("get_many", keys):
+            result = await self.cache.async_get_many(keys)
+        for key, value in result.items():
+            self._record_read("get_many", key, value)
+        return result
+
+    async def async_set_many(
+        self,
+        data: Dict[str, Any],
+        timeout: Optional[float] = 120,
+        tags: Optional[Sequence[str]] = None,
+    ) -> None:
+        with self._measure("set_many", list(data)):
+            await self.cache.async_set_many(data, timeout=timeout, tags=tags)
+        for key, value in data.items():
+            self._record_write("set_many", key, value)
+
+    async def async_delete_many(self, keys: Sequence[str]) -> None:
+        with self._measure("delete_many", keys):
+            await self.cache.async_delete_many(keys)
+
+    async def async_incr(self, key: str, delta: int = 1, timeout: Optional[float] = 120) -> int:
+        with self._measure("incr", [key]):
+            return await self.cache.async_incr(key, delta, timeout=timeout)
+
+    async def async_add(self, key: str, value: Any, timeout: Optional[float] = 120) -> bool:
+        with self._measure("add", [key]):
+            added = await self.cache.async_add(key, value, timeout=timeout)
+        if added:
+            self._record_write("add", key, value)
+        return added
+
+    async def async_expire(self, key: str, timeout: Optional[float]) -> bool:
+        with self._measure("expire", [key]):
+            return await self.cache.async_expire(key, timeout)
+
+    async def async_clear(self) -> None:
+        with self._measure("clear", []):
+            await self.cache.async_clear()
+
+    async def async_invalidate_tags(self, tags: Sequence[str]) -> None:
+        with self._measure("invalidate_tags", []):
+            await self.cache.async_invalidate_tags(tags)
+
+    async def async_namespace_key(self, namespace: str, key: str) -> str:
+        with self._measure("namespace_key", [namespace + self.stats.prefix_separator]):
+            return await self.cache.async_namespace_key(namespace, key)
+
+    async def async_invalidate_namespace(self, namespace: str) -> None:
+        with self._measure("invalidate_namespace", [namespace + self.stats.prefix_separator]):
+            await self.cache.async_invalidate_namespace(namespace)
+
+    async def async_remove_orphans(self) -> int:
+        return await self.cache.async_remove_orphans()
+
+    async def async_run_orphan_cleanup(self) -> None:
+        await self.cache.async_run_orphan_cleanup()
+
+    async def async_run_background_refresh(self) -> None:
+        await self.cache.async_run_background_refresh()
+
+    async def async_get_or_set(
+        self,
+        key: str,
+        async_factory: Callable[[], Awaitable[Any]],
+        timeout: Optional[float] = 120,
+        use_lock: bool = False,
+        lock_timeout: Optional[float] = 20,
+        early_recompute_beta: Optional[float] = None,
+        soft_timeout: Optional[float] = None,
+    ) -> Any:
+        # Call of factory means miss
+        is_computed = False
+
+        async def factory():
+            nonlocal is_computed
+            is_computed = True
+            return await async_factory()
+
+        with self._measure("get_or_set", [key]):
+            value = await self.cache.async_get_or_set(
+                key,
+                factory,
+                timeout=timeout,
+                use_lock=use_lock,
+                lock_timeout=lock_timeout,
+                early_recompute_beta=early_recompute_beta,
+                soft_timeout=soft_timeout,
+            )
+        self._record_read("get_or_set", key, None if is_computed else value)
+        return value
+
+    def lock(
+        self,
+        name: str,
+        timeout: Optional[float] = 20,
+        blocking_timeout: Optional[float] = None,
+        **kwargs,
+    ) -> AsyncContextManager:
+        return self.cache.lock(name, timeout=timeout, blocking_timeout=blocking_timeout, **kwargs)
+
+    def rw_lock(
+        self,
+        name: str,
+        mode: str = "w",
+        timeout: Optional[float] = 20,
+        blocking_timeout: Optional[float] = None,
+        **kwargs,
+    ) -> AsyncContextManager:
+        return self.cache.rw_lock(
+            name, mode=mode, timeout=timeout, blocking_timeout=blocking_timeout, **kwargs
+        )
@@ -1,23 +1,282 @@
 # Adapted from https://github.com/django/django/blob/main/django/core/cache/backends/locmem.py
 
+import bisect
+import copy
+import heapq
 import math
 import re
-from typing import Any, Optional, Dict, Sequence, AsyncContextManager, List
+import sys
+from collections import OrderedDict, deque
+from typing import Any, Optional, Dict, Sequence, AsyncContextManager, List, Type, Tuple, Iterator
+from typing import Deque
 
 import anyio
+from anyio.lowlevel import checkpoint
 
 from starlette_web.common.caches.base import BaseCache, CacheError
-from starlette_web.common.caches.base_lock import BaseLock
+from starlette_web.common.caches.base_lock import BaseLock, BaseRWLock
 from starlette_web.common.http.exceptions import ImproperlyConfigured
-from starlette_web.common.utils.regex import redis_pattern_to_re_pattern
+from starlette_web.common.utils.serializers import BaseSerializer
+from starlette_web.common.utils.regex import (
+    redis_pattern_to_re_pattern,
+    redis_pattern_literal_prefix,
+)
 
 
 _caches: Dict[str, Dict[str, Any]] = {}
 _expire_info: Dict[str, Dict[str, float]] = {}
+_expire_heaps: Dict[str, List[Tuple[float, str]]] = {}
+_key_indexes: Dict[str, "_SortedKeyIndex"] = {}
 _locks: Dict[str, Dict[str, float]] = {}
+_lock_waiters: Dict[str, Dict[str, Deque["_AsyncLocalMemoryLock"]]] = {}
+_rw_locks: Dict[str, Dict[str, "_RWLockState"]] = {}
+_eviction_policies: Dict[str, "BaseEvictionPolicy"] = {}
+
+
+class ObjectReferenceSerializer(BaseSerializer):
+    """
+    Stores references to objects as-is, without serialization.
+    On read, returns either the stored object itself, its shallow copy or its deep copy.
+    """
+
+    copy_functions = {
+        "none": lambda content: content,
+        "shallow": copy.copy,
+        "deepcopy": copy.deepcopy,
+    }
+
+    def __init__(self, copy_on_read: str = "none"):
+        if copy_on_read not in self.copy_functions:
+            raise ImproperlyConfigured(details=f"Unknown COPY_ON_READ value {copy_on_read!r}")
+        self._copy = self.copy_functions[copy_on_read]
+
+    def serialize(self, content: Any) -> Any:
+        return content
+
+    def deserialize(self, content: Any) -> Any:
+        return self._copy(content)
+
+
+def _get_object_size(obj: Any) -> int:
+    # Approximate deep size of an object, counting shared objects once
+    seen = set()
+    size = 0
+    stack = [obj]
+    while stack:
+        _obj = stack.pop()
+        if id(_obj) in seen:
+            continue
+        seen.add(id(_obj))
+        size += sys.getsizeof(_obj)
+
+        if isinstance(_obj, dict):
+            stack.extend(_obj.keys())
+            stack.extend(_obj.values())
+        elif isinstance(_obj, (list, tuple, set, frozenset)):
+            stack.extend(_obj)
+        elif hasattr(_obj, "__dict__") and not isinstance(_obj, type):
+            stack.append(vars(_obj))
+    return size
+
+
+class _SortedKeyIndex:
+    """
+    Sorted set of keys, split into chunks of bounded size,
+    so that insertion and removal cost O(log(n) + chunk size).
+    Allows listing keys with a given prefix without a full scan.
+    """
+
+    _chunk_size = 512
+
+    def __init__(self):
+        self._chunks: List[List[str]] = []
+        self._maxes: List[str] = []
+
+    def add(self, key: str) -> None:
+        if not self._chunks:
+            self._chunks.append([key])
+            self._maxes.append(key)
+            return
+
+        idx = bisect.bisect_left(self._maxes, key)
+        if idx == len(self._maxes):
+            idx -= 1
+
+        chunk = self._chunks[idx]
+        bisect.insort(chunk, key)
+        self._maxes[idx] = chunk[-1]
+
+        half = self._chunk_size
+        if len(chunk) > 2 * half:
+            self._chunks.insert(idx + 1, chunk[half:])
+            self._maxes.insert(idx + 1, chunk[-1])
+            del chunk[half:]
+            self._maxes[idx] = chunk[-1]
+
+    def discard(self, key: str) -> None:
+        idx = bisect.bisect_left(self._maxes, key)
+        if idx == len(self._maxes):
+            return
+
+        chunk = self._chunks[idx]
+        pos = bisect.bisect_left(chunk, key)
+        if pos == len(chunk) or chunk[pos] != key:
+            return
+
+        del chunk[pos]
+        if chunk:
+            self._maxes[idx] = chunk[-1]
+        else:
+            del self._chunks[idx]
+            del self._maxes[idx]
+
+    def iter_prefix(self, prefix: str) -> Iterator[str]:
+        idx = bisect.bisect_left(self._maxes, prefix)
+        if idx == len(self._maxes):
+            return
+
+        pos = bisect.bisect_left(self._chunks[idx], prefix)
+        for chunk in self._chunks[idx:]:
+            for key in chunk[pos:]:
+                if not key.startswith(prefix):
+                    return
+                yield key
+            pos = 0
+
+    def clear(self) -> None:
+        self._chunks.clear()
+        self._maxes.clear()
+
+
+class BaseEvictionPolicy:
+    """
+    Tracks usage order and approximate sizes of keys in a LocalMemoryCache,
+    and selects a victim to evict in O(1).
+    """
+
+    def __init__(self):
+        self.sizes: Dict[str, int] = {}
+        self.total_bytes = 0
+        self.evictions = 0
+
+    def add(self, key: str, size: int) -> None:
+        if key in self.sizes:
+            self.total_bytes -= self.sizes[key]
+            self.touch(key)
+        else:
+            self._insert(key)
+        self.sizes[key] = size
+        self.total_bytes += size
+
+    def discard(self, key: str) -> None:
+        size = self.sizes.pop(key, None)
+        if size is not None:
+            self.total_bytes -= size
+            self._remove(key)
+
+    def pop_victim(self) -> str:
+        key = self._victim()
+        self.discard(key)
+        self.evictions += 1
+        return key
+
+    def clear(self) -> None:
+        self.sizes.clear()
+        self.total_bytes = 0
+
+    def touch(self, key: str) -> None:
+        raise NotImplementedError
+
+    def _insert(self, key: str) -> None:
+        raise NotImplementedError
+
+    def _remove(self, key: str) -> None:
+        raise NotImplementedError
+
+    def _victim(self) -> str:
+        raise NotImplementedError
+
+
+class LRUEvictionPolicy(BaseEvictionPolicy):
+    def __init__(self):
+        super().__init__()
+        self._order: OrderedDict[str, None] = OrderedDict()
+
+    def touch(self, key: str) -> None:
+        if key in self._order:
+            self._order.move_to_end(key)
+
+    def clear(self) -> None:
+        super().clear()
+        self._order.clear()
+
+    def _insert(self, key: str) -> None:
+        self._order[key] = None
+
+    def _remove(self, key: str) -> None:
+        del self._order[key]
+
+    def _victim(self) -> str:
+        return next(iter(self._order))
+
+
+class LFUEvictionPolicy(BaseEvictionPolicy):
+    # Keys are grouped into buckets by access frequency.
+    # Within a bucket, the least recently used key is evicted first.
+    def __init__(self):
+        super().__init__()
+        self._frequencies: Dict[str, int] = {}
+        self._buckets: Dict[int, OrderedDict[str, None]] = {}
+        self._min_frequency = 0
+
+    def touch(self, key: str) -> None:
+        if key not in self._frequencies:
+            return
+
+        frequency = self._unlink(key)
+        self._link(key, frequency + 1)
+        if frequency == self._min_frequency and frequency not in self._buckets:
+            self._min_frequency = frequency + 1
+
+    def clear(self) -> None:
+        super().clear()
+        self._frequencies.clear()
+        self._buckets.clear()
+        self._min_frequency = 0
+
+    def _insert(self, key: str) -> None:
+        self._link(key, 1)
+        self._min_frequency = 1
+
+    def _remove(self, key: str) -> None:
+        self._unlink(key)
+
+    def _victim(self) -> str:
+        if self._min_frequency not in self._buckets:
+            # Minimal bucket has been emptied by explicit deletion
+            self._min_frequency = min(self._buckets)
+        return next(iter(self._buckets[self._min_frequency]))
+
+    def _link(self, key: str, frequency: int) -> None:
+        self._frequencies[key] = frequency
+        self._buckets.setdefault(frequency, OrderedDict())[key] = None
+
+    def _unlink(self, key: str) -> int:
+        frequency = self._frequencies.pop(key)
+        bucket = self._buckets[frequency]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[frequency]
+        return frequency
 
 
 class _AsyncLocalMemoryLock(BaseLock):
+    """
+    Waiters for the same lock name are queued in FIFO order.
+    Only the first waiter in queue watches expiration of the lock,
+    others sleep until they are woken up by release or by cancellation of a waiter ahead.
+    """
+
     def __init__(
         self,
         name: str,
@@ -26,65 +285,293 @@ class _AsyncLocalMemoryLock(BaseLock):
         **kwargs,
     ) -> None:
         super().__init__(name=name, timeout=timeout, blocking_timeout=blocking_timeout, **kwargs)
-        self._manager_lock = kwargs["manager_lock"]
         self._cache_name = kwargs["cache_name"]
-        self._retry_interval = kwargs.get("retry_interval", 0.001)
-        global _locks
-        _locks.setdefault(self._cache_name, {})
-        self._cache_lock = _locks[self._cache_name]
+        global _locks, _lock_waiters
+        self._cache_lock = _locks.setdefault(self._cache_name, {})
+        self._cache_lock_waiters = _lock_waiters.setdefault(self._cache_name, {})
+        self._wakeup_event: Optional[anyio.Event] = None
+        self._deadline: Optional[float] = None
 
     async def _acquire(self):
         if self._is_acquired:
             return
 
-        while True:
-            async with self._manager_lock:
-                if self._cache_lock.get(self._name, -1) < anyio.current_time():
-                    self._cache_lock[self._name] = anyio.current_time() + self._timeout
-                    self._acquire_event.set()
-                    return
-            await anyio.sleep(self._retry_interval)
+        if not self._cache_lock_waiters.get(self._name) and self._try_acquire():
+            self._acquire_event.set()
+            return
+
+        waiters = self._cache_lock_waiters.setdefault(self._name, deque())
+        waiters.append(self)
+        try:
+            while True:
+                self._wakeup_event = anyio.Event()
+                if waiters[0] is not self:
+                    await self._wakeup_event.wait()
+                elif self._try_acquire():
+                    break
+                else:
+                    delay = self._cache_lock[self._name] - anyio.current_time()
+                    with anyio.move_on_after(delay):
+                        await self._wakeup_event.wait()
+        finally:
+            was_first = waiters[0] is self
+            waiters.remove(self)
+            if not waiters:
+                self._cache_lock_waiters.pop(self._name, None)
+            elif was_first:
+                # Next waiter has to watch expiration of the lock, or acquire it
+                waiters[0]._wake_up()
+
+        self._acquire_event.set()
 
     async def _release(self):
         if not self._is_acquired:
             return
 
-        async with self._manager_lock:
-            self._cache_lock[self._name] = -1
+        try:
+            # Lock might have been re-acquired by another instance due to timeout
+            if self._cache_lock.get(self._name) == self._deadline:
+                del self._cache_lock[self._name]
+                waiters = self._cache_lock_waiters.get(self._name)
+                if waiters:
+                    waiters[0]._wake_up()
+        finally:
             self._is_acquired = False
+            self._deadline = None
+
+    def _try_acquire(self) -> bool:
+        now = anyio.current_time()
+        if self._cache_lock.get(self._name, -1) < now:
+            self._deadline = now + self._timeout
+            self._cache_lock[self._name] = self._deadline
+            return True
+        return False
+
+    def _wake_up(self) -> None:
+        if self._wakeup_event is not None:
+            self._wakeup_event.set()
+
+
+class _RWLockState:
+    """
+    Holders of a reader-writer lock with their deadlines, and FIFO queue of its waiters.
+    """
+
+    __slots__ = ("readers", "writer", "waiters")
+
+    def __init__(self):
+        self.readers: Dict["_AsyncLocalMemoryRWLock", float] = {}
+        self.writer: Optional[Tuple["_AsyncLocalMemoryRWLock", float]] = None
+        self.waiters: Deque["_AsyncLocalMemoryRWLock"] = deque()
+
+    def is_empty(self) -> bool:
+        return not self.readers and self.writer is None and not self.waiters
+
+    def can_grant(self, mode: str) -> bool:
+        if self.writer is not None:
+            return False
+        return mode == "r" or not self.readers
+
+    def grant(self, lock: "_AsyncLocalMemoryRWLock", now: float) -> None:
+        deadline = now + lock._timeout
+        if lock._mode == "r":
+            self.readers[lock] = deadline
+        else:
+            self.writer = (lock, deadline)
+        lock._is_granted = True
+
+    def revoke(self, lock: "_AsyncLocalMemoryRWLock") -> None:
+        # Lock might have been granted to another instance due to timeout
+        self.readers.pop(lock, None)
+        if self.writer is not None and self.writer[0] is lock:
+            self.writer = None
+        lock._is_granted = False
+
+    def remove_expired(self, now: float) -> None:
+        for lock, deadline in list(self.readers.items()):
+            if deadline < now:
+                self.revoke(lock)
+        if self.writer is not None and self.writer[1] < now:
+            self.revoke(self.writer[0])
+
+    def next_expiration(self) -> float:
+        deadlines = list(self.readers.values())
+        if self.writer is not None:
+            deadlines.append(self.writer[1])
+        return min(deadlines, default=math.inf)
+
+    def wake_up_waiters(self, now: float) -> None:
+        # Lock is handed off to waiters in FIFO order,
+        # i.e. to a single writer, or to all readers before the next writer
+        self.remove_expired(now)
+        while self.waiters and self.can_grant(self.waiters[0]._mode):
+            waiter = self.waiters.popleft()
+            self.grant(waiter, now)
+            waiter._wake_up()
+
+
+class _AsyncLocalMemoryRWLock(BaseRWLock):
+    """
+    Reader-writer lock, shared by all LocalMemoryCache instances with the same name.
+    Waiters are queued in FIFO order and are granted the lock by release,
+    so a waiting writer blocks readers, which come after it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        timeout: Optional[float] = None,
+        blocking_timeout: Optional[float] = None,
+        mode: str = "w",
+        **kwargs,
+    ) -> None:
+        super().__init__(name, timeout, blocking_timeout, mode=mode, **kwargs)
+        global _rw_locks
+        self._cache_rw_locks = _rw_locks.setdefault(kwargs["cache_name"], {})
+        self._wakeup_event: Optional[anyio.Event] = None
+        self._is_granted = False
+
+    async def _acquire(self):
+        if self._is_acquired:
+            return
+
+        state = self._cache_rw_locks.setdefault(self._name, _RWLockState())
+        now = anyio.current_time()
+        state.remove_expired(now)
+        if not state.waiters and state.can_grant(self._mode):
+            state.grant(self, now)
+            self._acquire_event.set()
+            return
+
+        state.waiters.append(self)
+        try:
+            while not self._is_granted:
+                self._wakeup_event = anyio.Event()
+                # Every waiter watches expiration of holders, which is rare compared to release
+                with anyio.move_on_after(state.next_expiration() - anyio.current_time()):
+                    await self._wakeup_event.wait()
+                if not self._is_granted:
+                    state.wake_up_waiters(anyio.current_time())
+        except BaseException:
+            if self._is_granted:
+                state.revoke(self)
+            else:
+                state.waiters.remove(self)
+            # Waiters behind might be compatible with holders
+            state.wake_up_waiters(anyio.current_time())
+            self._discard_state(state)
+            raise
+
+        self._acquire_event.set()
+
+    async def _release(self):
+        if not self._is_acquired:
+            return
+
+        try:
+            state = self._cache_rw_locks.get(self._name)
+            if state is not None:
+                state.revoke(self)
+                state.wake_up_waiters(anyio.current_time())
+                self._discard_state(state)
+        finally:
+            self._is_acquired = False
+            self._is_granted = False
+
+    def _discard_state(self, state: _RWLockState) -> None:
+        if state.is_empty() and self._cache_rw_locks.get(self._name) is state:
+            del self._cache_rw_locks[self._name]
+
+    def _wake_up(self) -> None:
+        if self._wakeup_event is not None:
+            self._wakeup_event.set()
 
 
 class LocalMemoryCache(BaseCache):
+    """
+    In-process cache. Storage is shared between all instances with the same "name".
+
+    Options:
+    - name: str (required) - name of the storage
+    - MAX_ENTRIES: int (default: None) - maximum number of stored keys
+    - MAX_BYTES: int (default: None) - maximum approximate size of stored keys and values
+    - EVICTION_POLICY: str (default: "lru") - either "lru" or "lfu",
+      defines which key is evicted, when cache is full
+    - SWEEP_INTERVAL: float (default: 60.0) - interval in seconds,
+      with which async_run_expiry_sweeper removes expired keys
+    - STORE_OBJECTS: bool (default: False) - store references to objects without serialization
+    - COPY_ON_READ: str (default: "none") - with STORE_OBJECTS, either "none", "shallow"
+      or "deepcopy", defines whether a copy of stored object is returned on read
+
+    All operations on storage are synchronous and never yield to the event loop midway,
+    so they are atomic within the event loop thread and require no locking.
+    Batch operations process the whole batch in a single pass.
+    """
+
+    _sweep_batch_size = 1000
+
+    eviction_policies: Dict[str, Type[BaseEvictionPolicy]] = {
+        "lru": LRUEvictionPolicy,
+        "lfu": LFUEvictionPolicy,
+    }
+
     def __init__(self, options):
         self.name = options.get("name", None)
         if self.name is None:
             raise ImproperlyConfigured('LocalMemoryCache must be instantiated with option "name"')
 
         super().__init__(options)
-        self._manager_lock = anyio.Lock()
-        self._locking_manager_lock = anyio.Lock()
 
-        global _caches, _locks, _expire_info
+        self._store_objects = options.get("STORE_OBJECTS", False)
+        if self._store_objects:
+            self.serializer = ObjectReferenceSerializer(options.get("COPY_ON_READ", "none"))
+
+        self._max_entries = self._get_limit_option(options, "MAX_ENTRIES")
+        self._max_bytes = self._get_limit_option(options, "MAX_BYTES")
+        eviction_policy = options.get("EVICTION_POLICY", "lru")
+        if eviction_policy not in self.eviction_policies:
+            raise ImproperlyConfigured(
+                details=f"Unknown EVICTION_POLICY {eviction_policy!r} for LocalMemoryCache"
+            )
+
+        self._sweep_interval = options.get("SWEEP_INTERVAL", 60.0)
+
+        global _caches, _locks, _expire_info, _expire_heaps, _key_indexes, _eviction_policies
         self._cache = _caches.setdefault(self.name, {})
         self._expire_info = _expire_info.setdefault(self.name, {})
+        self._expire_heap = _expire_heaps.setdefault(self.name, [])
+        self._key_index = _key_indexes.setdefault(self.name, _SortedKeyIndex())
         self._lock = _locks.setdefault(self.name, {})
+        self._eviction_policy = _eviction_policies.setdefault(
+            self.name,
+            self.eviction_policies[eviction_policy](),
+        )
 
-    async def async_get(self, key: str) -> Any:
-        async with self._manager_lock:
-            if self._has_expired(key):
-                self._delete_key(key)
+    @staticmethod
+    def _get_limit_option(options: Dict[str, Any], option_name: str) -> Optional[int]:
+        value = options.get(option_name)
+        if value is not None and (not isinstance(value, int) or value <= 0):
+            raise ImproperlyConfigured(
+                details=f"{option_name} for LocalMemoryCache must be a positive integer"
+            )
+        return value
 
-            return self.serializer.deserialize(self._cache.get(key))
+    async def async_get(self, key: str) -> Any:
+        return await self._async_check_tags_one(self.serializer.deserialize(self._get_key(key)))
 
-    async def async_set(self, key: str, value: Any, timeout: Optional[float] = 120) -> None:
-        async with self._manager_lock:
-            deadline = anyio.current_time() + timeout if timeout is not None else math.inf
-            self._cache[key] = self.serializer.serialize(value)
-            self._expire_info[key] = deadline
+    async def async_set(
+        self,
+        key: str,
+        value: Any,
+        timeout: Optional[float] = 120,
+        tags: Optional[Sequence[str]] = None,
+    ) -> None:
+        if tags:
+            value = (await self._async_tag_values({key: value}, timeout, tags))[key]
+        self._set_key(key, self.serializer.serialize(value), timeout)
 
     async def async_delete(self, key: str) -> None:
-        async with self._manager_lock:
-            self._delete_key(key)
+        self._delete_key(key)
 
     async def async_keys(self, pattern: str) -> List[str]:
         try:
@@ -92,45 +579,178 @@ class LocalMemoryCache(BaseCache):
         except re.error as exc:
             raise CacheError(details=str(exc)) from exc
 
-        return [
-            key
-            for key in self._cache.keys()
-            if not self._has_expired(key) and re.fullmatch(re_pattern, key)
-        ]
+        prefix = redis_pattern_literal_prefix(pattern)
+
+        self._remove_expired()
+        keys = self._key_index.iter_prefix(prefix) if prefix else self._cache.keys()
+        return [key for key in keys if re.fullmatch(re_pattern, key)]
 
     async def async_has_key(self, key: str) -> bool:
-        async with self._manager_lock:
-            if self._has_expired(key):
-                self._delete_key(key)
+        if self._has_expired(key):
+            self._delete_key(key)
+
+        return key in self._cache
+
+    async def async_incr(self, key: str, delta: int = 1, timeout: Optional[float] = 120) -> int:
+        current = self._get_key(key)
+        if current is None:
+            self._set_key(key, self.serializer.serialize(delta), timeout)
+            return delta
+
+        value = self.serializer.deserialize(current)
+        if type(value) is not int:
+            raise CacheError(details=f"Value of key {key!r} is not an integer")
+
+        value += delta
+        self._store_key(key, self.serializer.serialize(value), self._expire_info[key])
+        return value
+
+    async def async_add(self, key: str, value: Any, timeout: Optional[float] = 120) -> bool:
+        if await self.async_has_key(key):
+            return False
 
-            return key in self._cache
+        self._set_key(key, self.serializer.serialize(value), timeout)
+        return True
+
+    async def async_expire(self, key: str, timeout: Optional[float]) -> bool:
+        if not await self.async_has_key(key):
+            return False
+
+        self._set_key(key, self._cache[key], timeout)
+        return True
+
+    def _get_key(self, key: str) -> Any:
+        if self._has_expired(key):
+            self._delete_key(key)
+            return None
+
+        self._eviction_policy.touch(key)
+        return self._cache[key]
+
+    def _set_key(self, key: str, value: Any, timeout: Optional[float]) -> None:
+        deadline = anyio.current_time() + timeout if timeout is not None else math.inf
+        self._store_key(key, value, deadline)
+
+    def _store_key(self, key: str, value: Any, deadline: float) -> None:
+        if key not in self._cache:
+            self._key_index.add(key)
+        self._cache[key] = value
+        self._expire_info[key] = deadline
+        if deadline != math.inf:
+            self._push_deadline(key, deadline)
+        self._eviction_policy.add(key, self._get_size(key, value))
+        self._cull()
 
     def _delete_key(self, key: str) -> None:
-        self._cache.pop(key, None)
+        if key in self._cache:
+            del self._cache[key]
+            self._key_index.discard(key)
         self._expire_info.pop(key, None)
+        self._eviction_policy.discard(key)
 
     def _has_expired(self, key) -> bool:
         return self._expire_info.get(key, -1) < anyio.current_time()
 
+    def _push_deadline(self, key: str, deadline: float) -> None:
+        # Entries of overwritten and deleted keys are left in heap and skipped on pop.
+        # Rebuild heap, when stale entries start to dominate.
+        heapq.heappush(self._expire_heap, (deadline, key))
+        if len(self._expire_heap) > 2 * len(self._expire_info) + self._sweep_batch_size:
+            self._expire_heap[:] = [
+                (_deadline, _key)
+                for _key, _deadline in self._expire_info.items()
+                if _deadline != math.inf
+            ]
+            heapq.heapify(self._expire_heap)
+
+    def _remove_expired(self, limit: Optional[int] = None) -> int:
+        # Costs O(log(n)) per expired key, keys that have not expired are never visited
+        now = anyio.current_time()
+        removed = 0
+        while self._expire_heap and self._expire_heap[0][0] < now:
+            if limit is not None and removed >= limit:
+                break
+
+            deadline, key = heapq.heappop(self._expire_heap)
+            if self._expire_info.get(key) == deadline:
+                self._delete_key(key)
+                removed += 1
+        return removed
+
+    def _cull(self) -> None:
+        if not self._is_full():
+            return
+
+        self._remove_expired()
+        while self._is_full():
+            key = self._eviction_policy.pop_victim()
+            self._cache.pop(key, None)
+            self._expire_info.pop(key, None)
+            self._key_index.discard(key)
+
+    def _is_full(self) -> bool:
+        return (self._max_entries is not None and len(self._cache) > self._max_entries) or (
+            self._max_bytes is not None and self._eviction_policy.total_bytes > self._max_bytes
+        )
+
+    async def async_remove_expired(self) -> int:
+        removed = 0
+        while True:
+            removed_batch = self._remove_expired(limit=self._sweep_batch_size)
+            removed += removed_batch
+            if removed_batch < self._sweep_batch_size:
+                return removed
+            await checkpoint()
+
+    async def async_run_expiry_sweeper(self) -> None:
+        """
+        Periodically removes expired keys. Runs forever, so it is supposed
+        to be started in a task group, i.e. within application lifespan.
+        """
+        while True:
+            await anyio.sleep(self._sweep_interval)
+            await self.async_remove_expired()
+
+    def _get_size(self, key: str, value: Any) -> int:
+        if self._store_objects:
+            return len(key) + _get_object_size(value)
+        return len(key) + len(value)
+
+    def eviction_stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._cache),
+            "bytes": self._eviction_policy.total_bytes,
+            "evictions": self._eviction_policy.evictions,
+        }
+
     async def async_get_many(self, keys: Sequence[str]) -> Dict[str, Any]:
-        result = dict()
-        for key in keys:
-            result[key] = await self.async_get(key)
-        return result
+        return await self._async_check_tags(
+            {key: self.serializer.deserialize(self._get_key(key)) for key in keys}
+        )
 
-    async def async_set_many(self, data: Dict[str, Any], timeout: Optional[float] = 120) -> None:
-        for key, value in data.items():
-            await self.async_set(key, value, timeout=timeout)
+    async def async_set_many(
+        self,
+        data: Dict[str, Any],
+        timeout: Optional[float] = 120,
+        tags: Optional[Sequence[str]] = None,
+    ) -> None:
+        if tags:
+            data = await self._async_tag_values(data, timeout, tags)
+        # Serialize first, so that serialization error does not leave batch partially written
+        serialized = {key: self.serializer.serialize(value) for key, value in data.items()}
+        for key, value in serialized.items():
+            self._set_key(key, value, timeout)
 
     async def async_delete_many(self, keys: Sequence[str]) -> None:
-        async with self._manager_lock:
-            for key in keys:
-                self._delete_key(key)
+        for key in keys:
+            self._delete_key(key)
 
     async def async_clear(self) -> None:
-        async with self._manager_lock:
-            self._expire_info.clear()
-            self._cache.clear()
+        self._expire_info.clear()
+        self._expire_heap.clear()
+        self._key_index.clear()
+        self._cache.clear()
+        self._eviction_policy.clear()
 
     def lock(
         self,
@@ -143,7 +763,23 @@ class LocalMemoryCache(BaseCache):
             name=name,
             timeout=timeout,
             blocking_timeout=blocking_timeout,
-            manager_lock=self._locking_manager_lock,
+            cache_name=self.name,
+            **kwargs,
+        )
+
+    def rw_lock(
+        self,
+        name: str,
+        mode: str = "w",
+        timeout: Optional[float] = 20.0,
+        blocking_timeout: Optional[float] = None,
+        **kwargs,
+    ) -> AsyncContextManager:
+        return _AsyncLocalMemoryRWLock(
+            name=name,
+            timeout=timeout,
+            blocking_timeout=blocking_timeout,
+            mode=mode,
             cache_name=self.name,
             **kwargs,
         )
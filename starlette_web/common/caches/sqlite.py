@@ -0,0 +1,373 @@
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, AsyncContextManager, Callable, Dict, Iterator, List, Optional, Sequence
+from typing import Type
+
+import anyio
+
+from starlette_web.common.caches.base import BaseCache, CacheError
+from starlette_web.common.caches.base_lock import BaseLock
+from starlette_web.common.http.exceptions import ImproperlyConfigured
+from starlette_web.common.utils.regex import (
+    redis_pattern_to_re_pattern,
+    redis_pattern_literal_prefix,
+    escape_glob_pattern,
+)
+from starlette_web.common.utils.serializers import BytesSerializer, PickleSerializer
+
+
+class SQLiteCache(BaseCache):
+    """
+    Cache in SQLite database in WAL mode, which may be shared by several processes on one host.
+    Queries run in worker threads, each of which keeps its own connection.
+
+    Options:
+    - PATH: str (required) - path to database file, which is created if it does not exist
+    - THREAD_LIMIT: int (default: 10) - maximum number of worker threads, running queries
+    - PURGE_INTERVAL: float (default: 60.0) - interval in seconds,
+      in which expired entries are deleted on write
+    """
+
+    serializer_class: Type[BytesSerializer] = PickleSerializer
+    schema = (
+        """
+        CREATE TABLE IF NOT EXISTS cache (
+            key TEXT NOT NULL PRIMARY KEY,
+            value BLOB NOT NULL,
+            expiry REAL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS cache_expiry ON cache (expiry) WHERE expiry IS NOT NULL",
+        """
+        CREATE TABLE IF NOT EXISTS locks (
+            name TEXT NOT NULL PRIMARY KEY,
+            token TEXT NOT NULL,
+            expiry REAL
+        )
+        """,
+    )
+    # SQLite versions before 3.32 allow at most 999 query parameters
+    _max_query_parameters = 900
+
+    def __init__(self, options: Dict[str, Any]):
+        super().__init__(options)
+        if options.get("PATH") is None:
+            raise ImproperlyConfigured(
+                details='SQLiteCache must be instantiated with option "PATH"'
+            )
+        self.path = Path(options["PATH"])
+
+        if not self.serializer.serializes_to_bytes():
+            raise ImproperlyConfigured(
+                details="serializer_class must be instance of BytesSerializer"
+            )
+
+        self._thread_limiter = anyio.CapacityLimiter(options.get("THREAD_LIMIT", 10))
+        self._purge_interval: float = options.get("PURGE_INTERVAL", 60.0)
+        self._last_purge = time.time()
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_pid: Optional[int] = None
+
+    async def async_get(self, key: str) -> Any:
+        value = self.serializer.deserialize(await self._run_sync(self._sync_get, key))
+        return await self._async_check_tags_one(value)
+
+    def _sync_get(self, key: str) -> Optional[bytes]:
+        row = (
+            self._connection()
+            .execute(
+                "SELECT value FROM cache WHERE key = ? AND (expiry IS NULL OR expiry >= ?)",
+                (key, time.time()),
+            )
+            .fetchone()
+        )
+        return row[0] if row else None
+
+    async def async_get_many(self, keys: Sequence[str]) -> Dict[str, Any]:
+        values = await self._run_sync(self._sync_get_many, keys)
+        return await self._async_check_tags(
+            {key: self.serializer.deserialize(values.get(key)) for key in keys}
+        )
+
+    def _sync_get_many(self, keys: Sequence[str]) -> Dict[str, bytes]:
+        keys = list(dict.fromkeys(keys))
+        values = {}
+        # Single read transaction gives consistent snapshot for all chunks
+        with self._transaction("BEGIN") as connection:
+            now = time.time()
+            for idx in range(0, len(keys), self._max_query_parameters):
+                chunk_end = idx + self._max_query_parameters
+                chunk = keys[idx:chunk_end]
+                rows = connection.execute(
+                    f"SELECT key, value FROM cache WHERE key IN ({', '.join('?' * len(chunk))}) "
+                    "AND (expiry IS NULL OR expiry >= ?)",
+                    (*chunk, now),
+                )
+                values.update(rows)
+        return values
+
+    async def async_set(
+        self,
+        key: str,
+        value: Any,
+        timeout: Optional[float] = 120,
+        tags: Optional[Sequence[str]] = None,
+    ) -> None:
+        await self.async_set_many({key: value}, timeout=timeout, tags=tags)
+
+    async def async_set_many(
+        self,
+        data: Dict[str, Any],
+        timeout: Optional[float] = 120,
+        tags: Optional[Sequence[str]] = None,
+    ) -> None:
+        if tags:
+            data = await self._async_tag_values(data, timeout, tags)
+        expiry = time.time() + timeout if timeout is not None else None
+        rows = [(key, self.serializer.serialize(value), expiry) for key, value in data.items()]
+        await self._run_sync(self._sync_set_many, rows)
+
+    def _sync_set_many(self, rows: List[Any]) -> None:
+        with self._transaction() as connection:
+            connection.executemany(
+                "INSERT INTO cache (key, value, expiry) VALUES (?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value, expiry = excluded.expiry",
+                rows,
+            )
+
+        if time.time() - self._last_purge >= self._purge_interval:
+            self._sync_remove_expired()
+
+    async def async_incr(self, key: str, delta: int = 1, timeout: Optional[float] = 120) -> int:
+        return await self._run_sync(self._sync_incr, key, delta, timeout)
+
+    def _sync_incr(self, key: str, delta: int, timeout: Optional[float]) -> int:
+        with self._transaction() as connection:
+            now = time.time()
+            row = connection.execute(
+                "SELECT value FROM cache WHERE key = ? AND (expiry IS NULL OR expiry >= ?)",
+                (key, now),
+            ).fetchone()
+            if row is None:
+                value = delta
+                connection.execute(
+                    "INSERT INTO cache (key, value, expiry) VALUES (?, ?, ?) "
+                    "ON CONFLICT (key) DO UPDATE "
+                    "SET value = excluded.value, expiry = excluded.expiry",
+                    (
+                        key,
+                        self.serializer.serialize(value),
+                        now + timeout if timeout is not None else None,
+                    ),
+                )
+            else:
+                value = self.serializer.deserialize(row[0])
+                if type(value) is not int:
+                    raise CacheError(details=f"Value of key {key!r} is not an integer")
+                value += delta
+                # Existing key keeps its expiry
+                connection.execute(
+                    "UPDATE cache SET value = ? WHERE key = ?",
+                    (self.serializer.serialize(value), key),
+                )
+        return value
+
+    async def async_add(self, key: str, value: Any, timeout: Optional[float] = 120) -> bool:
+        now = time.time()
+        rows = await self._run_sync(
+            self._sync_execute_rowcount,
+            "INSERT INTO cache (key, value, expiry) VALUES (?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value, expiry = excluded.expiry "
+            "WHERE cache.expiry < ?",
+            (
+                key,
+                self.serializer.serialize(value),
+                now + timeout if timeout is not None else None,
+                now,
+            ),
+        )
+        return rows == 1
+
+    async def async_expire(self, key: str, timeout: Optional[float]) -> bool:
+        now = time.time()
+        rows = await self._run_sync(
+            self._sync_execute_rowcount,
+            "UPDATE cache SET expiry = ? WHERE key = ? AND (expiry IS NULL OR expiry >= ?)",
+            (now + timeout if timeout is not None else None, key, now),
+        )
+        return rows == 1
+
+    async def async_delete(self, key: str) -> None:
+        await self.async_delete_many([key])
+
+    async def async_delete_many(self, keys: Sequence[str]) -> None:
+        await self._run_sync(self._sync_delete_many, keys)
+
+    def _sync_delete_many(self, keys: Sequence[str]) -> None:
+        with self._transaction() as connection:
+            connection.executemany("DELETE FROM cache WHERE key = ?", [(key,) for key in keys])
+
+    async def async_clear(self) -> None:
+        await self._run_sync(self._sync_execute, "DELETE FROM cache")
+
+    async def async_keys(self, pattern: str) -> List[str]:
+        try:
+            re_pattern = redis_pattern_to_re_pattern(pattern)
+        except re.error as exc:
+            raise CacheError(details=str(exc)) from exc
+
+        # Literal prefix of pattern is matched with GLOB, which uses primary key index
+        glob_pattern = escape_glob_pattern(redis_pattern_literal_prefix(pattern)) + "*"
+        rows = await self._run_sync(
+            self._sync_execute,
+            "SELECT key FROM cache WHERE key GLOB ? AND (expiry IS NULL OR expiry >= ?)",
+            (glob_pattern, time.time()),
+        )
+        return [key for (key,) in rows if re.fullmatch(re_pattern, key)]
+
+    async def async_has_key(self, key: str) -> bool:
+        rows = await self._run_sync(
+            self._sync_execute,
+            "SELECT 1 FROM cache WHERE key = ? AND (expiry IS NULL OR expiry >= ?)",
+            (key, time.time()),
+        )
+        return bool(rows)
+
+    async def async_remove_expired(self) -> None:
+        await self._run_sync(self._sync_remove_expired)
+
+    def _sync_remove_expired(self) -> None:
+        self._last_purge = time.time()
+        self._sync_execute("DELETE FROM cache WHERE expiry < ?", (self._last_purge,))
+
+    def lock(
+        self,
+        name: str,
+        timeout: Optional[float] = 20.0,
+        blocking_timeout: Optional[float] = None,
+        **kwargs,
+    ) -> AsyncContextManager:
+        return SQLiteLock(
+            name=name,
+            timeout=timeout,
+            blocking_timeout=blocking_timeout,
+            cache=self,
+            **kwargs,
+        )
+
+    async def _run_sync(self, func: Callable[..., Any], *args) -> Any:
+        try:
+            return await anyio.to_thread.run_sync(func, *args, limiter=self._thread_limiter)
+        except sqlite3.Error as exc:
+            raise CacheError(details=str(exc)) from exc
+
+    def _sync_execute(self, query: str, parameters: Sequence[Any] = ()) -> List[Any]:
+        with self._transaction() as connection:
+            return connection.execute(query, parameters).fetchall()
+
+    def _sync_execute_rowcount(self, query: str, parameters: Sequence[Any] = ()) -> int:
+        with self._transaction() as connection:
+            return connection.execute(query, parameters).rowcount
+
+    @contextmanager
+    def _transaction(self, begin: str = "BEGIN IMMEDIATE") -> Iterator[sqlite3.Connection]:
+        # Write transactions begin with IMMEDIATE, so that they wait for busy_timeout
+        # instead of failing on upgrade from read to write lock
+        connection = self._connection()
+        connection.execute(begin)
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is not None and self._local.pid == os.getpid():
+            return connection
+
+        connection = sqlite3.connect(str(self.path), timeout=30.0, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        self._local.connection = connection
+        self._local.pid = os.getpid()
+
+        with self._schema_lock:
+            if self._schema_pid != os.getpid():
+                with self._transaction() as schema_connection:
+                    for statement in self.schema:
+                        schema_connection.execute(statement)
+                self._schema_pid = os.getpid()
+
+        return connection
+
+
+class SQLiteLock(BaseLock):
+    """
+    Lock, stored as a row in table "locks" of SQLiteCache database.
+    Acquisition is retried with exponential backoff up to max_retry_interval seconds.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        timeout: Optional[float] = None,
+        blocking_timeout: Optional[float] = None,
+        **kwargs,
+    ) -> None:
+        super().__init__(name=name, timeout=timeout, blocking_timeout=blocking_timeout, **kwargs)
+        self._cache: SQLiteCache = kwargs["cache"]
+        self._retry_interval = kwargs.get("retry_interval", 0.001)
+        self._max_retry_interval = kwargs.get("max_retry_interval", 0.05)
+        self._token: Optional[str] = None
+
+    async def _acquire(self):
+        if self._is_acquired:
+            return
+
+        retry_interval = self._retry_interval
+        token = uuid.uuid4().hex
+        while not await self._cache._run_sync(self._sync_acquire, token):
+            await anyio.sleep(retry_interval)
+            retry_interval = min(retry_interval * 2, self._max_retry_interval)
+
+        self._token = token
+        self._acquire_event.set()
+
+    async def _release(self):
+        if not self._is_acquired:
+            return
+
+        try:
+            # Lock might have been re-acquired by another instance due to timeout
+            await self._cache._run_sync(
+                self._cache._sync_execute,
+                "DELETE FROM locks WHERE name = ? AND token = ?",
+                (self._name, self._token),
+            )
+        finally:
+            self._is_acquired = False
+            self._token = None
+
+    def _sync_acquire(self, token: str) -> bool:
+        now = time.time()
+        expiry = None if math.isinf(self._timeout) else now + self._timeout
+        with self._cache._transaction() as connection:
+            connection.execute(
+                "DELETE FROM locks WHERE name = ? AND expiry < ?",
+                (self._name, now),
+            )
+            cursor = connection.execute(
+                "INSERT OR IGNORE INTO locks (name, token, expiry) VALUES (?, ?, ?)",
+                (self._name, token, expiry),
+            )
+            return cursor.rowcount == 1
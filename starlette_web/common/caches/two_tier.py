@@ -0,0 +1,249 @@
+import uuid
+from typing import Any, Optional, Dict, Sequence, AsyncContextManager, List
+
+from starlette_web.common.caches.base import BaseCache
+from starlette_web.common.caches.local_memory import LocalMemoryCache
+from starlette_web.common.channels.base import Channel
+from starlette_web.common.channels.layers.base import BaseChannelLayer
+from starlette_web.common.http.exceptions import ImproperlyConfigured
+from starlette_web.common.utils import import_string
+from starlette_web.common.utils.regex import escape_redis_pattern
+
+
+class TwoTierCache(BaseCache):
+    """
+    In-process bounded L1 cache in front of any other cache (L2) from settings.CACHES.
+    Writes go to both tiers. Keys, that are set or deleted, are broadcast over a channel layer,
+    so that other processes drop stale L1 entries.
+
+    Options:
+    - L2: str (required) - alias of L2 cache in settings.CACHES
+    - L1_OPTIONS: dict (default: {"name": "two_tier:<L2>", "MAX_ENTRIES": 10000})
+      - options of L1 LocalMemoryCache
+    - L1_TIMEOUT: float (default: 5.0) - maximum lifetime of L1 entries in seconds,
+      bounds staleness, if an invalidation message is lost
+    - CHANNEL_LAYER: dict (default: None) - {"BACKEND": ..., "OPTIONS": {...}}
+      of channel layer for invalidation messages
+    - INVALIDATION_GROUP: str (default: "cache_invalidation:<L2>") - channel group name
+
+    Invalidation messages are only sent and received,
+    while async_run_invalidation_listener is running.
+    """
+
+    def __init__(self, options: Dict[str, Any]):
+        super().__init__(options)
+        self._l2_alias = options.get("L2")
+        if self._l2_alias is None:
+            raise ImproperlyConfigured(details='TwoTierCache must be instantiated with option "L2"')
+        self._l2: Optional[BaseCache] = None
+
+        l1_options = dict(options.get("L1_OPTIONS", {"MAX_ENTRIES": 10000}))
+        l1_options.setdefault("name", f"two_tier:{self._l2_alias}")
+        self.l1 = LocalMemoryCache(l1_options)
+        self._l1_timeout = options.get("L1_TIMEOUT", 5.0)
+
+        self._channel_layer: Optional[BaseChannelLayer] = None
+        channel_layer_options = options.get("CHANNEL_LAYER")
+        if channel_layer_options is not None:
+            channel_layer_class = import_string(channel_layer_options["BACKEND"])
+            self._channel_layer = channel_layer_class(**channel_layer_options.get("OPTIONS", {}))
+
+        self._invalidation_group = options.get(
+            "INVALIDATION_GROUP", f"cache_invalidation:{self._l2_alias}"
+        )
+        self._channel: Optional[Channel] = None
+        self._sender_id = uuid.uuid4().hex
+        # Incremented on every local write to L2 and on every received invalidation,
+        # so that values, read from L2 concurrently with them, are not written to L1
+        self._invalidation_counter = 0
+
+    @property
+    def l2(self) -> BaseCache:
+        if self._l2 is None:
+            from starlette_web.common.caches.cache_handler import caches
+
+            self._l2 = caches[self._l2_alias]
+        return self._l2
+
+    async def async_get(self, key: str) -> Any:
+        value = await self.l1.async_get(key)
+        if value is not None:
+            return value
+
+        invalidation_counter = self._invalidation_counter
+        value = await self.l2.async_get(key)
+        if value is not None and invalidation_counter == self._invalidation_counter:
+            await self.l1.async_set(key, value, timeout=self._l1_timeout)
+        return value
+
+    async def async_get_many(self, keys: Sequence[str]) -> Dict[str, Any]:
+        result = await self.l1.async_get_many(keys)
+        missing_keys = [key for key, value in result.items() if value is None]
+        if not missing_keys:
+            return result
+
+        invalidation_counter = self._invalidation_counter
+        l2_result = await self.l2.async_get_many(missing_keys)
+        result.update(l2_result)
+        if invalidation_counter == self._invalidation_counter:
+            await self.l1.async_set_many(
+                {key: value for key, value in l2_result.items() if value is not None},
+                timeout=self._l1_timeout,
+            )
+        return result
+
+    async def async_set(
+        self,
+        key: str,
+        value: Any,
+        timeout: Optional[float] = 120,
+        tags: Optional[Sequence[str]] = None,
+    ) -> None:
+        await self.l2.async_set(key, value, timeout=timeout, tags=tags)
+        self._invalidation_counter += 1
+        await self.l1.async_set(key, value, timeout=self._get_l1_timeout(timeout))
+        await self._publish_invalidation(keys=[key])
+
+    async def async_set_many(
+        self,
+        data: Dict[str, Any],
+        timeout: Optional[float] = 120,
+        tags: Optional[Sequence[str]] = None,
+    ) -> None:
+        await self.l2.async_set_many(data, timeout=timeout, tags=tags)
+        self._invalidation_counter += 1
+        await self.l1.async_set_many(data, timeout=self._get_l1_timeout(timeout))
+        await self._publish_invalidation(keys=list(data.keys()))
+
+    async def async_delete(self, key: str) -> None:
+        await self.l2.async_delete(key)
+        self._invalidation_counter += 1
+        await self.l1.async_delete(key)
+        await self._publish_invalidation(keys=[key])
+
+    async def async_delete_many(self, keys: Sequence[str]) -> None:
+        await self.l2.async_delete_many(keys)
+        self._invalidation_counter += 1
+        await self.l1.async_delete_many(keys)
+        await self._publish_invalidation(keys=list(keys))
+
+    async def async_incr(self, key: str, delta: int = 1, timeout: Optional[float] = 120) -> int:
+        value = await self.l2.async_incr(key, delta, timeout=timeout)
+        self._invalidation_counter += 1
+        await self.l1.async_delete(key)
+        await self._publish_invalidation(keys=[key])
+        return value
+
+    async def async_add(self, key: str, value: Any, timeout: Optional[float] = 120) -> bool:
+        added = await self.l2.async_add(key, value, timeout=timeout)
+        if added:
+            self._invalidation_counter += 1
+            await self.l1.async_delete(key)
+            await self._publish_invalidation(keys=[key])
+        return added
+
+    async def async_expire(self, key: str, timeout: Optional[float]) -> bool:
+        exists = await self.l2.async_expire(key, timeout)
+        self._invalidation_counter += 1
+        await self.l1.async_delete(key)
+        await self._publish_invalidation(keys=[key])
+        return exists
+
+    async def async_invalidate_tags(self, tags: Sequence[str]) -> None:
+        # L1 stores values without tags, so it is dropped as a whole
+        await self.l2.async_invalidate_tags(tags)
+        self._invalidation_counter += 1
+        await self.l1.async_clear()
+        await self._publish_invalidation(clear=True)
+
+    async def async_namespace_key(self, namespace: str, key: str) -> str:
+        return await self.l2.async_namespace_key(namespace, key)
+
+    async def async_invalidate_namespace(self, namespace: str) -> None:
+        # Keys of previous version are unreachable, so L1 of other processes
+        # is not notified, and their entries simply expire
+        await self.l2.async_invalidate_namespace(namespace)
+        pattern = escape_redis_pattern(f"{namespace}:") + "*"
+        await self.l1.async_delete_many(await self.l1.async_keys(pattern))
+
+    async def async_remove_orphans(self) -> int:
+        return await self.l2.async_remove_orphans()
+
+    async def async_run_orphan_cleanup(self) -> None:
+        await self.l2.async_run_orphan_cleanup()
+
+    async def async_keys(self, pattern: str) -> List[str]:
+        return await self.l2.async_keys(pattern)
+
+    async def async_has_key(self, key: str) -> bool:
+        return (await self.l1.async_has_key(key)) or (await self.l2.async_has_key(key))
+
+    async def async_clear(self) -> None:
+        await self.l2.async_clear()
+        self._invalidation_counter += 1
+        await self.l1.async_clear()
+        await self._publish_invalidation(clear=True)
+
+    def lock(
+        self,
+        name: str,
+        timeout: Optional[float] = 20.0,
+        blocking_timeout: Optional[float] = None,
+        **kwargs,
+    ) -> AsyncContextManager:
+        return self.l2.lock(name, timeout=timeout, blocking_timeout=blocking_timeout, **kwargs)
+
+    def rw_lock(
+        self,
+        name: str,
+        mode: str = "w",
+        timeout: Optional[float] = 20.0,
+        blocking_timeout: Optional[float] = None,
+        **kwargs,
+    ) -> AsyncContextManager:
+        return self.l2.rw_lock(
+            name, mode=mode, timeout=timeout, blocking_timeout=blocking_timeout, **kwargs
+        )
+
+    async def async_run_invalidation_listener(self) -> None:
+        """
+        Listens to invalidation messages from other processes. Runs forever,
+        so it is supposed to be started in a task group, i.e. within application lifespan.
+        """
+        if self._channel_layer is None:
+            raise ImproperlyConfigured(
+                details="TwoTierCache requires option CHANNEL_LAYER to listen to invalidations"
+            )
+
+        async with Channel(self._channel_layer) as channel:
+            async with channel.subscribe(self._invalidation_group) as subscriber:
+                self._channel = channel
+                try:
+                    async for event in subscriber:
+                        await self._handle_invalidation(event.message)
+                finally:
+                    self._channel = None
+
+    async def _handle_invalidation(self, message: Dict[str, Any]) -> None:
+        if message.get("sender") == self._sender_id:
+            return
+
+        self._invalidation_counter += 1
+        if message.get("clear"):
+            await self.l1.async_clear()
+        else:
+            await self.l1.async_delete_many(message.get("keys", []))
+
+    async def _publish_invalidation(self, keys: Sequence[str] = (), clear: bool = False) -> None:
+        if self._channel is None:
+            return
+
+        await self._channel.publish(
+            self._invalidation_group,
+            {"sender": self._sender_id, "keys": keys, "clear": clear},
+        )
+
+    def _get_l1_timeout(self, timeout: Optional[float]) -> float:
+        if timeout is None:
+            return self._l1_timeout
+        return min(timeout, self._l1_timeout)
@@ -17,8 +17,9 @@ def make_session_maker(**kwargs) -> sessionmaker:
     connect_args = kwargs.get("connect_args", {"timeout": 20})
 
     if use_pool:
-        pool_size = settings.DATABASE["pool_min_size"]
-        max_overflow = max(0, settings.DATABASE["pool_max_size"] - pool_size)
+        pool_size = kwargs.get("pool_min_size", settings.DATABASE["pool_min_size"])
+        pool_max_size = kwargs.get("pool_max_size", settings.DATABASE["pool_max_size"])
+        max_overflow = max(0, pool_max_size - pool_size)
 
         # If poolclass is None, uses one implemented by engine's method .get_pool_class()
         # Namely, for asyncpg, sqlalchemy.pool.impl.AsyncAdaptedQueuePool
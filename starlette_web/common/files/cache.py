@@ -1,20 +1,31 @@
 import base64
+import binascii
 import hashlib
 import math
+import os
 from pathlib import Path
 import pickle
 import re
+import sqlite3
 import tempfile
+import threading
 import time
+from contextlib import suppress
 from typing import AsyncContextManager, Optional, Sequence, Dict, Any, List, BinaryIO, Type
+from typing import AsyncIterator, Callable, Iterable, Tuple, Union
 
-from anyio.lowlevel import checkpoint
+import anyio
+from filelock import FileLock as StrictFileLock
 
 from starlette_web.common.conf import settings
 from starlette_web.common.caches.base import BaseCache, CacheError
-from starlette_web.common.files.filelock import FileLock
+from starlette_web.common.files.filelock import FileLock, FileRWLock
 from starlette_web.common.http.exceptions import ImproperlyConfigured
-from starlette_web.common.utils.regex import redis_pattern_to_re_pattern
+from starlette_web.common.utils.regex import (
+    redis_pattern_to_re_pattern,
+    redis_pattern_literal_prefix,
+    escape_glob_pattern,
+)
 from starlette_web.common.utils.serializers import (
     BytesSerializer,
     PickleSerializer,
@@ -22,13 +33,169 @@ from starlette_web.common.utils.serializers import (
 )
 
 
+class _FileCacheIndex:
+    """
+    SQLite index of FileCache entries: key -> (expiry, size, last access time).
+    Entries count and total size are maintained by triggers, so that checking limits is O(1).
+    Connection is shared by worker threads of a process, and is reopened after fork.
+    """
+
+    filename = "index.sqlite3"
+    schema_version = 1
+    schema = (
+        """
+        CREATE TABLE IF NOT EXISTS entries (
+            key TEXT PRIMARY KEY,
+            expiry REAL,
+            size INTEGER NOT NULL,
+            accessed REAL NOT NULL
+        ) WITHOUT ROWID
+        """,
+        "CREATE INDEX IF NOT EXISTS entries_expiry ON entries (expiry) WHERE expiry IS NOT NULL",
+        "CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)",
+        """
+        CREATE TABLE IF NOT EXISTS stats (
+            id INTEGER PRIMARY KEY CHECK (id = 0),
+            entries INTEGER NOT NULL,
+            bytes INTEGER NOT NULL
+        )
+        """,
+        "INSERT OR IGNORE INTO stats VALUES (0, 0, 0)",
+        """
+        CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN
+            UPDATE stats SET entries = entries + 1, bytes = bytes + NEW.size;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN
+            UPDATE stats SET entries = entries - 1, bytes = bytes - OLD.size;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS entries_update AFTER UPDATE OF size ON entries BEGIN
+            UPDATE stats SET bytes = bytes - OLD.size + NEW.size;
+        END
+        """,
+    )
+
+    def __init__(self, base_dir: Union[str, Path]):
+        self.path = Path(base_dir) / self.filename
+        self._connection: Optional[sqlite3.Connection] = None
+        self._connection_pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self.created = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is not None and self._connection_pid == os.getpid():
+            return self._connection
+
+        connection = sqlite3.connect(
+            str(self.path),
+            timeout=30.0,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            (version,) = connection.execute("PRAGMA user_version").fetchone()
+            if version < self.schema_version:
+                for statement in self.schema:
+                    connection.execute(statement)
+                connection.execute(f"PRAGMA user_version = {self.schema_version}")
+                self.created = True
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            connection.close()
+            raise
+
+        self._connection = connection
+        self._connection_pid = os.getpid()
+        return connection
+
+    def _execute(self, query: str, parameters: Sequence[Any] = ()) -> List[Tuple[Any, ...]]:
+        with self._lock:
+            return self._connect().execute(query, parameters).fetchall()
+
+    def _executemany(self, query: str, parameters: Iterable[Sequence[Any]]) -> None:
+        with self._lock:
+            connection = self._connect()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.executemany(query, parameters)
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+
+    def upsert(self, entries: Iterable[Tuple[str, Optional[float], int, float]]) -> None:
+        self._executemany(
+            "INSERT INTO entries (key, expiry, size, accessed) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET "
+            "expiry = excluded.expiry, size = excluded.size, accessed = excluded.accessed",
+            entries,
+        )
+
+    def touch(self, accessed: Dict[str, float]) -> None:
+        self._executemany(
+            "UPDATE entries SET accessed = ? WHERE key = ?",
+            [(timestamp, key) for key, timestamp in accessed.items()],
+        )
+
+    def delete(self, keys: Sequence[str]) -> None:
+        self._executemany("DELETE FROM entries WHERE key = ?", [(key,) for key in keys])
+
+    def clear(self) -> None:
+        self._execute("DELETE FROM entries")
+
+    def stats(self) -> Tuple[int, int]:
+        return self._execute("SELECT entries, bytes FROM stats")[0]
+
+    def keys(self, prefix: str, after: Optional[str], limit: int, now: float) -> List[str]:
+        query = "SELECT key FROM entries WHERE (expiry IS NULL OR expiry >= ?)"
+        parameters: List[Any] = [now]
+        if prefix:
+            # GLOB is case-sensitive, so that it uses primary key index
+            query += " AND key GLOB ?"
+            parameters.append(escape_glob_pattern(prefix) + "*")
+        if after is not None:
+            query += " AND key > ?"
+            parameters.append(after)
+        query += " ORDER BY key LIMIT ?"
+        parameters.append(limit)
+        return [row[0] for row in self._execute(query, parameters)]
+
+    def expired(self, now: float, limit: int) -> List[str]:
+        rows = self._execute(
+            "SELECT key FROM entries WHERE expiry < ? ORDER BY expiry LIMIT ?", (now, limit)
+        )
+        return [row[0] for row in rows]
+
+    def least_recently_used(self, limit: int) -> List[Tuple[str, int]]:
+        return self._execute("SELECT key, size FROM entries ORDER BY accessed LIMIT ?", (limit,))
+
+
 class FileCache(BaseCache):
     # For test purposes, not recommended for production
+    # Keys are stored in files CACHE_DIR/<shard>/<name>, where shard is 2 hex digits of key hash.
+    # Files are written to temporary file and atomically renamed,
+    # so that neither readers nor writers need to hold a lock.
+    # Disk I/O runs in worker threads, bounded by THREAD_LIMIT per cache instance.
+    # Keys, their expiry and sizes are indexed in SQLite database CACHE_DIR/index.sqlite3,
+    # which is used to list keys, remove expired files and cull entries over
+    # MAX_ENTRIES/MAX_BYTES in least-recently-used order.
+    # Read-modify-write operations (async_incr, async_add, async_expire) hold
+    # OS file lock CACHE_DIR/<shard>/.lock, so they are atomic with respect to each other,
+    # but not with respect to plain async_set.
     lock_class = FileLock
-    _manager_lock_blocking_timeout = 10
-    _manager_lock_timeout = 1.0
     serializer_class: Type[BytesSerializer] = PickleSerializer
     timestamp_bom = b"ND16C7Bh9Xd"
+    hashed_key_suffix = ".hashed"
+    _access_flush_size = 1000
+    _cull_batch_size = 1000
 
     def __init__(self, options: Dict[str, Any]):
         super().__init__(options)
@@ -36,33 +203,67 @@ class FileCache(BaseCache):
         if self.base_dir is None or not Path(self.base_dir).is_dir():
             raise ImproperlyConfigured(details="Invalid CACHE_DIR value for FileCache")
 
-        self.serializer = self.serializer_class()
         if not self.serializer.serializes_to_bytes():
             raise ImproperlyConfigured(
                 details="serializer_class must be instance of BytesSerializer"
             )
 
+        self._thread_limiter = anyio.CapacityLimiter(options.get("THREAD_LIMIT", 10))
+
+        self._max_entries: Optional[int] = options.get("MAX_ENTRIES")
+        self._max_bytes: Optional[int] = options.get("MAX_BYTES")
+        self._cull_fraction: float = options.get("CULL_FRACTION", 0.1)
+        self._purge_interval: float = options.get("PURGE_INTERVAL", 60.0)
+        self._last_purge = time.time()
+
+        self._index = _FileCacheIndex(self.base_dir)
+        self._index_checked = False
+        self._index_check_lock = threading.Lock()
+        # Access times of read keys, which are written to index in bulk.
+        # Guarded by lock, since it is updated from several worker threads
+        self._accessed: Dict[str, float] = {}
+        self._accessed_lock = threading.Lock()
+
+    async def _run_sync(self, func: Callable[..., Any], *args) -> Any:
+        return await anyio.to_thread.run_sync(func, *args, limiter=self._thread_limiter)
+
     async def async_get(self, key: str) -> Any:
-        async with self._get_manager_lock():
-            return self._sync_get(key)
+        return await self._async_check_tags_one(await self._run_sync(self._sync_get, key))
 
     async def async_get_many(self, keys: Sequence[str]) -> Dict[str, Any]:
-        async with self._get_manager_lock():
-            results = {}
-            for key in keys:
-                await checkpoint()
-                results[key] = self._sync_get(key)
-            return results
+        return await self._async_check_tags(await self._run_sync(self._sync_get_many, keys))
+
+    def _sync_get_many(self, keys: Sequence[str]) -> Dict[str, Any]:
+        return {key: self._sync_get(key) for key in keys}
 
     def _sync_get(self, key: str) -> Any:
-        path = Path(self.base_dir) / self._key_name(key)
-        if path.is_file():
-            with open(path, "rb") as file:
-                if self._sync_get_deadline(file) < time.time():
+        entry = self._sync_read(key)
+        if entry is None:
+            return None
+
+        with self._accessed_lock:
+            self._accessed[key] = time.time()
+            needs_flush = len(self._accessed) >= self._access_flush_size
+        if needs_flush:
+            self._sync_flush_accessed()
+        return entry[0]
+
+    def _sync_read(self, key: str) -> Optional[Tuple[Any, float]]:
+        # Returns value and deadline of key, or None, if key does not exist or has expired
+        try:
+            with open(self._key_path(key), "rb") as file:
+                deadline = self._sync_get_deadline(file)
+                if deadline < time.time():
                     return None
                 content = self.serializer.deserialize(file.read())
-                return content["data"]
-        return None
+        except FileNotFoundError:
+            return None
+
+        # Hashed keys store original key, to exclude hash collisions
+        if content.get("key", key) != key:
+            return None
+
+        return content["data"], deadline
 
     def _sync_get_deadline(self, _file: BinaryIO) -> float:
         try:
@@ -78,93 +279,322 @@ class FileCache(BaseCache):
             _file.seek(0)
             return math.inf
 
-    async def async_set(self, key: str, value: Any, timeout: Optional[float] = 120) -> None:
-        async with self._get_manager_lock():
-            self._sync_set(key, value, timeout)
+    async def async_set(
+        self,
+        key: str,
+        value: Any,
+        timeout: Optional[float] = 120,
+        tags: Optional[Sequence[str]] = None,
+    ) -> None:
+        if tags:
+            value = (await self._async_tag_values({key: value}, timeout, tags))[key]
+        await self._run_sync(self._sync_set, key, value, timeout)
+
+    async def async_set_many(
+        self,
+        data: Dict[str, Any],
+        timeout: Optional[float] = 120,
+        tags: Optional[Sequence[str]] = None,
+    ) -> None:
+        if tags:
+            data = await self._async_tag_values(data, timeout, tags)
+        await self._run_sync(self._sync_set_many, data, timeout)
 
-    async def async_set_many(self, data: Dict[str, Any], timeout: Optional[float] = 120) -> None:
-        async with self._get_manager_lock():
-            for key, value in data.items():
-                await checkpoint()
-                self._sync_set(key, value, timeout)
+    def _sync_set_many(self, data: Dict[str, Any], timeout: Optional[float] = 120) -> None:
+        entries = [self._sync_write(key, value, timeout) for key, value in data.items()]
+        self._sync_index().upsert(entries)
+        self._sync_maintain()
 
     def _sync_set(self, key: str, value: Any, timeout: Optional[float] = 120) -> None:
-        path = Path(self.base_dir) / self._key_name(key)
-        with open(path, "wb") as file:
-            content = {"data": value}
-            if timeout is not None:
-                deadline = time.time() + timeout
-                # pickle.dumps of float is always 21 bytes
-                file.write(self.timestamp_bom + pickle.dumps(deadline, protocol=4))
-            file.write(self.serializer.serialize(content))
+        self._sync_index().upsert([self._sync_write(key, value, timeout)])
+        self._sync_maintain()
+
+    def _sync_write(
+        self, key: str, value: Any, timeout: Optional[float]
+    ) -> Tuple[str, Optional[float], int, float]:
+        path = self._key_path(key)
+        content = {"data": value}
+        if path.name.endswith(self.hashed_key_suffix):
+            content["key"] = key
+
+        now = time.time()
+        deadline = None
+        data = self.serializer.serialize(content)
+        if timeout is not None:
+            deadline = now + timeout
+            # pickle.dumps of float is always 21 bytes
+            data = self.timestamp_bom + pickle.dumps(deadline, protocol=4) + data
+
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=".")
+        except FileNotFoundError:
+            path.parent.mkdir(exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=".")
+
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            with suppress(FileNotFoundError):
+                os.unlink(temp_path)
+            raise
+
+        return key, deadline, len(data), now
+
+    async def async_incr(self, key: str, delta: int = 1, timeout: Optional[float] = 120) -> int:
+        return await self._run_sync(self._sync_incr, key, delta, timeout)
+
+    def _sync_incr(self, key: str, delta: int, timeout: Optional[float]) -> int:
+        with self._sync_key_lock(key):
+            entry = self._sync_read(key)
+            if entry is None:
+                value = delta
+            else:
+                value, deadline = entry
+                if type(value) is not int:
+                    raise CacheError(details=f"Value of key {key!r} is not an integer")
+                value += delta
+                # Existing key keeps its deadline
+                timeout = None if deadline == math.inf else max(deadline - time.time(), 0.0)
+
+            index_entry = self._sync_write(key, value, timeout)
+
+        self._sync_index().upsert([index_entry])
+        self._sync_maintain()
+        return value
+
+    async def async_add(self, key: str, value: Any, timeout: Optional[float] = 120) -> bool:
+        return await self._run_sync(self._sync_add, key, value, timeout)
+
+    def _sync_add(self, key: str, value: Any, timeout: Optional[float]) -> bool:
+        with self._sync_key_lock(key):
+            if self._sync_read(key) is not None:
+                return False
+            index_entry = self._sync_write(key, value, timeout)
+
+        self._sync_index().upsert([index_entry])
+        self._sync_maintain()
+        return True
+
+    async def async_expire(self, key: str, timeout: Optional[float]) -> bool:
+        return await self._run_sync(self._sync_expire, key, timeout)
+
+    def _sync_expire(self, key: str, timeout: Optional[float]) -> bool:
+        with self._sync_key_lock(key):
+            entry = self._sync_read(key)
+            if entry is None:
+                return False
+            index_entry = self._sync_write(key, entry[0], timeout)
+
+        self._sync_index().upsert([index_entry])
+        return True
+
+    def _sync_key_lock(self, key: str) -> StrictFileLock:
+        # Lock file starts with dot, so that it is not listed as a cache entry
+        shard = self._key_path(key).parent
+        shard.mkdir(exist_ok=True)
+        return StrictFileLock(str(shard / ".lock"))
 
     async def async_delete(self, key: str) -> None:
-        async with self._get_manager_lock():
-            self._sync_delete(key)
+        await self._run_sync(self._sync_delete, key)
 
     async def async_delete_many(self, keys: Sequence[str]) -> None:
-        async with self._get_manager_lock():
-            for key in keys:
-                self._sync_delete(key)
+        await self._run_sync(self._sync_delete_many, keys)
+
+    def _sync_delete_many(self, keys: Sequence[str]) -> None:
+        for key in keys:
+            self._sync_unlink(key)
+        self._sync_index().delete(keys)
 
     def _sync_delete(self, key) -> None:
-        path = Path(self.base_dir) / self._key_name(key)
-        if path.is_file():
-            path.unlink()
+        self._sync_unlink(key)
+        self._sync_index().delete([key])
+
+    def _sync_unlink(self, key) -> None:
+        with self._accessed_lock:
+            self._accessed.pop(key, None)
+        with suppress(FileNotFoundError):
+            self._key_path(key).unlink()
 
     async def async_clear(self) -> None:
-        async with self._get_manager_lock():
-            _manager_lock_name = self._get_manager_lock_name()
-            for file in Path(self.base_dir).iterdir():
-                if str(file) == _manager_lock_name:
-                    continue
-                file.unlink()
+        for shard in await self._run_sync(self._sync_list_shards):
+            await self._run_sync(self._sync_clear_shard, shard)
+        await self._run_sync(self._sync_clear_index)
+
+    def _sync_clear_shard(self, shard: str) -> None:
+        for entry in self._sync_list_shard(shard):
+            with suppress(FileNotFoundError):
+                os.unlink(entry.path)
+
+    def _sync_clear_index(self) -> None:
+        with self._accessed_lock:
+            self._accessed = {}
+        self._sync_index().clear()
 
     async def async_keys(self, pattern: str) -> List[str]:
+        return [key async for key in self.async_iter_keys(pattern)]
+
+    async def async_iter_keys(self, pattern: str, count: int = 1000) -> AsyncIterator[str]:
+        # Pages through index in key order,
+        # so keys, changed concurrently, may or may not be yielded
         try:
             re_pattern = redis_pattern_to_re_pattern(pattern)
         except re.error as exc:
             raise CacheError(details=str(exc)) from exc
 
-        keys = []
-        async with self._get_manager_lock():
-            _manager_lock_name = self._get_manager_lock_name()
-            for file in Path(self.base_dir).iterdir():
-                await checkpoint()
-                if str(file) == _manager_lock_name:
-                    continue
-                key = base64.b32decode(file.name.replace("8", "=").encode()).decode()
-                # Check for expiration
-                with open(str(file), "rb") as file:
-                    deadline = self._sync_get_deadline(file)
-                if deadline >= time.time() and re.fullmatch(re_pattern, key):
-                    keys.append(key)
-            return keys
+        prefix = redis_pattern_literal_prefix(pattern)
+        index = await self._run_sync(self._sync_index)
+        last_key = None
+        while True:
+            keys = await self._run_sync(index.keys, prefix, last_key, count, time.time())
+            for key in keys:
+                if re.fullmatch(re_pattern, key):
+                    yield key
+
+            if len(keys) < count:
+                break
+            last_key = keys[-1]
 
     async def async_has_key(self, key: str) -> bool:
         return (await self.async_get(key)) is not None
 
-    def _get_manager_lock(self):
-        return self.lock_class(
-            self._get_manager_lock_name(),
-            blocking_timeout=self._manager_lock_blocking_timeout,
-            timeout=self._manager_lock_timeout,
+    async def async_remove_expired(self) -> None:
+        await self._run_sync(self._sync_remove_expired)
+
+    def _sync_remove_expired(self) -> None:
+        index = self._sync_index()
+        while True:
+            keys = index.expired(time.time(), self._cull_batch_size)
+            self._sync_delete_many(keys)
+            if len(keys) < self._cull_batch_size:
+                break
+        self._last_purge = time.time()
+
+    def _sync_flush_accessed(self) -> None:
+        # Detached dict is no longer updated by other threads, so it is iterated without lock
+        with self._accessed_lock:
+            accessed, self._accessed = self._accessed, {}
+        if accessed:
+            self._sync_index().touch(accessed)
+
+    def _sync_maintain(self) -> None:
+        if time.time() - self._last_purge >= self._purge_interval:
+            self._sync_remove_expired()
+
+        if self._is_full():
+            self._sync_cull()
+
+    def _is_full(self) -> bool:
+        if self._max_entries is None and self._max_bytes is None:
+            return False
+
+        entries, size = self._sync_index().stats()
+        return (self._max_entries is not None and entries > self._max_entries) or (
+            self._max_bytes is not None and size > self._max_bytes
         )
 
-    def _get_manager_lock_name(self) -> str:
-        return str(Path(tempfile.gettempdir()) / (self._get_project_hash() + "_cache.lock"))
+    def _sync_cull(self) -> None:
+        # Removes expired entries, then removes least recently used entries in bulk,
+        # down to (1 - CULL_FRACTION) of limits, so that culling does not run on every write
+        self._sync_remove_expired()
+        if not self._is_full():
+            return
 
-    @staticmethod
-    def _key_name(key: str) -> str:
+        self._sync_flush_accessed()
+        index = self._sync_index()
+        entries, size = index.stats()
+        entries_to_remove = 0
+        if self._max_entries is not None:
+            entries_to_remove = entries - int(self._max_entries * (1 - self._cull_fraction))
+        bytes_to_remove = 0
+        if self._max_bytes is not None:
+            bytes_to_remove = size - int(self._max_bytes * (1 - self._cull_fraction))
+
+        while entries_to_remove > 0 or bytes_to_remove > 0:
+            victims = index.least_recently_used(self._cull_batch_size)
+            if not victims:
+                break
+
+            keys = []
+            for key, key_size in victims:
+                if entries_to_remove <= 0 and bytes_to_remove <= 0:
+                    break
+                keys.append(key)
+                entries_to_remove -= 1
+                bytes_to_remove -= key_size
+            self._sync_delete_many(keys)
+
+    def _sync_index(self) -> _FileCacheIndex:
+        if not self._index_checked:
+            with self._index_check_lock:
+                # Index is checked and rebuilt by a single thread, others wait for it
+                if not self._index_checked:
+                    # Opening index creates it, if it did not exist
+                    self._index.stats()
+                    if self._index.created:
+                        self._sync_rebuild_index()
+                    self._index_checked = True
+        return self._index
+
+    def _sync_rebuild_index(self) -> None:
+        # Indexes files, written before index was created
+        entries = []
+        for shard in self._sync_list_shards():
+            for entry in self._sync_list_shard(shard):
+                key = self._key_from_name(entry.name)
+                try:
+                    with open(entry.path, "rb") as file:
+                        deadline = self._sync_get_deadline(file)
+                        if key is None and entry.name.endswith(self.hashed_key_suffix):
+                            key = self.serializer.deserialize(file.read()).get("key")
+                    size = entry.stat().st_size
+                except (OSError, DeserializeError):
+                    continue
+
+                if key is not None:
+                    expiry = deadline if deadline != math.inf else None
+                    entries.append((key, expiry, size, time.time()))
+
+        self._index.upsert(entries)
+
+    def _sync_list_shards(self) -> List[str]:
+        with os.scandir(self.base_dir) as shards:
+            return [
+                shard.path
+                for shard in shards
+                if shard.is_dir() and re.fullmatch(r"[0-9a-f]{2}", shard.name)
+            ]
+
+    def _sync_list_shard(self, shard: str) -> List[os.DirEntry]:
+        try:
+            with os.scandir(shard) as entries:
+                # Files, starting with dot, are temporary files of unfinished writes
+                return [entry for entry in entries if not entry.name.startswith(".")]
+        except FileNotFoundError:
+            return []
+
+    def _key_path(self, key: str) -> Path:
         # 151-155 base256 => 248 base32
         # 156-160 base256 => 256 base32
         # Linux supports only 255 bytes for filename,
-        # as for Windows, lengthy paths also not recommended
+        # as for Windows, lengthy paths also not recommended,
+        # so longer keys are stored under their hash
         encoded_key = key.encode("utf-8")
+        key_hash = hashlib.sha256(encoded_key).hexdigest()
         if len(encoded_key) >= 156:
-            raise CacheError(details="Key length must not exceed 155 bytes.")
+            name = key_hash + self.hashed_key_suffix
+        else:
+            name = base64.b32encode(encoded_key).decode().replace("=", "8")
 
-        return base64.b32encode(encoded_key).decode().replace("=", "8")
+        return Path(self.base_dir) / key_hash[:2] / name
+
+    @staticmethod
+    def _key_from_name(name: str) -> Optional[str]:
+        try:
+            return base64.b32decode(name.replace("8", "=").encode()).decode()
+        except (binascii.Error, UnicodeDecodeError):
+            return None
 
     def lock(
         self,
@@ -179,5 +609,27 @@ class FileCache(BaseCache):
             blocking_timeout=blocking_timeout,
         )
 
+    def rw_lock(
+        self,
+        name: str,
+        mode: str = "w",
+        timeout: Optional[float] = 20.0,
+        blocking_timeout: Optional[float] = None,
+        **kwargs,
+    ) -> AsyncContextManager:
+        return FileRWLock(
+            name=name,
+            timeout=timeout,
+            blocking_timeout=blocking_timeout,
+            mode=mode,
+            **kwargs,
+        )
+
+    def _get_or_set_lock_name(self, key: str) -> str:
+        key_hash = hashlib.md5(key.encode("utf-8")).hexdigest()
+        return str(
+            Path(tempfile.gettempdir()) / f"{self._get_project_hash()}_get_or_set_{key_hash}.lock"
+        )
+
     def _get_project_hash(self):
         return hashlib.md5(str(settings.SECRET_KEY).encode("utf-8")).hexdigest()
@@ -1,21 +1,30 @@
 import hashlib
+import json
+import math
 import os
 import pickle
 import tempfile
 import time
-from typing import Any, Union, Optional
+from contextlib import contextmanager
+import uuid
+from typing import Any, Dict, Iterator, Optional, Type, Union
 
 import anyio
 from anyio.lowlevel import cancel_shielded_checkpoint
 from filelock import FileLock as StrictFileLock
 
 from starlette_web.common.conf import settings
-from starlette_web.common.caches.base_lock import BaseLock, CacheLockError
+from starlette_web.common.caches.base_lock import BaseLock, BaseRWLock, CacheLockError
 
+if os.name != "nt":
+    import fcntl
 
-class FileLock(BaseLock):
+
+class SoftFileLock(BaseLock):
     """
-    An async variation of SoftFileLock with support of timeout (via os.path.getmtime)
+    An async variation of SoftFileLock with support of timeout (via os.path.getmtime).
+    All instances within project are serialized with a single manager lock.
+    Used on platforms without fcntl (Windows).
     """
 
     EXIT_MAX_DELAY = 60.0
@@ -36,17 +45,14 @@ class FileLock(BaseLock):
             return
 
         while True:
-            await anyio.sleep(self._retry_interval)
             try:
                 with self._get_manager_lock():
                     if self._sync_acquire():
                         self._acquire_event.set()
                         return
-            except CacheLockError:
-                self._task_group.cancel_scope.cancel()
-                raise
             except OSError:
-                continue
+                pass
+            await anyio.sleep(self._retry_interval)
 
     async def _release(self):
         if not self._is_acquired:
@@ -122,3 +128,337 @@ class FileLock(BaseLock):
 
     def _get_project_hash(self):
         return hashlib.md5(str(settings.SECRET_KEY).encode("utf-8")).hexdigest()
+
+
+class FcntlFileLock(BaseLock):
+    """
+    Cross-process lock, held as fcntl.flock on file "name", so that kernel releases it,
+    if holder process dies. Holder writes its deadline to the lock file,
+    and once the deadline has expired, a waiter replaces lock file with a new one.
+
+    Lock file is only opened, replaced or removed under a short non-blocking flock
+    of a guard file, one per lock name, so that locks with different names never contend.
+    Guard file is removed after each use.
+    Acquisition is retried with exponential backoff up to max_retry_interval seconds,
+    but not later than deadline of holder.
+    """
+
+    def __init__(
+        self,
+        name: Union[str, os.PathLike[Any]],
+        timeout: Optional[float] = None,
+        blocking_timeout: Optional[float] = None,
+        **kwargs,
+    ) -> None:
+        super().__init__(os.path.abspath(os.fspath(name)), timeout, blocking_timeout, **kwargs)
+        self._retry_interval = kwargs.get("retry_interval", 0.001)
+        self._max_retry_interval = kwargs.get("max_retry_interval", 0.05)
+        self._guard_path = os.path.join(
+            tempfile.gettempdir(),
+            self._get_project_hash()
+            + "_filelock_"
+            + hashlib.md5(self._name.encode("utf-8")).hexdigest()
+            + ".guard",
+        )
+        self._fd: Optional[int] = None
+
+    async def _acquire(self):
+        if self._is_acquired:
+            return
+
+        retry_interval = self._retry_interval
+        while True:
+            holder_deadline = self._sync_acquire()
+            if holder_deadline is None:
+                break
+
+            await anyio.sleep(max(min(retry_interval, holder_deadline - time.time()), 0))
+            retry_interval = min(retry_interval * 2, self._max_retry_interval)
+
+        self._acquire_event.set()
+
+    async def _release(self):
+        if not self._is_acquired:
+            return
+
+        try:
+            while not self._sync_release():
+                await anyio.sleep(self._retry_interval)
+        finally:
+            # Closing file releases flock, even if lock file could not be removed
+            self._close()
+            self._is_acquired = False
+
+    def _sync_acquire(self) -> Optional[float]:
+        # Returns None, if lock is acquired, otherwise deadline of holder
+        try:
+            with self._guard():
+                fd = os.open(self._name, os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    try:
+                        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        holder_deadline = self._read_deadline(fd)
+                        if holder_deadline > time.time():
+                            os.close(fd)
+                            return holder_deadline
+
+                        # Holder has expired, but still holds flock of its file.
+                        # Replace lock file, other waiters only open it under guard.
+                        os.close(fd)
+                        os.unlink(self._name)
+                        fd = os.open(self._name, os.O_RDWR | os.O_CREAT | os.O_EXCL, 0o644)
+                        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+                    deadline = time.time() + self._timeout
+                    os.ftruncate(fd, 0)
+                    os.pwrite(fd, f"{deadline!r}\n{os.getpid()}\n".encode(), 0)
+                except BaseException:
+                    os.close(fd)
+                    raise
+
+                self._fd = fd
+                return None
+
+        except BlockingIOError:
+            # Guard is held by another instance
+            return math.inf
+
+    def _sync_release(self) -> bool:
+        # Returns False, if guard is held by another instance
+        try:
+            with self._guard():
+                try:
+                    stat = os.stat(self._name)
+                except FileNotFoundError:
+                    return True
+
+                fd_stat = os.fstat(self._fd)
+                # Lock file might have been replaced by another instance due to timeout
+                if (stat.st_dev, stat.st_ino) == (fd_stat.st_dev, fd_stat.st_ino):
+                    os.unlink(self._name)
+                return True
+
+        except BlockingIOError:
+            return False
+
+    @contextmanager
+    def _guard(self) -> Iterator[None]:
+        # Guard file is removed by its holder after each use, so that temporary directory
+        # does not collect a guard file per lock name
+        while True:
+            fd = os.open(self._guard_path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+                # Guard file might have been removed by another instance
+                # between opening and locking it
+                fd_stat = os.fstat(fd)
+                try:
+                    stat = os.stat(self._guard_path)
+                except FileNotFoundError:
+                    continue
+                if (stat.st_dev, stat.st_ino) != (fd_stat.st_dev, fd_stat.st_ino):
+                    continue
+
+                try:
+                    yield
+                finally:
+                    os.unlink(self._guard_path)
+                return
+            finally:
+                os.close(fd)
+
+    @staticmethod
+    def _read_deadline(fd: int) -> float:
+        try:
+            return float(os.pread(fd, 64, 0).split(b"\n", 1)[0])
+        except ValueError:
+            # Not written by FcntlFileLock, so it never expires
+            return math.inf
+
+    def _close(self):
+        fd, self._fd = self._fd, None
+        if fd is not None:
+            os.close(fd)
+
+    def __del__(self):
+        try:
+            self._close()
+        except (OSError, AttributeError):
+            pass
+
+    def _get_project_hash(self):
+        return hashlib.md5(str(settings.SECRET_KEY).encode("utf-8")).hexdigest()
+
+
+class FileRWLock(BaseRWLock):
+    """
+    Cross-process reader-writer lock. Its holders are stored as JSON in a state file
+    in temporary directory, one per lock name, which is read and updated under
+    a short non-blocking fcntl.flock, and removed, once the lock has no holders.
+
+    Each holder is stored with its deadline and pid, so that holders, whose timeout
+    has expired or whose process has died, are discarded by waiters.
+    Waiting writers register themselves for a short time, which they renew on each retry,
+    and block new readers in the meantime.
+    Acquisition is retried with exponential backoff up to max_retry_interval seconds.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        timeout: Optional[float] = None,
+        blocking_timeout: Optional[float] = None,
+        mode: str = "w",
+        **kwargs,
+    ) -> None:
+        super().__init__(name, timeout, blocking_timeout, mode=mode, **kwargs)
+        self._retry_interval = kwargs.get("retry_interval", 0.001)
+        self._max_retry_interval = kwargs.get("max_retry_interval", 0.05)
+        self._state_path = os.path.join(
+            tempfile.gettempdir(),
+            self._get_project_hash()
+            + "_rwlock_"
+            + hashlib.md5(name.encode("utf-8")).hexdigest()
+            + ".json",
+        )
+        self._token = uuid.uuid4().hex
+
+    async def _acquire(self):
+        if self._is_acquired:
+            return
+
+        retry_interval = self._retry_interval
+        try:
+            while not self._update_state(self._try_acquire):
+                await anyio.sleep(retry_interval)
+                retry_interval = min(retry_interval * 2, self._max_retry_interval)
+        except BaseException:
+            if self._mode == "w":
+                with anyio.CancelScope(shield=True):
+                    await self._discard_writer_waiting()
+            raise
+
+        self._acquire_event.set()
+
+    async def _release(self):
+        if not self._is_acquired:
+            return
+
+        try:
+            while not self._update_state(self._remove_holder):
+                await anyio.sleep(self._retry_interval)
+        finally:
+            self._is_acquired = False
+
+    async def _discard_writer_waiting(self):
+        def discard(state: Dict[str, Any]) -> bool:
+            state["writers_waiting"].pop(self._token, None)
+            return True
+
+        while not self._update_state(discard):
+            await anyio.sleep(self._retry_interval)
+
+    def _try_acquire(self, state: Dict[str, Any]) -> bool:
+        now = time.time()
+        holder = [now + self._timeout if math.isfinite(self._timeout) else None, os.getpid()]
+        if self._mode == "r":
+            if state["writer"] is not None or state["writers_waiting"]:
+                return False
+            state["readers"][self._token] = holder
+            return True
+
+        if state["writer"] is not None or state["readers"]:
+            # Waiting mark expires, if waiter is gone without discarding it
+            state["writers_waiting"][self._token] = [now + self._max_retry_interval * 4, None]
+            return False
+
+        state["writers_waiting"].pop(self._token, None)
+        state["writer"] = [self._token, *holder]
+        return True
+
+    def _remove_holder(self, state: Dict[str, Any]) -> bool:
+        # Lock might have been re-acquired by another instance due to timeout
+        state["readers"].pop(self._token, None)
+        if state["writer"] is not None and state["writer"][0] == self._token:
+            state["writer"] = None
+        return True
+
+    def _update_state(self, update) -> bool:
+        # Returns False, if state file is locked by another instance
+        while True:
+            fd = os.open(self._state_path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return False
+
+                # State file might have been removed by another instance
+                # between opening and locking it
+                fd_stat = os.fstat(fd)
+                try:
+                    stat = os.stat(self._state_path)
+                except FileNotFoundError:
+                    continue
+                if (stat.st_dev, stat.st_ino) != (fd_stat.st_dev, fd_stat.st_ino):
+                    continue
+
+                state = self._load_state(fd)
+                result = update(state)
+                if state["writer"] is None and not state["readers"]:
+                    if not state["writers_waiting"]:
+                        os.unlink(self._state_path)
+                        return result
+
+                data = json.dumps(state).encode()
+                os.ftruncate(fd, 0)
+                os.pwrite(fd, data, 0)
+                return result
+            finally:
+                os.close(fd)
+
+    @staticmethod
+    def _load_state(fd: int) -> Dict[str, Any]:
+        data = b""
+        while chunk := os.pread(fd, 65536, len(data)):
+            data += chunk
+
+        state = json.loads(data) if data else {}
+        state = {
+            "readers": state.get("readers", {}),
+            "writer": state.get("writer"),
+            "writers_waiting": state.get("writers_waiting", {}),
+        }
+
+        now = time.time()
+
+        def is_alive(deadline: Optional[float], pid: Optional[int]) -> bool:
+            if deadline is not None and deadline < now:
+                return False
+            if pid is None:
+                return True
+            try:
+                os.kill(pid, 0)
+            except ProcessLookupError:
+                return False
+            except PermissionError:
+                pass
+            return True
+
+        state["readers"] = {
+            token: holder for token, holder in state["readers"].items() if is_alive(*holder)
+        }
+        if state["writer"] is not None and not is_alive(*state["writer"][1:]):
+            state["writer"] = None
+        state["writers_waiting"] = {
+            token: holder for token, holder in state["writers_waiting"].items() if is_alive(*holder)
+        }
+        return state
+
+    def _get_project_hash(self):
+        return hashlib.md5(str(settings.SECRET_KEY).encode("utf-8")).hexdigest()
+
+
+FileLock: Type[BaseLock] = SoftFileLock if os.name == "nt" else FcntlFileLock
@@ -24,12 +24,14 @@ class BaseStorage(AsyncContextManager):
     EXIT_MAX_DELAY = 60
     _blocking_timeout = 600
     _write_timeout = 300
+    _read_timeout = 300
     _directory_create_mode = 0o755
 
     def __init__(self, **options):
         self.options = options
         self.blocking_timeout = self.options.get("blocking_timeout", self._blocking_timeout)
         self.write_timeout = self.options.get("write_timeout", self._write_timeout)
+        self.read_timeout = self.options.get("read_timeout", self._read_timeout)
         self.directory_create_mode = self.options.get(
             "directory_create_mode", self._directory_create_mode
         )
@@ -98,19 +100,21 @@ class BaseStorage(AsyncContextManager):
         pass
 
     def get_access_lock(self, path: str, mode="r") -> AsyncContextManager:
-        # Mode parameter allows possible usage of RWLock,
-        # should you find a working cross-process implementation
+        # Mode is either "r" (shared access) or "w" (exclusive access),
+        # which allows usage of reader-writer lock, i.e. FileRWLock
         return AsyncExitStack()
 
 
 class _AsyncResourse(AsyncContextManager):
+    _lock_mode = "r"
+
     def __init__(self, storage: BaseStorage, path: str, mode: str, **kwargs):
         self._storage = storage
         self._path = path
         self._mode = mode
         self._fd: Any = None
         self._kwargs = kwargs
-        self._resource_lock = self._storage.get_access_lock(path, mode=mode)
+        self._resource_lock = self._storage.get_access_lock(path, mode=self._lock_mode)
 
         if self._mode not in ["t", "b"]:
             raise NotSupportedError(details="Supported modes for opening file are 't', 'b'.")
@@ -134,6 +138,8 @@ class _AsyncResourse(AsyncContextManager):
 
 
 class _AsyncWriter(_AsyncResourse):
+    _lock_mode = "w"
+
     def __init__(self, storage: BaseStorage, path: str, mode: str, append=False, **kwargs):
         super().__init__(storage, path, mode, **kwargs)
         self._mode = ("a" if append else "w") + self._mode
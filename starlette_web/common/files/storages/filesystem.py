@@ -8,16 +8,25 @@ from anyio._core._fileio import AsyncFile
 
 from starlette_web.common.conf import settings
 from starlette_web.common.files.storages.base import BaseStorage, MODE
-from starlette_web.common.files.filelock import FileLock
+from starlette_web.common.files.filelock import FileLock, FileRWLock
 from starlette_web.common.http.exceptions import ImproperlyConfigured
 from starlette_web.common.utils import urljoin
 
 
 class FilesystemStorage(BaseStorage):
+    _thread_limit = 10
+
     def __init__(self, **options):
         super().__init__(**options)
         self.BASE_DIR = self.options.get("BASE_DIR")
         self._initialize_base_dir()
+        self._initialize_thread_limiter()
+
+    def _initialize_thread_limiter(self):
+        # Limits number of worker threads, blocked in fsync calls of this storage
+        self._thread_limiter = anyio.CapacityLimiter(
+            self.options.get("thread_limit", self._thread_limit)
+        )
 
     def _initialize_base_dir(self):
         if self.BASE_DIR is None:
@@ -59,13 +68,13 @@ class FilesystemStorage(BaseStorage):
             return (await _path.stat()).st_size
 
     async def get_mtime(self, path) -> float:
-        async with self.get_access_lock(path):
+        async with self.get_access_lock(path, mode="r"):
             _path = self._normalize_path(path)
             return (await _path.stat()).st_mtime
 
     async def _open(self, path: str, mode: MODE = "b", **kwargs) -> AsyncFile:
         _path = self._normalize_path(path)
-        await self._mkdir(os.path.dirname(_path), **kwargs)
+        await self._mkdir(os.path.dirname(path), **kwargs)
         async_file: AsyncFile = await anyio.open_file(_path, mode, **kwargs)
         return await async_file.__aenter__()
 
@@ -90,23 +99,37 @@ class FilesystemStorage(BaseStorage):
         await _path.mkdir(exist_ok=exist_ok, parents=parents, mode=mode)
 
     async def _finalize_write(self, fd: AsyncFile) -> None:
-        await fd.flush()
-        os.fsync(fd._fp.fileno())
+        await anyio.to_thread.run_sync(
+            self._sync_finalize_write, fd.wrapped, limiter=self._thread_limiter
+        )
+
+    @staticmethod
+    def _sync_finalize_write(fp) -> None:
+        fp.flush()
+        os.fsync(fp.fileno())
 
     def get_access_lock(self, path: str, mode="r") -> AsyncContextManager:
         # Consider subclassing FileSystemStorage, to use
-        # faster cross-process lock, i.e. Redis lock
-        if mode == "w":
-            _path = Path(self._normalize_path(path))
-            _lockname = _path.parent / (_path.name + ".lock")
+        # faster cross-process lock, i.e. RedisRWLock
+        _path = Path(self._normalize_path(path))
+
+        if os.name == "nt":
+            # FileRWLock relies on fcntl, so only writers are locked
+            if mode != "w":
+                return super().get_access_lock(path, mode)
 
             return FileLock(
-                name=str(_lockname),
+                name=str(_path.parent / (_path.name + ".lock")),
                 timeout=self.write_timeout,
                 blocking_timeout=self.blocking_timeout,
             )
-        else:
-            return super().get_access_lock(path, mode)
+
+        return FileRWLock(
+            name=str(_path),
+            timeout=self.write_timeout if mode == "w" else self.read_timeout,
+            blocking_timeout=self.blocking_timeout,
+            mode="w" if mode == "w" else "r",
+        )
 
 
 class MediaFileSystemStorage(FilesystemStorage):
@@ -114,6 +137,7 @@ class MediaFileSystemStorage(FilesystemStorage):
         BaseStorage.__init__(self, **options)
         self.BASE_DIR = settings.MEDIA["ROOT_DIR"]
         self._initialize_base_dir()
+        self._initialize_thread_limiter()
 
     async def get_url(self, path: str) -> str:
         _path = str(Path(path)).split(os.sep)
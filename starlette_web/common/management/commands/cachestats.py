@@ -0,0 +1,70 @@
+import json
+from typing import Any, Dict
+
+from starlette_web.common.caches import caches
+from starlette_web.common.caches.instrumentation import InstrumentedCache, merge_snapshots
+from starlette_web.common.conf import settings
+from starlette_web.common.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Show hit ratio, latency and hot keys of instrumented caches, "
+        "published by running processes with async_run_stats_publisher"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--alias", type=str, default=None, help="Cache alias (default: all)")
+        parser.add_argument("--top", type=int, default=20, help="Number of hot keys to show")
+        parser.add_argument("--json", action="store_true", help="Output as JSON")
+
+    async def handle(self, **options):
+        if options["alias"] is not None:
+            aliases = [options["alias"]]
+        else:
+            aliases = [
+                alias
+                for alias, cache_settings in settings.CACHES.items()
+                if cache_settings.get("INSTRUMENTATION")
+            ]
+
+        reports = {}
+        for alias in aliases:
+            cache = caches[alias]
+            if not isinstance(cache, InstrumentedCache):
+                raise CommandError(details=f"Cache {alias} is not instrumented")
+
+            snapshots = await cache.async_get_published_stats()
+            reports[alias] = merge_snapshots(snapshots, top_k=options["top"])
+
+        if options["json"]:
+            print(json.dumps(reports, indent=2))
+            return
+
+        for alias, report in reports.items():
+            print(self.format_report(alias, report))
+
+    def format_report(self, alias: str, report: Dict[str, Any]) -> str:
+        lines = [f"Cache {alias!r}, processes: {report['processes']}"]
+
+        header = (
+            f"  {'prefix':<24} {'operation':<16} {'calls':>10} {'hit ratio':>10} "
+            f"{'p50, ms':>9} {'p99, ms':>9} {'read, B':>12} {'written, B':>12}"
+        )
+        rows = [("*", report["operations"])] + sorted(report["prefixes"].items())
+        lines.append(header)
+        for prefix, operations in rows:
+            for operation, stats in sorted(operations.items()):
+                hit_ratio = stats["hit_ratio"]
+                lines.append(
+                    f"  {prefix or '-':<24.24} {operation:<16} {stats['calls']:>10} "
+                    f"{'-' if hit_ratio is None else f'{hit_ratio:.1%}':>10} "
+                    f"{stats['latency']['p50'] * 1000:>9.2f} "
+                    f"{stats['latency']['p99'] * 1000:>9.2f} "
+                    f"{stats['bytes_read']:>12} {stats['bytes_written']:>12}"
+                )
+
+        lines.append("  Hot keys (count, overestimation):")
+        for key, count, error in report["hot_keys"]:
+            lines.append(f"    {key} {count} {error}")
+        return "\n".join(lines)
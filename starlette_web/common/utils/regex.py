@@ -64,3 +64,53 @@ def redis_pattern_to_re_pattern(pattern: str) -> re.Pattern:
     parts.append("\\Z")
     regex = "".join(parts)
     return re.compile(regex, re.S)
+
+
+def redis_pattern_literal_prefix(pattern: str) -> str:
+    """
+    Returns the longest literal prefix of redis key pattern,
+    i.e. the part before the first wildcard.
+
+    >>> from starlette_web.common.utils.regex import redis_pattern_literal_prefix
+    >>> redis_pattern_literal_prefix("keys:*")
+    [0] 'keys:'
+    >>> redis_pattern_literal_prefix("key\\\\*s:?")
+    [1] 'key*s:'
+    """
+    parts = []
+    i = 0
+    L = len(pattern)
+    while i < L:
+        c = pattern[i]
+        if c in "?*[":
+            break
+        elif c == "\\":
+            if i < L - 1:
+                i += 1
+            parts.append(pattern[i])
+        else:
+            parts.append(c)
+        i += 1
+    return "".join(parts)
+
+
+def escape_redis_pattern(value: str) -> str:
+    """
+    Escapes special characters of redis key pattern, so that value is matched literally.
+
+    >>> from starlette_web.common.utils.regex import escape_redis_pattern
+    >>> escape_redis_pattern("tenant[1]:*")
+    [0] 'tenant\\[1\\]:\\*'
+    """
+    return "".join("\\" + c if c in "*?[]\\" else c for c in value)
+
+
+def escape_glob_pattern(value: str) -> str:
+    """
+    Escapes special characters of SQLite GLOB pattern, so that value is matched literally.
+
+    >>> from starlette_web.common.utils.regex import escape_glob_pattern
+    >>> escape_glob_pattern("tenant[1]:*")
+    [0] 'tenant[[]1]:[*]'
+    """
+    return "".join("[" + c + "]" if c in "*?[" else c for c in value)
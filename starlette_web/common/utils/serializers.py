@@ -1,8 +1,11 @@
 import json
+import lzma
 import pickle
-from typing import Any
+import struct
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Type, Union
 
-from starlette_web.common.http.exceptions import BaseApplicationError
+from starlette_web.common.http.exceptions import BaseApplicationError, ImproperlyConfigured
 
 
 class SerializerError(BaseApplicationError):
@@ -71,3 +74,196 @@ class PickleSerializer(BytesSerializer):
             return pickle.loads(content)
         except pickle.UnpicklingError as exc:
             raise DeserializeError from exc
+
+
+class BaseCompressor:
+    # Header byte of compressed payload. Must be unique among registered compressors,
+    # and must not be a valid first byte of pickle stream (values below 0x20 are safe)
+    header: int
+
+    def compress(self, chunks: Iterable[Any]) -> bytes:
+        raise NotImplementedError
+
+    def decompress(self, content: bytes) -> bytes:
+        raise NotImplementedError
+
+
+class IdentityCompressor(BaseCompressor):
+    header = 0x01
+
+    def compress(self, chunks: Iterable[Any]) -> bytes:
+        return b"".join(chunks)
+
+    def decompress(self, content: bytes) -> bytes:
+        return content
+
+
+class ZlibCompressor(BaseCompressor):
+    header = 0x02
+    level = 6
+
+    def compress(self, chunks: Iterable[Any]) -> bytes:
+        compressor = zlib.compressobj(self.level)
+        return b"".join([compressor.compress(chunk) for chunk in chunks] + [compressor.flush()])
+
+    def decompress(self, content: bytes) -> bytes:
+        return zlib.decompress(content)
+
+
+class LZMACompressor(BaseCompressor):
+    header = 0x03
+
+    def compress(self, chunks: Iterable[Any]) -> bytes:
+        compressor = lzma.LZMACompressor()
+        return b"".join([compressor.compress(chunk) for chunk in chunks] + [compressor.flush()])
+
+    def decompress(self, content: bytes) -> bytes:
+        return lzma.decompress(content)
+
+
+COMPRESSORS: Dict[str, Type[BaseCompressor]] = {
+    "identity": IdentityCompressor,
+    "zlib": ZlibCompressor,
+    "lzma": LZMACompressor,
+}
+
+
+class _OutOfBandBytes:
+    # Pickles wrapped bytes as out-of-band buffer, and unpickles them back with original type
+    __slots__ = ("value",)
+
+    def __init__(self, value: Union[bytes, bytearray]):
+        self.value = value
+
+    def __reduce_ex__(self, protocol):
+        return type(self.value), (pickle.PickleBuffer(self.value),)
+
+
+class CompressedPickleSerializer(PickleSerializer):
+    """
+    Pickles content with protocol 5 and compresses payloads,
+    which are larger than compress_threshold bytes.
+
+    Compressed payload starts with a header byte of compressor,
+    followed by compressed frame of pickle stream and out-of-band buffers.
+    Payloads below threshold are plain pickle, so entries written by PickleSerializer
+    are readable by this serializer and vice versa.
+
+    Bytes and bytearray values larger than out_of_band_threshold, as well as nested
+    PickleBuffer objects, are passed to compressor as out-of-band buffers,
+    without copying them into pickle stream.
+    """
+
+    compressor: str = "zlib"
+    compress_threshold: int = 1024
+    out_of_band_threshold: int = 64 * 1024
+
+    _frame_count = struct.Struct("<I")
+    _frame_length = struct.Struct("<Q")
+
+    def __init__(
+        self,
+        compressor: Optional[str] = None,
+        compress_threshold: Optional[int] = None,
+        out_of_band_threshold: Optional[int] = None,
+    ):
+        self._compressor = COMPRESSORS[compressor or self.compressor]()
+        self._identity = IdentityCompressor()
+        self._decompressors = {
+            compressor_class.header: compressor_class() for compressor_class in COMPRESSORS.values()
+        }
+        if compress_threshold is not None:
+            self.compress_threshold = compress_threshold
+        if out_of_band_threshold is not None:
+            self.out_of_band_threshold = out_of_band_threshold
+
+    def serialize(self, content: Any) -> Any:
+        if type(content) in (bytes, bytearray) and len(content) >= self.out_of_band_threshold:
+            content = _OutOfBandBytes(content)
+
+        buffers: List[pickle.PickleBuffer] = []
+        try:
+            data = pickle.dumps(content, protocol=5, buffer_callback=buffers.append)
+        except pickle.PicklingError as exc:
+            raise SerializeError from exc
+
+        raw_buffers = [buffer.raw() for buffer in buffers]
+        size = len(data) + sum(buffer.nbytes for buffer in raw_buffers)
+        if size < self.compress_threshold and not raw_buffers:
+            return data
+
+        chunks = [
+            self._frame_count.pack(len(raw_buffers)),
+            *[self._frame_length.pack(buffer.nbytes) for buffer in raw_buffers],
+            data,
+            *raw_buffers,
+        ]
+
+        if size >= self.compress_threshold:
+            compressed = self._compressor.compress(chunks)
+            if len(compressed) < size:
+                return bytes([self._compressor.header]) + compressed
+
+        if not raw_buffers:
+            return data
+        return bytes([self._identity.header]) + self._identity.compress(chunks)
+
+    def deserialize(self, content: Any) -> Any:
+        if content is None:
+            return None
+
+        decompressor = self._decompressors.get(content[0]) if content else None
+        if decompressor is None:
+            return super().deserialize(content)
+
+        try:
+            frame = memoryview(decompressor.decompress(memoryview(content)[1:]))
+            (count,) = self._frame_count.unpack_from(frame)
+            offset = self._frame_count.size
+            lengths = [
+                self._frame_length.unpack_from(frame, offset + i * self._frame_length.size)[0]
+                for i in range(count)
+            ]
+            offset += count * self._frame_length.size
+
+            buffers = []
+            end = len(frame)
+            for length in reversed(lengths):
+                start = end - length
+                buffers.append(frame[start:end])
+                end = start
+            buffers.reverse()
+
+            return pickle.loads(frame[offset:end], buffers=buffers)
+        except (zlib.error, lzma.LZMAError, struct.error, pickle.UnpicklingError) as exc:
+            raise DeserializeError from exc
+
+
+def make_serializer(
+    serializer_class: Type[BaseSerializer],
+    options: Dict[str, Any],
+) -> BaseSerializer:
+    """
+    Instantiates serializer of cache or channel layer from its options.
+    If options contain "COMPRESSION" (name of compressor in COMPRESSORS),
+    CompressedPickleSerializer is used instead of pickle-based serializer_class,
+    with threshold "COMPRESS_THRESHOLD" (default: CompressedPickleSerializer.compress_threshold).
+    """
+
+    compression = options.get("COMPRESSION")
+    if compression is None:
+        return serializer_class()
+
+    if compression not in COMPRESSORS:
+        raise ImproperlyConfigured(details=f"Unknown COMPRESSION {compression!r}")
+    if not issubclass(serializer_class, PickleSerializer):
+        raise ImproperlyConfigured(
+            details=f"COMPRESSION is not supported by {serializer_class.__name__}"
+        )
+
+    if not issubclass(serializer_class, CompressedPickleSerializer):
+        serializer_class = CompressedPickleSerializer
+    return serializer_class(
+        compressor=compression,
+        compress_threshold=options.get("COMPRESS_THRESHOLD"),
+    )
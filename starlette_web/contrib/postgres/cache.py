@@ -0,0 +1,336 @@
+import re
+from contextlib import asynccontextmanager
+from typing import Any, AsyncContextManager, AsyncIterator, Dict, List, Optional, Sequence, Type
+
+import anyio
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from starlette_web.common.caches.base import BaseCache, CacheError
+from starlette_web.common.database import make_session_maker
+from starlette_web.common.http.exceptions import ImproperlyConfigured
+from starlette_web.common.utils.regex import (
+    redis_pattern_to_re_pattern,
+    redis_pattern_literal_prefix,
+)
+from starlette_web.common.utils.serializers import BytesSerializer, PickleSerializer
+from starlette_web.contrib.postgres.lock import PostgreSQLAdvisoryLock, advisory_lock_key
+
+
+_cache_session_makers: Dict[int, sessionmaker] = {}
+
+
+def get_cache_session_maker(pool_size: int) -> sessionmaker:
+    """
+    Session maker with a small pool, which is shared by all PostgreSQLCache instances
+    with the same POOL_SIZE, so that each instance does not open a pool of its own.
+    Pool is separate from pool of application sessions, and is opened on demand.
+    """
+
+    # Engine is created on first use, so that it is bound to running event loop
+    if pool_size not in _cache_session_makers:
+        _cache_session_makers[pool_size] = make_session_maker(
+            pool_min_size=pool_size,
+            pool_max_size=pool_size,
+        )
+    return _cache_session_makers[pool_size]
+
+
+class PostgreSQLCache(BaseCache):
+    """
+    Cache in UNLOGGED table of database settings.DATABASE_DSN.
+    UNLOGGED tables skip write-ahead log, so writes are faster,
+    but table is truncated after crash of database server, which is acceptable for cache.
+
+    Options:
+    - TABLE: str (default: "starlette_web_cache") - name of table, created on first use
+    - PURGE_INTERVAL: float (default: 60.0) - interval in seconds,
+      in which a batch of expired entries is deleted on write
+    - PURGE_BATCH_SIZE: int (default: 1000) - number of expired entries, deleted in one query
+    - POOL_SIZE: int (default: 5) - size of connection pool, shared by caches with the same size
+    """
+
+    serializer_class: Type[BytesSerializer] = PickleSerializer
+
+    def __init__(self, options: Dict[str, Any]):
+        super().__init__(options)
+        self.table = options.get("TABLE", "starlette_web_cache")
+        if not re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", self.table):
+            raise ImproperlyConfigured(
+                details=f"Invalid TABLE value for PostgreSQLCache: {self.table}"
+            )
+
+        if not self.serializer.serializes_to_bytes():
+            raise ImproperlyConfigured(
+                details="serializer_class must be instance of BytesSerializer"
+            )
+
+        self._purge_interval: float = options.get("PURGE_INTERVAL", 60.0)
+        self._purge_batch_size: int = options.get("PURGE_BATCH_SIZE", 1000)
+        self._pool_size: int = options.get("POOL_SIZE", 5)
+        self._last_purge: Optional[float] = None
+        self._session_maker: Optional[sessionmaker] = None
+        self._table_created = False
+
+    async def async_get(self, key: str) -> Any:
+        async with self._session() as session:
+            result = await session.execute(
+                text(
+                    f"SELECT value FROM {self.table} "
+                    "WHERE key = :key AND (expiry IS NULL OR expiry > now())"
+                ),
+                {"key": key},
+            )
+            value = self.serializer.deserialize(result.scalar())
+        return await self._async_check_tags_one(value)
+
+    async def async_get_many(self, keys: Sequence[str]) -> Dict[str, Any]:
+        async with self._session() as session:
+            result = await session.execute(
+                text(
+                    f"SELECT key, value FROM {self.table} "
+                    "WHERE key = ANY(:keys) AND (expiry IS NULL OR expiry > now())"
+                ),
+                {"keys": list(keys)},
+            )
+            values = dict(result.all())
+        return await self._async_check_tags(
+            {key: self.serializer.deserialize(values.get(key)) for key in keys}
+        )
+
+    async def async_set(
+        self,
+        key: str,
+        value: Any,
+        timeout: Optional[float] = 120,
+        tags: Optional[Sequence[str]] = None,
+    ) -> None:
+        await self.async_set_many({key: value}, timeout=timeout, tags=tags)
+
+    async def async_set_many(
+        self,
+        data: Dict[str, Any],
+        timeout: Optional[float] = 120,
+        tags: Optional[Sequence[str]] = None,
+    ) -> None:
+        if not data:
+            return
+        if tags:
+            data = await self._async_tag_values(data, timeout, tags)
+
+        async with self._session() as session:
+            await session.execute(
+                text(
+                    f"INSERT INTO {self.table} (key, value, expiry) "
+                    "SELECT key, value, now() + CAST(:timeout AS double precision) "
+                    "* interval '1 second' "
+                    "FROM unnest(CAST(:keys AS text[]), CAST(:values AS bytea[])) "
+                    "AS data (key, value) "
+                    "ON CONFLICT (key) DO UPDATE "
+                    "SET value = excluded.value, expiry = excluded.expiry"
+                ),
+                {
+                    "keys": list(data.keys()),
+                    "values": [self.serializer.serialize(value) for value in data.values()],
+                    "timeout": timeout,
+                },
+            )
+            await session.commit()
+
+        if (
+            self._last_purge is None
+            or anyio.current_time() - self._last_purge >= self._purge_interval
+        ):
+            await self._purge_expired_batch()
+
+    async def async_incr(self, key: str, delta: int = 1, timeout: Optional[float] = 120) -> int:
+        async with self._session() as session:
+            while True:
+                result = await session.execute(
+                    text(
+                        f"SELECT value FROM {self.table} "
+                        "WHERE key = :key AND (expiry IS NULL OR expiry > now()) FOR UPDATE"
+                    ),
+                    {"key": key},
+                )
+                current = result.scalar()
+                if current is not None:
+                    value = self.serializer.deserialize(current)
+                    if type(value) is not int:
+                        raise CacheError(details=f"Value of key {key!r} is not an integer")
+                    value += delta
+                    # Existing key keeps its expiry
+                    await session.execute(
+                        text(f"UPDATE {self.table} SET value = :value WHERE key = :key"),
+                        {"key": key, "value": self.serializer.serialize(value)},
+                    )
+                    break
+
+                value = delta
+                if await self._insert_if_missing(session, key, value, timeout):
+                    break
+                # Key has been created by concurrent transaction, so it is locked and re-read
+
+            await session.commit()
+        return value
+
+    async def async_add(self, key: str, value: Any, timeout: Optional[float] = 120) -> bool:
+        async with self._session() as session:
+            inserted = await self._insert_if_missing(session, key, value, timeout)
+            await session.commit()
+        return inserted
+
+    async def _insert_if_missing(
+        self,
+        session: AsyncSession,
+        key: str,
+        value: Any,
+        timeout: Optional[float],
+    ) -> bool:
+        # Expired row is overwritten, live row is left intact
+        result = await session.execute(
+            text(
+                f"INSERT INTO {self.table} (key, value, expiry) "
+                "VALUES (:key, :value, now() + CAST(:timeout AS double precision) "
+                "* interval '1 second') "
+                "ON CONFLICT (key) DO UPDATE "
+                "SET value = excluded.value, expiry = excluded.expiry "
+                f"WHERE {self.table}.expiry <= now()"
+            ),
+            {"key": key, "value": self.serializer.serialize(value), "timeout": timeout},
+        )
+        return result.rowcount == 1
+
+    async def async_expire(self, key: str, timeout: Optional[float]) -> bool:
+        async with self._session() as session:
+            result = await session.execute(
+                text(
+                    f"UPDATE {self.table} "
+                    "SET expiry = now() + CAST(:timeout AS double precision) * interval '1 second' "
+                    "WHERE key = :key AND (expiry IS NULL OR expiry > now())"
+                ),
+                {"key": key, "timeout": timeout},
+            )
+            await session.commit()
+        return result.rowcount == 1
+
+    async def async_delete(self, key: str) -> None:
+        await self.async_delete_many([key])
+
+    async def async_delete_many(self, keys: Sequence[str]) -> None:
+        async with self._session() as session:
+            await session.execute(
+                text(f"DELETE FROM {self.table} WHERE key = ANY(:keys)"),
+                {"keys": list(keys)},
+            )
+            await session.commit()
+
+    async def async_clear(self) -> None:
+        async with self._session() as session:
+            await session.execute(text(f"TRUNCATE {self.table}"))
+            await session.commit()
+
+    async def async_keys(self, pattern: str) -> List[str]:
+        try:
+            re_pattern = redis_pattern_to_re_pattern(pattern)
+        except re.error as exc:
+            raise CacheError(details=str(exc)) from exc
+
+        # Column key has collation "C", so that LIKE with literal prefix uses primary key index
+        prefix = redis_pattern_literal_prefix(pattern)
+        like_pattern = re.sub(r"([\\%_])", r"\\\1", prefix) + "%"
+        async with self._session() as session:
+            result = await session.execute(
+                text(
+                    f"SELECT key FROM {self.table} "
+                    "WHERE key LIKE :pattern AND (expiry IS NULL OR expiry > now())"
+                ),
+                {"pattern": like_pattern},
+            )
+            return [key for key in result.scalars() if re.fullmatch(re_pattern, key)]
+
+    async def async_has_key(self, key: str) -> bool:
+        async with self._session() as session:
+            result = await session.execute(
+                text(
+                    f"SELECT 1 FROM {self.table} "
+                    "WHERE key = :key AND (expiry IS NULL OR expiry > now())"
+                ),
+                {"key": key},
+            )
+            return result.scalar() is not None
+
+    async def async_remove_expired(self) -> None:
+        while await self._purge_expired_batch() >= self._purge_batch_size:
+            await anyio.lowlevel.checkpoint()
+
+    async def _purge_expired_batch(self) -> int:
+        # Deletes expired entries in bounded batches, so that purge does not hold
+        # row locks of a large part of table
+        self._last_purge = anyio.current_time()
+        async with self._session() as session:
+            result = await session.execute(
+                text(
+                    f"DELETE FROM {self.table} WHERE ctid = ANY(ARRAY("
+                    f"SELECT ctid FROM {self.table} WHERE expiry <= now() LIMIT :limit"
+                    "))"
+                ),
+                {"limit": self._purge_batch_size},
+            )
+            await session.commit()
+            return result.rowcount
+
+    def lock(
+        self,
+        name: str,
+        timeout: Optional[float] = 20.0,
+        blocking_timeout: Optional[float] = None,
+        **kwargs,
+    ) -> AsyncContextManager:
+        return PostgreSQLAdvisoryLock(
+            name=f"{self.table}:{name}",
+            timeout=timeout,
+            blocking_timeout=blocking_timeout,
+            **kwargs,
+        )
+
+    def _get_session_maker(self) -> sessionmaker:
+        if self._session_maker is None:
+            self._session_maker = get_cache_session_maker(self._pool_size)
+        return self._session_maker
+
+    @asynccontextmanager
+    async def _session(self) -> AsyncIterator[AsyncSession]:
+        try:
+            async with self._get_session_maker()() as session:
+                if not self._table_created:
+                    await self._create_table(session)
+                yield session
+        except SQLAlchemyError as exc:
+            raise CacheError(details=str(exc)) from exc
+
+    async def _create_table(self, session: AsyncSession) -> None:
+        # Advisory lock prevents concurrent CREATE TABLE IF NOT EXISTS from failing
+        await session.execute(
+            text("SELECT pg_advisory_xact_lock(:key)"),
+            {"key": advisory_lock_key(f"create_table:{self.table}")},
+        )
+        await session.execute(
+            text(
+                f"CREATE UNLOGGED TABLE IF NOT EXISTS {self.table} ("
+                'key TEXT COLLATE "C" PRIMARY KEY, '
+                "value BYTEA NOT NULL, "
+                "expiry TIMESTAMPTZ"
+                ")"
+            )
+        )
+        await session.execute(
+            text(
+                f"CREATE INDEX IF NOT EXISTS {self.table}_expiry "
+                f"ON {self.table} (expiry) WHERE expiry IS NOT NULL"
+            )
+        )
+        await session.commit()
+        self._table_created = True
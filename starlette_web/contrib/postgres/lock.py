@@ -0,0 +1,196 @@
+import hashlib
+import math
+from typing import Any, Dict, Optional, Tuple
+
+import anyio
+from sqlalchemy import TextClause, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from starlette_web.common.caches.base_lock import BaseLock
+from starlette_web.common.conf import settings
+from starlette_web.common.database import make_session_maker
+
+
+_lock_engine: Optional[AsyncEngine] = None
+
+
+def get_lock_engine() -> AsyncEngine:
+    """
+    Engine with a dedicated small pool for advisory locks, so that held locks
+    do not exhaust pool of application sessions. Size of pool is configured with
+    settings.DATABASE["lock_pool_min_size"] and ["lock_pool_max_size"] (default: 10 for both).
+    Connections are opened on demand, and pool keeps up to lock_pool_min_size of them,
+    since reconnecting on each attempt of waiters is much slower than the attempt itself.
+    """
+    global _lock_engine
+
+    # Engine is created on first use, so that it is bound to running event loop
+    if _lock_engine is None:
+        session_maker = make_session_maker(
+            pool_min_size=settings.DATABASE.get("lock_pool_min_size", 10),
+            pool_max_size=settings.DATABASE.get("lock_pool_max_size", 10),
+        )
+        # Each statement is committed by itself, so lock queries cost a single round trip
+        _lock_engine = session_maker.kw["bind"].execution_options(isolation_level="AUTOCOMMIT")
+    return _lock_engine
+
+
+def advisory_lock_key(name: str) -> int:
+    # Advisory lock keys are signed 64-bit integers
+    digest = hashlib.blake2b(name.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+class PostgreSQLAdvisoryLock(BaseLock):
+    """
+    Session-level advisory lock of database settings.DATABASE_DSN, which works across nodes.
+    Holder keeps a connection of get_lock_engine() checked out, while waiters only check out
+    a connection for each pg_try_advisory_lock, retried with exponential backoff.
+
+    Timeout is enforced by server: on PostgreSQL 14+, holder's session is given
+    idle_session_timeout, so it is terminated together with its locks, once lease expires,
+    even if holder process is stuck. Older servers do not support idle_session_timeout,
+    so holder publishes deadline of its lease in application_name of its session,
+    and a waiter terminates session of holder, whose lease has expired.
+    Lock is also released by server, if connection is lost.
+    """
+
+    LEASE_APPLICATION_NAME = "starlette_web_lock_lease"
+
+    def __init__(
+        self,
+        name: str,
+        timeout: Optional[float] = None,
+        blocking_timeout: Optional[float] = None,
+        **kwargs,
+    ) -> None:
+        super().__init__(name=name, timeout=timeout, blocking_timeout=blocking_timeout, **kwargs)
+        self._engine: AsyncEngine = kwargs.get("engine") or get_lock_engine()
+        self._key = advisory_lock_key(name)
+        self._retry_interval = kwargs.get("retry_interval", 0.001)
+        self._max_retry_interval = kwargs.get("max_retry_interval", 0.02)
+        self._connection: Optional[AsyncConnection] = None
+        self._lease_deadline = math.inf
+        self._has_idle_session_timeout = True
+
+    async def _acquire(self):
+        if self._is_acquired:
+            return
+
+        retry_interval = self._retry_interval
+        while not await self._try_acquire():
+            await anyio.sleep(retry_interval)
+            retry_interval = min(retry_interval * 2, self._max_retry_interval)
+
+        self._acquire_event.set()
+
+    async def _release(self):
+        if not self._is_acquired:
+            return
+
+        connection, self._connection = self._connection, None
+        try:
+            if connection is not None:
+                await self._unlock(connection)
+        finally:
+            self._is_acquired = False
+
+    async def _try_acquire(self) -> bool:
+        connection = await self._engine.connect()
+        try:
+            # Server version is read by dialect once per engine, on first connect
+            self._has_idle_session_timeout = self._supports_idle_session_timeout(connection)
+            query, params = self._get_acquire_query()
+            start_time = anyio.current_time()
+            result = await connection.execute(query, params)
+            is_acquired = result.scalar()
+        except BaseException:
+            # Lock might have been acquired by interrupted query,
+            # and closing connection releases all its session-level locks
+            with anyio.CancelScope(shield=True):
+                await connection.invalidate()
+                await connection.close()
+            raise
+
+        if not is_acquired:
+            await connection.close()
+            return False
+
+        # Lease is counted from sending the query, so it never outlives server-side timeout
+        self._lease_deadline = start_time + self._timeout
+        self._connection = connection
+        return True
+
+    @staticmethod
+    def _supports_idle_session_timeout(connection: AsyncConnection) -> bool:
+        return connection.dialect.server_version_info >= (14,)
+
+    def _get_acquire_query(self) -> Tuple[TextClause, Dict[str, Any]]:
+        params: Dict[str, Any] = {"key": self._key}
+        if math.isinf(self._timeout):
+            on_acquired = "true"
+        elif self._has_idle_session_timeout:
+            on_acquired = "set_config('idle_session_timeout', :lease, false) IS NOT NULL"
+            params["lease"] = str(max(int(self._timeout * 1000), 1))
+        else:
+            on_acquired = (
+                "set_config('application_name', :lease_name || ':' || "
+                "CAST(CAST(extract(epoch FROM clock_timestamp()) AS double precision) "
+                "+ CAST(:lease AS double precision) AS text), false) IS NOT NULL"
+            )
+            params["lease_name"] = self.LEASE_APPLICATION_NAME
+            params["lease"] = self._timeout
+
+        if self._has_idle_session_timeout:
+            on_busy = "false"
+        else:
+            # Advisory lock with bigint key is shown in pg_locks as classid (high 32 bits)
+            # and objid (low 32 bits) with objsubid = 1.
+            # count(...) < 0 is always false, but terminates sessions of expired holders
+            on_busy = (
+                "(SELECT count(pg_terminate_backend(activity.pid)) < 0 "
+                "FROM pg_locks locks JOIN pg_stat_activity activity ON activity.pid = locks.pid "
+                "WHERE locks.locktype = 'advisory' AND locks.granted AND locks.objsubid = 1 "
+                "AND locks.database = (SELECT oid FROM pg_database "
+                "WHERE datname = current_database()) "
+                "AND locks.classid = CAST(CAST(:classid AS bigint) AS oid) "
+                "AND locks.objid = CAST(CAST(:objid AS bigint) AS oid) "
+                "AND CASE WHEN split_part(activity.application_name, ':', 1) = :lease_name "
+                "THEN CAST(split_part(activity.application_name, ':', 2) AS double precision) "
+                "< CAST(extract(epoch FROM clock_timestamp()) AS double precision) "
+                "ELSE false END)"
+            )
+            unsigned_key = self._key & 0xFFFFFFFFFFFFFFFF
+            params["classid"] = unsigned_key >> 32
+            params["objid"] = unsigned_key & 0xFFFFFFFF
+            params["lease_name"] = self.LEASE_APPLICATION_NAME
+
+        query = text(
+            f"SELECT CASE WHEN pg_try_advisory_lock(:key) THEN {on_acquired} ELSE {on_busy} END"
+        )
+        return query, params
+
+    async def _unlock(self, connection: AsyncConnection) -> None:
+        # Once lease has expired, session is being terminated by server (or by a waiter),
+        # so it is not reused
+        if anyio.current_time() < self._lease_deadline:
+            if self._has_idle_session_timeout:
+                reset_lease = "set_config('idle_session_timeout', '0', false)"
+            else:
+                reset_lease = "set_config('application_name', '', false)"
+
+            try:
+                await connection.execute(
+                    text(f"SELECT pg_advisory_unlock(:key), {reset_lease}"),
+                    {"key": self._key},
+                )
+            except (SQLAlchemyError, OSError):
+                pass
+            else:
+                await connection.close()
+                return
+
+        # Closing connection releases all its session-level locks
+        await connection.invalidate()
+        await connection.close()
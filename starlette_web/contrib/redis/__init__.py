@@ -1,4 +1,4 @@
 # flake8: noqa
 
 from starlette_web.contrib.redis.cache import RedisCache
-from starlette_web.contrib.redis.redislock import RedisLock
+from starlette_web.contrib.redis.redislock import RedisLock, RedisRWLock
@@ -0,0 +1,108 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+import anyio
+from redis import asyncio as aioredis
+
+
+class _Batch:
+    def __init__(self):
+        self.items: List[Tuple[Any, ...]] = []
+        self.closed = False
+        self.full_event = anyio.Event()
+        self.done_event = anyio.Event()
+        self.result: Dict[str, Any] = {}
+        self.exception: Optional[Exception] = None
+
+
+class RedisBatcher:
+    """
+    Collects GET and SET commands, issued by concurrent tasks within the same event loop tick
+    (or within delay seconds), and sends them as a single MGET or a single pipeline of SETs.
+
+    The first task in a batch waits for other commands, and then flushes the batch
+    on behalf of all tasks. A batch is flushed early, when it reaches max_size commands.
+    """
+
+    EXIT_MAX_DELAY = 60.0
+
+    def __init__(self, redis: aioredis.Redis, max_size: int = 100, delay: float = 0.0):
+        self.redis = redis
+        self.max_size = max_size
+        self.delay = delay
+        self._pending: Dict[str, _Batch] = {}
+        self._stats = {
+            "get_batches": 0,
+            "get_commands": 0,
+            "set_batches": 0,
+            "set_commands": 0,
+        }
+
+    async def get(self, key: str) -> Optional[bytes]:
+        batch = await self._submit("get", (key,))
+        return batch.result[key]
+
+    async def set(self, key: str, value: bytes, px: Optional[int]) -> None:
+        await self._submit("set", (key, value, px))
+
+    def stats(self) -> Dict[str, float]:
+        stats = dict(self._stats)
+        stats["avg_get_batch_size"] = stats["get_commands"] / max(stats["get_batches"], 1)
+        stats["avg_set_batch_size"] = stats["set_commands"] / max(stats["set_batches"], 1)
+        return stats
+
+    async def _submit(self, command: str, item: Tuple[Any, ...]) -> _Batch:
+        batch = self._pending.get(command)
+        is_leader = batch is None
+        if is_leader:
+            batch = _Batch()
+            self._pending[command] = batch
+
+        batch.items.append(item)
+        if len(batch.items) >= self.max_size:
+            self._close(command, batch)
+
+        if is_leader:
+            try:
+                if self.delay > 0:
+                    with anyio.move_on_after(self.delay):
+                        await batch.full_event.wait()
+                else:
+                    await anyio.sleep(0)
+            finally:
+                # Other tasks are waiting for results, so flush even if leader is cancelled
+                self._close(command, batch)
+                with anyio.move_on_after(self.EXIT_MAX_DELAY, shield=True):
+                    await self._flush(command, batch)
+        else:
+            await batch.done_event.wait()
+
+        if batch.exception is not None:
+            raise batch.exception
+        return batch
+
+    def _close(self, command: str, batch: _Batch) -> None:
+        if batch.closed:
+            return
+
+        batch.closed = True
+        batch.full_event.set()
+        if self._pending.get(command) is batch:
+            del self._pending[command]
+
+    async def _flush(self, command: str, batch: _Batch) -> None:
+        self._stats[f"{command}_batches"] += 1
+        self._stats[f"{command}_commands"] += len(batch.items)
+
+        try:
+            if command == "get":
+                keys = list(dict.fromkeys(item[0] for item in batch.items))
+                batch.result = dict(zip(keys, await self.redis.mget(keys)))
+            else:
+                async with self.redis.pipeline(transaction=False) as pipeline:
+                    for key, value, px in batch.items:
+                        pipeline.set(key, value, px=px)
+                    await pipeline.execute(raise_on_error=True)
+        except Exception as exc:
+            batch.exception = exc
+        finally:
+            batch.done_event.set()
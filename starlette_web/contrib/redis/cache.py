@@ -1,18 +1,23 @@
-from typing import Sequence, Any, List, Dict, Type, Optional, AsyncContextManager
+import re
+from typing import Sequence, Any, List, Dict, Type, Optional, AsyncContextManager, AsyncIterator
 
 from redis import asyncio as aioredis
 
 from starlette_web.common.caches.base import BaseCache, CacheError
 from starlette_web.common.http.exceptions import UnexpectedError
 from starlette_web.common.utils.encoding import force_str
+from starlette_web.common.utils.regex import escape_redis_pattern
 from starlette_web.common.utils.serializers import BytesSerializer, PickleSerializer
-from starlette_web.contrib.redis.redislock import RedisLock
+from starlette_web.contrib.redis.batching import RedisBatcher
+from starlette_web.contrib.redis.redislock import RedisLock, RedisRWLock
 
 
 def reraise_exception(func):
     async def wrapped(*args, **kwargs):
         try:
             return await func(*args, **kwargs)
+        except CacheError:
+            raise
         except aioredis.RedisError as exc:
             raise CacheError from exc
         except Exception as exc:
@@ -21,38 +26,130 @@ def reraise_exception(func):
     return wrapped
 
 
+# Increments key by delta, and sets timeout only if key has been created by this call.
+# Timeout of -1 means no expiration. Executed atomically by redis server.
+INCR_SCRIPT = """
+local created = redis.call("EXISTS", KEYS[1]) == 0
+local value = redis.call("INCRBY", KEYS[1], ARGV[1])
+if created and tonumber(ARGV[2]) ~= -1 then
+    redis.call("PEXPIRE", KEYS[1], ARGV[2])
+end
+return value
+"""
+
+
 class RedisCache(BaseCache):
+    """
+    Options are passed to redis.asyncio.Redis, except for the following:
+    - KEY_PREFIX: str (default: "") - prefix, prepended to all keys and lock names.
+      If set, async_clear only deletes keys with this prefix, instead of FLUSHDB.
+    - CLEAR_BATCH_SIZE: int (default: 1000) - number of keys, deleted with a single UNLINK
+      by async_clear
+    - BATCHING: bool (default: False) - collect async_get/async_set calls of concurrent tasks,
+      issued within the same event loop tick, into a single MGET or a pipeline of SETs
+    - BATCH_MAX_SIZE: int (default: 100) - maximum number of commands in a batch
+    - BATCH_DELAY: float (default: 0.0) - time in seconds to wait for more commands in a batch,
+      0.0 means a single event loop tick
+
+    Integers (except bool) are stored as plain decimal strings instead of serialized values,
+    so that async_incr maps to native INCRBY.
+    """
+
     redis: aioredis.Redis
     serializer_class: Type[BytesSerializer] = PickleSerializer
     lock_class = RedisLock
 
     def __init__(self, options: Dict[str, Any]):
         super().__init__(options)
+        options = dict(options)
+        self.key_prefix: str = options.pop("KEY_PREFIX", "")
+        self._clear_batch_size: int = options.pop("CLEAR_BATCH_SIZE", 1000)
+        batching = options.pop("BATCHING", False)
+        batch_max_size = options.pop("BATCH_MAX_SIZE", 100)
+        batch_delay = options.pop("BATCH_DELAY", 0.0)
+        # Options of serializer, see make_serializer
+        options.pop("COMPRESSION", None)
+        options.pop("COMPRESS_THRESHOLD", None)
         self.redis = aioredis.Redis(**options)
 
+        self._batcher: Optional[RedisBatcher] = None
+        if batching:
+            self._batcher = RedisBatcher(self.redis, max_size=batch_max_size, delay=batch_delay)
+        self._incr_script = self.redis.register_script(INCR_SCRIPT)
+
+    def make_key(self, key: str) -> str:
+        return self.key_prefix + key
+
+    def _strip_key(self, key: bytes) -> str:
+        prefix_length = len(self.key_prefix)
+        return force_str(key)[prefix_length:]
+
+    def _make_pattern(self, pattern: str) -> str:
+        return escape_redis_pattern(self.key_prefix) + pattern
+
+    def _dumps(self, value: Any) -> bytes:
+        if type(value) is int:
+            return str(value).encode()
+        return self.serializer.serialize(value)
+
+    def _loads(self, value: Optional[bytes]) -> Any:
+        # Serialized values never consist of digits only, i.e. pickle starts with b"\x80"
+        if value is not None and re.fullmatch(rb"-?\d+", value):
+            return int(value)
+        return self.serializer.deserialize(value)
+
+    def batch_stats(self) -> Dict[str, float]:
+        if self._batcher is None:
+            return {}
+        return self._batcher.stats()
+
     @reraise_exception
     async def async_get(self, key: str) -> Any:
-        value = await self.redis.get(key)
-        return self.serializer.deserialize(value)
+        if self._batcher is not None:
+            value = await self._batcher.get(self.make_key(key))
+        else:
+            value = await self.redis.get(self.make_key(key))
+        return await self._async_check_tags_one(self._loads(value))
 
     @reraise_exception
-    async def async_set(self, key: str, value, timeout: Optional[float] = 120):
-        await self.redis.set(
-            key,
-            self.serializer.serialize(value),
-            px=int(timeout * 1000) if timeout is not None else None,
-        )
+    async def async_set(
+        self,
+        key: str,
+        value,
+        timeout: Optional[float] = 120,
+        tags: Optional[Sequence[str]] = None,
+    ):
+        if tags:
+            value = (await self._async_tag_values({key: value}, timeout, tags))[key]
+        key = self.make_key(key)
+        value = self._dumps(value)
+        px = int(timeout * 1000) if timeout is not None else None
+
+        if self._batcher is not None:
+            await self._batcher.set(key, value, px)
+        else:
+            await self.redis.set(key, value, px=px)
 
     @reraise_exception
     async def async_delete(self, key: str) -> None:
-        await self.redis.delete(key)
+        await self.redis.delete(self.make_key(key))
 
     @reraise_exception
     async def async_keys(self, pattern: str) -> List[str]:
         # Using KEYS is not recommended in production with high-load,
         # since it's a redis-blocking operation
-        # If you have millions of keys, consider using redis.scan_iter instead
-        return [force_str(key) for key in (await self.redis.keys(pattern))]
+        # If you have millions of keys, consider using async_iter_keys instead
+        return [
+            self._strip_key(key) for key in (await self.redis.keys(self._make_pattern(pattern)))
+        ]
+
+    async def async_iter_keys(self, pattern: str, count: int = 1000) -> AsyncIterator[str]:
+        # Uses non-blocking SCAN, so the same key may be yielded more than once
+        try:
+            async for key in self.redis.scan_iter(match=self._make_pattern(pattern), count=count):
+                yield self._strip_key(key)
+        except aioredis.RedisError as exc:
+            raise CacheError from exc
 
     @reraise_exception
     async def async_get_many(self, keys: Sequence[str]) -> Dict[str, Any]:
@@ -60,30 +157,38 @@ class RedisCache(BaseCache):
         key_idx = 0
 
         # redis.mget returns a simple list
-        for value in await self.redis.mget(keys):
-            result[keys[key_idx]] = self.serializer.deserialize(value)
+        for value in await self.redis.mget([self.make_key(key) for key in keys]):
+            result[keys[key_idx]] = self._loads(value)
             key_idx += 1
 
-        return result
+        return await self._async_check_tags(result)
 
     @reraise_exception
     async def async_has_key(self, key: str) -> bool:
-        return bool(await self.redis.exists(key))
+        return bool(await self.redis.exists(self.make_key(key)))
 
     @reraise_exception
-    async def async_set_many(self, data: Dict[str, Any], timeout: Optional[float] = 120) -> None:
+    async def async_set_many(
+        self,
+        data: Dict[str, Any],
+        timeout: Optional[float] = 120,
+        tags: Optional[Sequence[str]] = None,
+    ) -> None:
         """
         Set multiple key-values with timeout.
         Note, that redis does not support setting timeout in MSET,
         which is why commands need to be wrapped with multi-exec block (provided by pipelines)
         """
 
+        if tags:
+            data = await self._async_tag_values(data, timeout, tags)
+
         if len(data) < 2:
             await super().async_set_many(data, timeout)
 
         elif timeout is None:
             await self.redis.mset(
-                {key: self.serializer.serialize(value) for key, value in data.items()}
+                {self.make_key(key): self._dumps(value) for key, value in data.items()}
             )
 
         else:
@@ -96,20 +201,63 @@ class RedisCache(BaseCache):
                 for key, value in data.items():
                     pipeline.execute_command(
                         "SET",
-                        key,
-                        self.serializer.serialize(value),
+                        self.make_key(key),
+                        self._dumps(value),
                         "PX",
                         int(timeout * 1000),
                     )
                 await pipeline.execute(raise_on_error=True)
 
+    @reraise_exception
+    async def async_incr(self, key: str, delta: int = 1, timeout: Optional[float] = 120) -> int:
+        px = int(timeout * 1000) if timeout is not None else -1
+        if timeout is not None and px <= 0:
+            # Same as async_set, where redis rejects non-positive expire time of SET
+            raise CacheError(details=f"Invalid timeout {timeout!r}, must be positive")
+        try:
+            return await self._incr_script(keys=[self.make_key(key)], args=[delta, px])
+        except aioredis.ResponseError as exc:
+            raise CacheError(details=f"Value of key {key!r} is not an integer") from exc
+
+    @reraise_exception
+    async def async_add(self, key: str, value: Any, timeout: Optional[float] = 120) -> bool:
+        px = int(timeout * 1000) if timeout is not None else None
+        return bool(await self.redis.set(self.make_key(key), self._dumps(value), px=px, nx=True))
+
+    @reraise_exception
+    async def async_expire(self, key: str, timeout: Optional[float]) -> bool:
+        if timeout is None:
+            async with self.redis.pipeline(transaction=True) as pipeline:
+                pipeline.exists(self.make_key(key))
+                pipeline.persist(self.make_key(key))
+                exists, _ = await pipeline.execute()
+            return bool(exists)
+        return bool(await self.redis.pexpire(self.make_key(key), int(timeout * 1000)))
+
     @reraise_exception
     async def async_delete_many(self, keys: Sequence[str]) -> None:
-        await self.redis.delete(*keys)
+        if keys:
+            await self.redis.delete(*[self.make_key(key) for key in keys])
 
     @reraise_exception
     async def async_clear(self) -> None:
-        await self.redis.flushdb()
+        if not self.key_prefix:
+            await self.redis.flushdb()
+            return
+
+        # Delete keys of this cache only, with non-blocking SCAN and UNLINK
+        batch = []
+        async for key in self.redis.scan_iter(
+            match=self._make_pattern("*"),
+            count=self._clear_batch_size,
+        ):
+            batch.append(key)
+            if len(batch) >= self._clear_batch_size:
+                await self.redis.unlink(*batch)
+                batch = []
+
+        if batch:
+            await self.redis.unlink(*batch)
 
     def lock(
         self,
@@ -118,15 +266,32 @@ class RedisCache(BaseCache):
         blocking_timeout: Optional[float] = None,
         **kwargs,
     ) -> AsyncContextManager:
-        # Warning: may hang, if sleep (default 0.1) is less than timeout/blocking_timeout
-        # May be connected to https://github.com/redis/redis-py/issues/2579
-        retry_interval = kwargs.pop("sleep", kwargs.pop("retry_interval", 0.001))
+        # Waiters are woken up by release, so retry_interval of polling is not used.
+        # poll_interval limits waiting in case a release signal is lost.
+        kwargs.pop("sleep", None)
+        kwargs.pop("retry_interval", None)
 
-        return self.redis.lock(
-            name,
+        return self.lock_class(
+            self.redis,
+            self.make_key(name),
+            timeout=timeout,
+            blocking_timeout=blocking_timeout,
+            **kwargs,
+        )
+
+    def rw_lock(
+        self,
+        name: str,
+        mode: str = "w",
+        timeout: Optional[float] = 20.0,
+        blocking_timeout: Optional[float] = None,
+        **kwargs,
+    ) -> AsyncContextManager:
+        return RedisRWLock(
+            name=self.make_key(name),
             timeout=timeout,
             blocking_timeout=blocking_timeout,
-            lock_class=self.lock_class,
-            sleep=retry_interval,
+            mode=mode,
+            redis=self.redis,
             **kwargs,
         )
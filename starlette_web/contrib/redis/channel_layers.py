@@ -8,7 +8,11 @@ from starlette_web.common.channels.event import Event
 from starlette_web.common.channels.exceptions import ListenerClosed
 from starlette_web.common.channels.layers.base import BaseChannelLayer
 from starlette_web.common.utils.encoding import force_str
-from starlette_web.common.utils.serializers import BytesSerializer, PickleSerializer
+from starlette_web.common.utils.serializers import (
+    BytesSerializer,
+    PickleSerializer,
+    make_serializer,
+)
 
 
 class RedisPubSubChannelLayer(BaseChannelLayer):
@@ -20,8 +24,10 @@ class RedisPubSubChannelLayer(BaseChannelLayer):
 
     def __init__(self, **options):
         super().__init__(**options)
+        self._serializer = make_serializer(self.serializer_class, options)
+        options.pop("COMPRESSION", None)
+        options.pop("COMPRESS_THRESHOLD", None)
         self.redis = aioredis.Redis(**options)
-        self._serializer = self.serializer_class()
         self._pubsub: PubSub = self.redis.pubsub()
 
     async def connect(self) -> None:
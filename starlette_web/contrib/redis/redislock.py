@@ -1,13 +1,138 @@
+import math
+import uuid
+from typing import Optional, Union
+
 import anyio
 
 from redis import asyncio as aioredis
 from redis.asyncio.lock import Lock as AioredisLock
 
 from starlette_web.common.caches.base import CacheLockError
+from starlette_web.common.caches.base_lock import BaseRWLock
 
 
 class RedisLock(AioredisLock):
+    """
+    Instead of polling with SET NX, waiters block with BLPOP on a signal list of the lock,
+    to which releaser pushes a single token. So the lock is handed off to the next waiter
+    without delay, and a release costs O(1) commands regardless of number of waiters.
+
+    Waiting is limited by remaining TTL of the lock and by poll_interval,
+    so that a lock, which has expired or lost its signal, is still acquired by polling.
+    Since timeouts of BLPOP are imprecise, the last TIMEOUT_RESOLUTION seconds
+    before expiration of the lock or of blocking_timeout are waited with plain sleep.
+    """
+
     EXIT_MAX_DELAY: float = 60
+    # Time in milliseconds, during which token of release is kept, if nobody is waiting
+    SIGNAL_TTL: int = 10000
+    # Redis checks timeouts of blocked clients with frequency "hz" (default: 10),
+    # so BLPOP may return up to 1/hz seconds later than its timeout
+    TIMEOUT_RESOLUTION: float = 0.1
+
+    lua_acquire = None
+    lua_release_and_signal = None
+
+    # KEYS[1] - lock name
+    # ARGV[1] - token
+    # ARGV[2] - milliseconds, "0" for lock without timeout
+    # return -3 if the lock was acquired, otherwise PTTL of the lock
+    LUA_ACQUIRE_SCRIPT = """
+        local acquired
+        if ARGV[2] == "0" then
+            acquired = redis.call('set', KEYS[1], ARGV[1], 'NX')
+        else
+            acquired = redis.call('set', KEYS[1], ARGV[1], 'NX', 'PX', ARGV[2])
+        end
+        if acquired then
+            return -3
+        end
+        return redis.call('pttl', KEYS[1])
+    """
+
+    # KEYS[1] - lock name
+    # KEYS[2] - signal list
+    # ARGV[1] - token
+    # ARGV[2] - milliseconds to keep the signal
+    # return 1 if the lock was released, otherwise 0
+    LUA_RELEASE_AND_SIGNAL_SCRIPT = """
+        local token = redis.call('get', KEYS[1])
+        if not token or token ~= ARGV[1] then
+            return 0
+        end
+        redis.call('del', KEYS[1])
+        redis.call('del', KEYS[2])
+        redis.call('rpush', KEYS[2], '1')
+        redis.call('pexpire', KEYS[2], ARGV[2])
+        return 1
+    """
+
+    def __init__(self, *args, poll_interval: float = 0.5, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.poll_interval = poll_interval
+        self.signal_name = f"{self.name}:__signal__"
+
+    def register_scripts(self):
+        super().register_scripts()
+        cls = self.__class__
+        if cls.lua_acquire is None:
+            cls.lua_acquire = self.redis.register_script(cls.LUA_ACQUIRE_SCRIPT)
+        if cls.lua_release_and_signal is None:
+            cls.lua_release_and_signal = self.redis.register_script(
+                cls.LUA_RELEASE_AND_SIGNAL_SCRIPT
+            )
+
+    async def acquire(
+        self,
+        blocking: Optional[bool] = None,
+        blocking_timeout: Optional[float] = None,
+        token: Optional[Union[str, bytes]] = None,
+    ):
+        if token is None:
+            token = uuid.uuid1().hex.encode()
+        else:
+            token = self.redis.connection_pool.get_encoder().encode(token)
+
+        if blocking is None:
+            blocking = self.blocking
+        if blocking_timeout is None:
+            blocking_timeout = self.blocking_timeout
+
+        stop_trying_at = None
+        if blocking_timeout is not None:
+            stop_trying_at = anyio.current_time() + blocking_timeout
+
+        timeout = int(self.timeout * 1000) if self.timeout else 0
+        while True:
+            ttl = await self.lua_acquire(
+                keys=[self.name],
+                args=[token, timeout],
+                client=self.redis,
+            )
+            if ttl == -3:
+                self.local.token = token
+                return True
+
+            if not blocking:
+                return False
+
+            # Time until the lock expires or blocking_timeout is over
+            precise_wait = math.inf
+            if ttl >= 0:
+                precise_wait = ttl / 1000
+            if stop_trying_at is not None:
+                remaining = stop_trying_at - anyio.current_time()
+                if remaining <= 0:
+                    return False
+                precise_wait = min(precise_wait, remaining)
+
+            if precise_wait <= self.TIMEOUT_RESOLUTION:
+                await anyio.sleep(precise_wait)
+            else:
+                await self.redis.blpop(
+                    [self.signal_name],
+                    timeout=min(self.poll_interval, precise_wait - self.TIMEOUT_RESOLUTION),
+                )
 
     async def __aenter__(self):
         try:
@@ -24,9 +149,9 @@ class RedisLock(AioredisLock):
                 self.local.token = None
 
                 async def close_task():
-                    await self.lua_release(
-                        keys=[self.name],
-                        args=[expected_token],
+                    await self.lua_release_and_signal(
+                        keys=[self.name, self.signal_name],
+                        args=[expected_token, self.SIGNAL_TTL],
                         client=self.redis,
                     )
 
@@ -34,3 +159,217 @@ class RedisLock(AioredisLock):
                     await close_task()
         except (aioredis.RedisError, TimeoutError) as exc:
             raise CacheLockError from exc
+
+
+class RedisRWLock(BaseRWLock):
+    """
+    Reader-writer lock. Writer holds key "name", as RedisLock does, readers are stored
+    in hash "name:__readers__" with their deadlines, and waiting writers are registered
+    in sorted set "name:__writers_waiting__", which blocks new readers.
+
+    Waiters block with BLPOP on a signal list, as with RedisLock. Release pushes a single token,
+    and a reader, which has been woken up, passes token to the next waiter,
+    so that all waiting readers are woken up one after another.
+    """
+
+    SIGNAL_TTL: int = RedisLock.SIGNAL_TTL
+    TIMEOUT_RESOLUTION: float = RedisLock.TIMEOUT_RESOLUTION
+
+    lua_acquire = None
+    lua_release = None
+
+    # KEYS[1] - writer, KEYS[2] - readers, KEYS[3] - waiting writers, KEYS[4] - signal list
+    # ARGV[1] - token, ARGV[2] - mode, ARGV[3] - milliseconds, "0" for lock without timeout
+    # ARGV[4] - milliseconds to keep registration of waiting writer
+    # ARGV[5] - "1" if waiter has been woken up by signal, ARGV[6] - milliseconds to keep signal
+    # return -3 if the lock was acquired, otherwise milliseconds to wait or -1
+    LUA_ACQUIRE_SCRIPT = """
+        local time = redis.call('time')
+        local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+
+        local readers = redis.call('hgetall', KEYS[2])
+        local number_of_readers = 0
+        local max_deadline = now
+        local min_deadline = nil
+        local persistent = false
+        for i = 1, #readers, 2 do
+            local reader_deadline = tonumber(readers[i + 1])
+            if reader_deadline >= 0 and reader_deadline < now then
+                redis.call('hdel', KEYS[2], readers[i])
+            else
+                number_of_readers = number_of_readers + 1
+                if reader_deadline < 0 then
+                    persistent = true
+                else
+                    max_deadline = math.max(max_deadline, reader_deadline)
+                    min_deadline = math.min(min_deadline or reader_deadline, reader_deadline)
+                end
+            end
+        end
+        redis.call('zremrangebyscore', KEYS[3], '-inf', now)
+
+        local deadline = -1
+        if ARGV[3] ~= '0' then
+            deadline = now + tonumber(ARGV[3])
+        end
+        local writer_ttl = redis.call('pttl', KEYS[1])
+
+        if ARGV[2] == 'r' then
+            if writer_ttl ~= -2 then
+                return writer_ttl
+            end
+            local waiting = redis.call('zrange', KEYS[3], 0, 0, 'WITHSCORES')
+            if #waiting > 0 then
+                if ARGV[5] == '1' then
+                    -- Pass signal to the next waiter, which might be a waiting writer
+                    redis.call('rpush', KEYS[4], '1')
+                    redis.call('pexpire', KEYS[4], ARGV[6])
+                end
+                return tonumber(waiting[2]) - now
+            end
+
+            redis.call('hset', KEYS[2], ARGV[1], deadline)
+            if persistent or deadline < 0 then
+                redis.call('persist', KEYS[2])
+            else
+                redis.call('pexpire', KEYS[2], math.max(max_deadline, deadline) - now)
+            end
+            if ARGV[5] == '1' then
+                redis.call('rpush', KEYS[4], '1')
+                redis.call('pexpire', KEYS[4], ARGV[6])
+            end
+            return -3
+        end
+
+        if writer_ttl ~= -2 or number_of_readers > 0 then
+            redis.call('zadd', KEYS[3], now + tonumber(ARGV[4]), ARGV[1])
+            if writer_ttl ~= -2 then
+                return writer_ttl
+            end
+            if persistent then
+                return -1
+            end
+            return min_deadline - now
+        end
+
+        redis.call('zrem', KEYS[3], ARGV[1])
+        if deadline < 0 then
+            redis.call('set', KEYS[1], ARGV[1])
+        else
+            redis.call('set', KEYS[1], ARGV[1], 'PX', ARGV[3])
+        end
+        return -3
+    """
+
+    # KEYS[1] - writer, KEYS[2] - readers, KEYS[3] - signal list
+    # ARGV[1] - token, ARGV[2] - mode, ARGV[3] - milliseconds to keep signal
+    # return 1 if the lock was released, otherwise 0
+    LUA_RELEASE_SCRIPT = """
+        if ARGV[2] == 'r' then
+            if redis.call('hdel', KEYS[2], ARGV[1]) == 0 then
+                return 0
+            end
+            if redis.call('hlen', KEYS[2]) > 0 then
+                return 1
+            end
+        else
+            if redis.call('get', KEYS[1]) ~= ARGV[1] then
+                return 0
+            end
+            redis.call('del', KEYS[1])
+        end
+        redis.call('del', KEYS[3])
+        redis.call('rpush', KEYS[3], '1')
+        redis.call('pexpire', KEYS[3], ARGV[3])
+        return 1
+    """
+
+    def __init__(
+        self,
+        name: str,
+        timeout: Optional[float] = None,
+        blocking_timeout: Optional[float] = None,
+        mode: str = "w",
+        **kwargs,
+    ) -> None:
+        super().__init__(name, timeout, blocking_timeout, mode=mode, **kwargs)
+        self._redis: aioredis.Redis = kwargs["redis"]
+        self._poll_interval: float = kwargs.get("poll_interval", 0.5)
+        self._keys = [
+            self._name,
+            f"{self._name}:__readers__",
+            f"{self._name}:__writers_waiting__",
+            f"{self._name}:__signal__",
+        ]
+        self._token: Optional[str] = None
+        self._register_scripts()
+
+    def _register_scripts(self):
+        cls = self.__class__
+        if cls.lua_acquire is None:
+            cls.lua_acquire = self._redis.register_script(cls.LUA_ACQUIRE_SCRIPT)
+        if cls.lua_release is None:
+            cls.lua_release = self._redis.register_script(cls.LUA_RELEASE_SCRIPT)
+
+    async def _acquire(self):
+        if self._is_acquired:
+            return
+
+        token = uuid.uuid4().hex
+        timeout = 0 if math.isinf(self._timeout) else max(int(self._timeout * 1000), 1)
+        # Registration of waiting writer outlives the longest wait between retries
+        waiting_ttl = int((self._poll_interval + self.TIMEOUT_RESOLUTION) * 2000)
+        is_woken_up = False
+        try:
+            while True:
+                wait = await self.lua_acquire(
+                    keys=self._keys,
+                    args=[
+                        token,
+                        self._mode,
+                        timeout,
+                        waiting_ttl,
+                        int(is_woken_up),
+                        self.SIGNAL_TTL,
+                    ],
+                    client=self._redis,
+                )
+                if wait == -3:
+                    break
+
+                # blocking_timeout is enforced by BaseLock
+                precise_wait = wait / 1000 if wait >= 0 else math.inf
+                if precise_wait <= self.TIMEOUT_RESOLUTION:
+                    await anyio.sleep(precise_wait)
+                    is_woken_up = False
+                else:
+                    signal = await self._redis.blpop(
+                        [self._keys[3]],
+                        timeout=min(self._poll_interval, precise_wait - self.TIMEOUT_RESOLUTION),
+                    )
+                    is_woken_up = signal is not None
+
+        except BaseException:
+            if self._mode == "w":
+                with anyio.CancelScope(shield=True):
+                    await self._redis.zrem(self._keys[2], token)
+            raise
+
+        self._token = token
+        self._acquire_event.set()
+
+    async def _release(self):
+        if not self._is_acquired:
+            return
+
+        try:
+            await self.lua_release(
+                keys=[self._keys[0], self._keys[1], self._keys[3]],
+                args=[self._token, self._mode, self.SIGNAL_TTL],
+                client=self._redis,
+            )
+        except aioredis.RedisError as exc:
+            raise CacheLockError(details=str(exc)) from exc
+        finally:
+            self._is_acquired = False
+            self._token = None
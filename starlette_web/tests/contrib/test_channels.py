@@ -8,6 +8,7 @@ from starlette_web.common.conf import settings
 from starlette_web.common.caches import caches
 from starlette_web.common.channels.base import Channel, Event
 from starlette_web.common.channels.layers.local_memory import InMemoryChannelLayer
+from starlette_web.common.utils.serializers import CompressedPickleSerializer
 from starlette_web.contrib.redis.channel_layers import RedisPubSubChannelLayer
 from starlette_web.contrib.postgres.channel_layers import PostgreSQLChannelLayer
 from starlette_web.tests.helpers import await_
@@ -28,6 +29,12 @@ class TestChannelLayers:
         self.run_channels_test(channel_ctx)
         self.run_channels_test(channel_ctx)
 
+    def test_redis_pubsub_channel_layer_compression(self):
+        redis_options = settings.CHANNEL_LAYERS["redispubsub"]["OPTIONS"]
+        channel_layer = RedisPubSubChannelLayer(**redis_options, COMPRESSION="zlib")
+        assert isinstance(channel_layer._serializer, CompressedPickleSerializer)
+        self.run_channels_test(Channel(channel_layer))
+
     def test_postgres_channel_layer(self):
         psql_options = {"dsn": settings.DATABASE_DSN.replace("+asyncpg", "")}
         channel_ctx = Channel(PostgreSQLChannelLayer(**psql_options))
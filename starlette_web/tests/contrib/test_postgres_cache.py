@@ -0,0 +1,148 @@
+import time
+
+import anyio
+import pytest
+from sqlalchemy import text
+
+from starlette_web.common.caches import caches
+from starlette_web.common.caches.base import CacheLockError
+from starlette_web.contrib.postgres.cache import PostgreSQLCache
+from starlette_web.contrib.postgres.lock import PostgreSQLAdvisoryLock
+from starlette_web.tests.core.helpers.base_cache_tester import BaseCacheTester
+from starlette_web.tests.helpers import await_
+
+
+class TestPostgreSQLCache(BaseCacheTester):
+    def test_postgres_cache_base_ops(self):
+        self._run_base_cache_test(caches["postgres"])
+
+    def test_postgres_cache_many_ops(self):
+        self._run_cache_many_ops_test(caches["postgres"])
+
+    def test_postgres_lock(self):
+        self._run_cache_lock_test(caches["postgres"])
+
+    def test_postgres_lock_race_condition(self):
+        self._run_cache_mutual_lock_test(caches["postgres"])
+
+    def test_postgres_lock_correct_task_blocking(self):
+        self._run_locks_timeouts_test(caches["postgres"])
+
+    def test_postgres_lock_cancellation(self):
+        self._run_base_lock_cancellation(caches["postgres"])
+
+    def test_postgres_lock_contention(self):
+        self._run_lock_contention_test(caches["postgres"])
+
+    def test_postgres_lock_lease_is_enforced_by_server(self):
+        async def run():
+            holder = PostgreSQLAdvisoryLock("test_pg_lock_lease", timeout=0.3)
+            await holder.__aenter__()
+
+            with pytest.raises(CacheLockError):
+                async with PostgreSQLAdvisoryLock("test_pg_lock_lease", blocking_timeout=0.1):
+                    pass
+
+            # Holder does not release the lock, and its session is terminated by server
+            start_time = anyio.current_time()
+            async with PostgreSQLAdvisoryLock("test_pg_lock_lease", timeout=1, blocking_timeout=3):
+                waited = anyio.current_time() - start_time
+
+            await holder.__aexit__(None, None, None)
+            return waited
+
+        waited = await_(run())
+        assert waited > 0.1
+
+    def test_postgres_lock_lease_without_idle_session_timeout(self, monkeypatch):
+        # PostgreSQL < 14: waiter terminates session of holder, whose lease has expired
+        monkeypatch.setattr(
+            PostgreSQLAdvisoryLock, "_supports_idle_session_timeout", staticmethod(lambda _: False)
+        )
+        self._run_cache_lock_test(caches["postgres"])
+        self._run_locks_timeouts_test(caches["postgres"])
+
+        async def run():
+            holder = PostgreSQLAdvisoryLock("test_pg_lock_lease_fallback", timeout=0.3)
+            await holder.__aenter__()
+            async with holder._engine.connect() as connection:
+                result = await connection.execute(
+                    text("SELECT count(*) FROM pg_stat_activity WHERE application_name LIKE :name"),
+                    {"name": PostgreSQLAdvisoryLock.LEASE_APPLICATION_NAME + ":%"},
+                )
+                assert result.scalar() == 1
+
+            start_time = anyio.current_time()
+            async with PostgreSQLAdvisoryLock(
+                "test_pg_lock_lease_fallback", timeout=None, blocking_timeout=3
+            ):
+                waited = anyio.current_time() - start_time
+
+            await holder.__aexit__(None, None, None)
+
+            # Lease is reset, when connection is returned to pool
+            async with PostgreSQLAdvisoryLock("test_pg_lock_lease_fallback", timeout=5):
+                pass
+            async with holder._engine.connect() as connection:
+                result = await connection.execute(
+                    text("SELECT count(*) FROM pg_stat_activity WHERE application_name LIKE :name"),
+                    {"name": PostgreSQLAdvisoryLock.LEASE_APPLICATION_NAME + ":%"},
+                )
+                assert result.scalar() == 0
+            return waited
+
+        # Waiter acquires the lock only after lease of holder, limited by blocking_timeout
+        assert await_(run()) > 0.2
+
+    def test_postgres_cache_get_or_set(self):
+        self._run_get_or_set_test(caches["postgres"])
+        self._run_get_or_set_test(caches["postgres"], use_lock=True)
+        self._run_get_or_set_early_recompute_test(caches["postgres"])
+
+    def test_postgres_cache_atomic_ops(self):
+        self._run_atomic_ops_test(caches["postgres"])
+
+    def test_postgres_cache_tags_and_namespaces(self):
+        self._run_tags_and_namespaces_test(caches["postgres"])
+
+    def test_postgres_cache_iter_keys(self):
+        self._run_iter_keys_test(caches["postgres"])
+
+    def test_postgres_cache_shares_pool(self):
+        cache_1 = PostgreSQLCache({"TABLE": "starlette_web_cache", "POOL_SIZE": 2})
+        cache_2 = PostgreSQLCache({"TABLE": "starlette_web_cache_2", "POOL_SIZE": 2})
+        assert cache_1._get_session_maker() is cache_2._get_session_maker()
+        assert cache_1._get_session_maker() is not caches["postgres"]._get_session_maker()
+
+        engine = cache_1._get_session_maker().kw["bind"]
+        assert engine.pool.size() == 2
+
+        async def run():
+            async def read(idx: int):
+                await cache_1.async_get(f"pg_pool_{idx}")
+                await cache_2.async_get(f"pg_pool_{idx}")
+
+            async with anyio.create_task_group() as task_group:
+                for idx in range(10):
+                    task_group.start_soon(read, idx)
+
+            await cache_2.async_clear()
+
+        await_(run())
+        assert engine.pool.checkedout() == 0
+        assert engine.pool.checkedin() <= 2
+
+    def test_postgres_cache_remove_expired(self):
+        cache = caches["postgres"]
+        await_(cache.async_set_many({f"pg_expired_{i}": i for i in range(25)}, timeout=0.1))
+        await_(cache.async_set("pg_persistent_%_key", 1, timeout=None))
+        assert len(await_(cache.async_keys("pg_*"))) == 26
+
+        time.sleep(0.2)
+        assert await_(cache.async_keys("pg_*")) == ["pg_persistent_%_key"]
+        assert await_(cache.async_keys("pg_persistent_%*")) == ["pg_persistent_%_key"]
+
+        cache._purge_batch_size = 10
+        await_(cache.async_remove_expired())
+        assert await_(cache._purge_expired_batch()) == 0
+        await_(cache.async_delete("pg_persistent_%_key"))
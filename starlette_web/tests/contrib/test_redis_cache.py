@@ -1,8 +1,12 @@
 import time
 
 import anyio
+import pytest
 
 from starlette_web.common.caches import caches
+from starlette_web.common.caches.base import CacheError
+from starlette_web.common.conf import settings
+from starlette_web.contrib.redis import RedisCache
 from starlette_web.tests.core.helpers.base_cache_tester import BaseCacheTester
 from starlette_web.tests.helpers import await_
 
@@ -23,6 +27,101 @@ class TestRedisCache(BaseCacheTester):
     def test_redis_lock_correct_task_blocking(self):
         self._run_locks_timeouts_test(caches["default"])
 
+    def test_redis_lock_contention(self):
+        self._run_lock_contention_test(caches["default"])
+
+    def test_redis_rw_lock(self):
+        self._run_rw_lock_test(caches["default"])
+
+    def test_redis_cache_get_or_set(self):
+        self._run_get_or_set_test(caches["default"])
+        self._run_get_or_set_test(caches["default"], use_lock=True)
+        self._run_get_or_set_early_recompute_test(caches["default"])
+
+    def test_redis_cache_get_or_set_stale_while_revalidate(self):
+        self._run_get_or_set_stale_while_revalidate_test(caches["default"])
+
+    def test_redis_cache_atomic_ops(self):
+        self._run_atomic_ops_test(caches["default"])
+
+    def test_redis_cache_incr_timeout(self):
+        cache = caches["default"]
+        await_(cache.async_delete_many(["incr_no_timeout", "incr_zero_timeout"]))
+
+        await_(cache.async_incr("incr_no_timeout", timeout=None))
+        assert await_(cache.redis.pttl(cache.make_key("incr_no_timeout"))) == -1
+
+        for timeout in (0, -1, 0.0001):
+            with pytest.raises(CacheError):
+                await_(cache.async_set("incr_zero_timeout", 1, timeout=timeout))
+            with pytest.raises(CacheError):
+                await_(cache.async_incr("incr_zero_timeout", timeout=timeout))
+        assert not await_(cache.async_has_key("incr_zero_timeout"))
+
+        await_(cache.async_delete("incr_no_timeout"))
+
+    def test_redis_cache_tags_and_namespaces(self):
+        self._run_tags_and_namespaces_test(caches["default"])
+
+    def test_redis_cache_iter_keys(self):
+        self._run_iter_keys_test(caches["default"])
+
+    def test_redis_cache_prefixed_clear(self):
+        options = settings.CACHES["default"]["OPTIONS"]
+        cache_1 = RedisCache({**options, "KEY_PREFIX": "tenant[1]:", "CLEAR_BATCH_SIZE": 7})
+        cache_2 = RedisCache({**options, "KEY_PREFIX": "tenant[2]:"})
+
+        await_(cache_1.async_set_many({f"key_{i}": i for i in range(30)}, timeout=5))
+        await_(cache_2.async_set_many({f"key_{i}": i for i in range(30)}, timeout=5))
+        assert await_(cache_1.async_get("key_0")) == 0
+        assert len(await_(cache_1.async_keys("key_*"))) == 30
+
+        await_(cache_1.async_clear())
+        assert await_(cache_1.async_keys("*")) == []
+        assert await_(cache_1.async_get("key_0")) is None
+        assert sorted(await_(cache_2.async_keys("key_*"))) == sorted(f"key_{i}" for i in range(30))
+        assert await_(caches["default"].async_get("tenant[2]:key_0")) == 0
+
+        await_(cache_2.async_clear())
+
+    def test_redis_cache_compression(self):
+        options = settings.CACHES["default"]["OPTIONS"]
+        cache = RedisCache({**options, "COMPRESSION": "zlib", "COMPRESS_THRESHOLD": 100})
+        value = {"payload": "x" * 10_000}
+
+        await_(cache.async_set("compressed_key", value, timeout=5))
+        await_(cache.async_set("compressed_int", 1, timeout=5))
+        assert len(await_(cache.redis.get("compressed_key"))) < 1000
+        assert await_(cache.async_get("compressed_key")) == value
+        assert await_(cache.async_incr("compressed_int")) == 2
+
+        await_(cache.async_delete_many(["compressed_key", "compressed_int"]))
+
+    def test_redis_cache_batching(self):
+        options = settings.CACHES["default"]["OPTIONS"]
+        cache = RedisCache({**options, "BATCHING": True, "BATCH_MAX_SIZE": 50})
+        number_of_tasks = 120
+        results = {}
+
+        async def worker(task_id: int):
+            await cache.async_set(f"batched_key_{task_id}", task_id, timeout=5)
+            results[task_id] = await cache.async_get(f"batched_key_{task_id}")
+
+        async def run_workers():
+            async with anyio.create_task_group() as task_group:
+                for task_id in range(number_of_tasks):
+                    task_group.start_soon(worker, task_id)
+
+        await_(run_workers())
+        assert results == {task_id: task_id for task_id in range(number_of_tasks)}
+
+        stats = cache.batch_stats()
+        assert stats["get_commands"] == stats["set_commands"] == number_of_tasks
+        assert stats["get_batches"] == stats["set_batches"] == 3
+        assert stats["avg_get_batch_size"] == number_of_tasks / 3
+
+        await_(cache.async_delete_many([f"batched_key_{i}" for i in range(number_of_tasks)]))
+
     def test_redis_lock_cancellation(self):
         async def task_lock_cancel():
             with anyio.move_on_after(0.1):
@@ -41,3 +140,57 @@ class TestRedisCache(BaseCacheTester):
 
         key = await_(caches["default"].async_get("test_lock_cancel"))
         assert key is None
+
+    def test_redis_lock_waiters_are_notified(self):
+        cache = caches["default"]
+        number_of_tasks = 10
+        hold_time = 0.02
+        acquired_at = []
+
+        async def task_with_lock():
+            async with cache.lock(
+                "test_lock_notify",
+                timeout=5,
+                blocking_timeout=5,
+                poll_interval=5,
+            ):
+                acquired_at.append(time.perf_counter())
+                await anyio.sleep(hold_time)
+
+        async def run_tasks():
+            await cache.redis.config_resetstat()
+            async with anyio.create_task_group() as nursery:
+                for _ in range(number_of_tasks):
+                    nursery.start_soon(task_with_lock)
+            return await cache.redis.info("commandstats")
+
+        stats = await_(run_tasks())
+        # Waiters do not poll, and are woken up by release without delay
+        assert stats["cmdstat_blpop"]["calls"] <= 2 * number_of_tasks
+        handoffs = [end - start for start, end in zip(acquired_at, acquired_at[1:])]
+        assert max(handoffs) < hold_time + 0.02
+
+    def test_redis_lock_polls_without_signal(self):
+        cache = caches["default"]
+        acquired_after = []
+
+        async def waiter():
+            start_time = time.perf_counter()
+            async with cache.lock(
+                "test_lock_lost_signal",
+                timeout=5,
+                blocking_timeout=2,
+                poll_interval=0.3,
+            ):
+                acquired_after.append(time.perf_counter() - start_time)
+
+        async def run():
+            async with cache.lock("test_lock_lost_signal", timeout=None):
+                async with anyio.create_task_group() as nursery:
+                    nursery.start_soon(waiter)
+                    await anyio.sleep(0.05)
+                    # Lock disappears without release signal
+                    await cache.async_delete("test_lock_lost_signal")
+
+        await_(run())
+        assert 0.25 < acquired_after[0] < 0.5
@@ -0,0 +1,91 @@
+import anyio
+
+from starlette_web.common.caches import caches
+from starlette_web.common.caches.two_tier import TwoTierCache
+from starlette_web.common.conf import settings
+from starlette_web.tests.core.helpers.base_cache_tester import BaseCacheTester
+from starlette_web.tests.helpers import await_
+
+
+class TestTwoTierCache(BaseCacheTester):
+    def test_two_tier_cache_base_ops(self):
+        self._run_base_cache_test(caches["two_tier"])
+
+    def test_two_tier_cache_many_ops(self):
+        self._run_cache_many_ops_test(caches["two_tier"])
+
+    def test_two_tier_lock(self):
+        self._run_cache_lock_test(caches["two_tier"])
+
+    def test_two_tier_cache_atomic_ops(self):
+        self._run_atomic_ops_test(caches["two_tier"])
+
+    def test_two_tier_cache_tags_and_namespaces(self):
+        self._run_tags_and_namespaces_test(caches["two_tier"])
+
+    def test_two_tier_cache_invalidation(self):
+        options = settings.CACHES["two_tier"]["OPTIONS"]
+        cache_1 = TwoTierCache({**options, "L1_OPTIONS": {"name": "two_tier_1"}})
+        cache_2 = TwoTierCache({**options, "L1_OPTIONS": {"name": "two_tier_2"}})
+        test_key = "two_tier_invalidation_key"
+
+        async def run_listeners():
+            async with anyio.create_task_group() as task_group:
+                task_group.start_soon(cache_1.async_run_invalidation_listener)
+                task_group.start_soon(cache_2.async_run_invalidation_listener)
+                await anyio.sleep(0.1)
+
+                await cache_1.async_set(test_key, 1, timeout=10)
+                assert await cache_2.async_get(test_key) == 1
+                assert await cache_2.l1.async_get(test_key) == 1
+
+                await cache_1.async_set(test_key, 2, timeout=10)
+                await anyio.sleep(0.05)
+                assert await cache_2.l1.async_get(test_key) is None
+                assert await cache_2.async_get(test_key) == 2
+
+                await cache_2.async_delete(test_key)
+                await anyio.sleep(0.05)
+                assert await cache_1.l1.async_get(test_key) is None
+                assert await cache_1.async_get(test_key) is None
+
+                task_group.cancel_scope.cancel()
+
+        await_(run_listeners())
+
+    def test_two_tier_cache_concurrent_local_write(self, monkeypatch):
+        options = settings.CACHES["two_tier"]["OPTIONS"]
+        cache = TwoTierCache({**options, "L1_OPTIONS": {"name": "two_tier_concurrent"}})
+        test_key = "two_tier_concurrent_key"
+
+        async def run():
+            await cache.async_set(test_key, 1, timeout=10)
+            await cache.l1.async_delete(test_key)
+            l2_get = cache.l2.async_get
+            old_value_read = anyio.Event()
+            written = anyio.Event()
+
+            async def slow_l2_get(key):
+                # L2 returns old value, while local write completes
+                value = await l2_get(key)
+                old_value_read.set()
+                await written.wait()
+                return value
+
+            async def write():
+                await old_value_read.wait()
+                await cache.async_set(test_key, 2, timeout=10)
+                written.set()
+
+            monkeypatch.setattr(cache.l2, "async_get", slow_l2_get)
+            async with anyio.create_task_group() as task_group:
+                task_group.start_soon(write)
+                assert await cache.async_get(test_key) == 1
+            monkeypatch.undo()
+
+            # Old value, read from L2, does not overwrite L1
+            assert await cache.l1.async_get(test_key) == 2
+            assert await cache.async_get(test_key) == 2
+            await cache.async_delete(test_key)
+
+        await_(run())
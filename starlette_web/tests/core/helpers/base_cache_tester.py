@@ -5,7 +5,7 @@ import pytest
 
 from starlette_web.common.caches.base import BaseCache
 from starlette_web.tests.helpers import await_
-from starlette_web.common.caches.base import CacheLockError
+from starlette_web.common.caches.base import CacheError, CacheLockError
 
 
 class BaseCacheTester:
@@ -129,3 +129,326 @@ class BaseCacheTester:
         end_time = time.time()
         run_time = end_time - start_time
         assert abs(run_time - move_on_after) < 0.1
+
+    def _run_lock_contention_test(self, cache: BaseCache):
+        # Checks mutual exclusion of many sequential and concurrent acquisitions
+        number_of_tasks = 10
+        iterations = 200
+        holders = []
+        max_holders = 0
+        acquisitions = 0
+
+        async def task_with_lock(number_of_iterations: int):
+            nonlocal max_holders, acquisitions
+            for _ in range(number_of_iterations):
+                async with cache.lock("test_lock_contention", timeout=5, blocking_timeout=30):
+                    holders.append(1)
+                    max_holders = max(max_holders, len(holders))
+                    await anyio.sleep(0)
+                    holders.pop()
+                    acquisitions += 1
+
+        async def contended():
+            async with anyio.create_task_group() as nursery:
+                for _ in range(number_of_tasks):
+                    nursery.start_soon(task_with_lock, iterations // number_of_tasks)
+
+        await_(task_with_lock(iterations))
+        await_(contended())
+        assert max_holders == 1
+        assert acquisitions == 2 * iterations
+
+    def _run_rw_lock_test(self, cache: BaseCache):
+        lock_name = "test_rw_lock"
+        holders = {"r": 0, "w": 0}
+        max_holders = {"r": 0, "w": 0}
+
+        async def hold(mode: str, duration: float, **kwargs):
+            async with cache.rw_lock(lock_name, mode=mode, timeout=5, **kwargs):
+                holders[mode] += 1
+                max_holders[mode] = max(max_holders[mode], holders[mode])
+                assert holders["w"] == 0 or (holders["w"] == 1 and holders["r"] == 0)
+                await anyio.sleep(duration)
+                holders[mode] -= 1
+
+        async def concurrent_readers():
+            all_readers_entered = anyio.Event()
+
+            async def reader():
+                async with cache.rw_lock(lock_name, mode="r", timeout=5):
+                    holders["r"] += 1
+                    max_holders["r"] = max(max_holders["r"], holders["r"])
+                    if holders["r"] == 5:
+                        all_readers_entered.set()
+                    # Readers, which exclude each other, would never get here all at once
+                    with anyio.fail_after(5):
+                        await all_readers_entered.wait()
+                    holders["r"] -= 1
+
+            async with anyio.create_task_group() as nursery:
+                for _ in range(5):
+                    nursery.start_soon(reader)
+
+        # Readers share the lock
+        await_(concurrent_readers())
+        assert max_holders["r"] == 5
+
+        async def writer_is_not_starved():
+            writer_acquired = anyio.Event()
+
+            async def reader_loop():
+                while not writer_acquired.is_set():
+                    await hold("r", 0.05)
+
+            async def writer():
+                await anyio.sleep(0.1)
+                await hold("w", 0.01, blocking_timeout=2)
+                writer_acquired.set()
+
+            async with anyio.create_task_group() as nursery:
+                for idx in range(5):
+                    nursery.start_soon(reader_loop)
+                    await anyio.sleep(0.01)
+                nursery.start_soon(writer)
+
+        await_(writer_is_not_starved())
+        assert max_holders["w"] == 1
+
+        # Read-heavy mix: readers overlap, while writers are exclusive (checked in hold)
+        number_of_tasks = 10
+        iterations = 10
+        max_holders.update(r=0, w=0)
+        modes = []
+
+        async def task(task_idx):
+            for idx in range(iterations):
+                mode = "w" if (task_idx * iterations + idx) % 10 == 0 else "r"
+                await hold(mode, 0.01, blocking_timeout=30)
+                modes.append(mode)
+
+        async def read_heavy_mix():
+            async with anyio.create_task_group() as nursery:
+                for task_idx in range(number_of_tasks):
+                    nursery.start_soon(task, task_idx)
+
+        await_(read_heavy_mix())
+        assert modes.count("w") == number_of_tasks * iterations // 10
+        assert len(modes) == number_of_tasks * iterations
+        assert max_holders["r"] > 1
+        assert max_holders["w"] == 1
+        assert holders == {"r": 0, "w": 0}
+
+    def _run_get_or_set_test(self, cache: BaseCache, use_lock: bool = False):
+        test_key = "9d0c2f3e-get-or-set-" + str(use_lock)
+        number_of_tasks = 50
+        factory_calls = []
+
+        async def factory():
+            factory_calls.append(1)
+            await anyio.sleep(0.1)
+            return len(factory_calls)
+
+        async def gather_coroutines():
+            results = []
+
+            async def get_or_set():
+                results.append(
+                    await cache.async_get_or_set(test_key, factory, timeout=5, use_lock=use_lock)
+                )
+
+            async with anyio.create_task_group() as nursery:
+                for _ in range(number_of_tasks):
+                    nursery.start_soon(get_or_set)
+            return results
+
+        await_(cache.async_delete(test_key))
+        assert await_(gather_coroutines()) == [1] * number_of_tasks
+        assert await_(gather_coroutines()) == [1] * number_of_tasks
+        assert len(factory_calls) == 1
+        await_(cache.async_delete(test_key))
+
+    def _run_get_or_set_early_recompute_test(self, cache: BaseCache):
+        test_key = "9d0c2f3e-get-or-set-early-recompute"
+        factory_calls = []
+
+        async def factory():
+            factory_calls.append(1)
+            await anyio.sleep(0.01)
+            return len(factory_calls)
+
+        async def get_or_set(beta):
+            return await cache.async_get_or_set(
+                test_key, factory, timeout=5, early_recompute_beta=beta
+            )
+
+        await_(cache.async_delete(test_key))
+        assert await_(get_or_set(1.0)) == 1
+        # Value expires in 5 seconds, while it took 0.01 seconds to compute
+        assert await_(get_or_set(1.0)) == 1
+        # Too large beta forces recomputation
+        assert await_(get_or_set(1e6)) == 2
+        assert await_(get_or_set(1.0)) == 2
+        await_(cache.async_delete(test_key))
+
+    def _run_iter_keys_test(self, cache: BaseCache):
+        test_keys = {f"5e0c7f8a-iter-keys-{i}": i for i in range(30)}
+
+        async def collect_keys():
+            return [key async for key in cache.async_iter_keys("5e0c7f8a-iter-keys-*", count=7)]
+
+        await_(cache.async_set_many(test_keys, timeout=5))
+        await_(cache.async_set("5e0c7f8a-iter-other", 1, timeout=5))
+        assert set(await_(collect_keys())) == set(test_keys.keys())
+
+        await_(cache.async_delete_many(list(test_keys.keys()) + ["5e0c7f8a-iter-other"]))
+        assert await_(collect_keys()) == []
+
+    def _run_atomic_ops_test(self, cache: BaseCache):
+        test_key = "3c1f5d0e-atomic-ops"
+        await_(cache.async_delete(test_key))
+
+        assert await_(cache.async_incr(test_key, timeout=0.5)) == 1
+        assert await_(cache.async_incr(test_key, 5, timeout=10)) == 6
+        assert await_(cache.async_decr(test_key, 2)) == 4
+
+        # Existing key keeps its timeout
+        time.sleep(0.6)
+        assert await_(cache.async_get(test_key)) is None
+
+        async def increment_concurrently():
+            async with anyio.create_task_group() as task_group:
+                for _ in range(20):
+                    task_group.start_soon(cache.async_incr, test_key, 1, 10)
+
+        await_(increment_concurrently())
+        assert await_(cache.async_get(test_key)) == 20
+
+        await_(cache.async_set(test_key, "string", 10))
+        with pytest.raises(CacheError):
+            await_(cache.async_incr(test_key))
+
+        assert not await_(cache.async_add(test_key, 1, 10))
+        assert await_(cache.async_get(test_key)) == "string"
+        await_(cache.async_delete(test_key))
+        assert await_(cache.async_add(test_key, {"value": 1}, 10))
+        assert not await_(cache.async_add(test_key, {"value": 2}, 10))
+        assert await_(cache.async_get(test_key)) == {"value": 1}
+
+        assert await_(cache.async_expire(test_key, 0.2))
+        time.sleep(0.3)
+        assert await_(cache.async_get(test_key)) is None
+        assert not await_(cache.async_expire(test_key, 10))
+        assert await_(cache.async_add(test_key, 1, 0.2))
+        assert await_(cache.async_expire(test_key, None))
+        time.sleep(0.3)
+        assert await_(cache.async_get(test_key)) == 1
+        await_(cache.async_delete(test_key))
+
+    def _run_tags_and_namespaces_test(self, cache: BaseCache):
+        tag_1, tag_2 = "9d2e4b7a-tag-1", "9d2e4b7a-tag-2"
+        keys = [f"9d2e4b7a-tagged-{i}" for i in range(5)]
+        await_(cache.async_delete_many(keys))
+
+        await_(cache.async_set_many({keys[0]: 0, keys[1]: 1}, timeout=10, tags=[tag_1]))
+        await_(cache.async_set(keys[2], 2, timeout=10, tags=[tag_2]))
+        await_(cache.async_set(keys[3], 3, timeout=10, tags=[tag_1, tag_2]))
+        await_(cache.async_set(keys[4], 4, timeout=10))
+        assert await_(cache.async_get(keys[0])) == 0
+        assert await_(cache.async_get_many(keys)) == dict(zip(keys, range(5)))
+
+        await_(cache.async_invalidate_tags([tag_1]))
+        assert await_(cache.async_get_many(keys)) == {
+            keys[0]: None,
+            keys[1]: None,
+            keys[2]: 2,
+            keys[3]: None,
+            keys[4]: 4,
+        }
+        assert await_(cache.async_get(keys[3])) is None
+
+        # Value, set again after invalidation, survives cleanup
+        await_(cache.async_set(keys[0], 5, timeout=10, tags=[tag_1]))
+        assert await_(cache.async_get(keys[0])) == 5
+        await_(cache.async_remove_orphans())
+        assert not await_(cache.async_has_key(keys[1]))
+        assert not await_(cache.async_has_key(keys[3]))
+        assert await_(cache.async_get_many(keys[:3])) == {keys[0]: 5, keys[1]: None, keys[2]: 2}
+
+        namespace = "9d2e4b7a-namespace"
+        key = await_(cache.async_namespace_key(namespace, "1"))
+        assert await_(cache.async_namespace_key(namespace, "1")) == key
+        await_(cache.async_set(key, "value", timeout=10))
+        assert await_(cache.async_get(key)) == "value"
+
+        async def invalidate_in_background():
+            async with anyio.create_task_group() as task_group:
+                task_group.start_soon(cache.async_run_orphan_cleanup)
+                await cache.async_invalidate_namespace(namespace)
+                new_key = await cache.async_namespace_key(namespace, "1")
+                assert new_key != key
+                assert await cache.async_get(new_key) is None
+
+                with anyio.fail_after(5):
+                    while await cache.async_has_key(key):
+                        await anyio.sleep(0.01)
+                task_group.cancel_scope.cancel()
+
+        await_(invalidate_in_background())
+        await_(cache.async_delete_many(keys))
+
+    def _run_get_or_set_stale_while_revalidate_test(self, cache: BaseCache):
+        test_key = "e7a1c2d4-stale-while-revalidate"
+        await_(cache.async_delete(test_key))
+        calls = []
+
+        async def factory():
+            calls.append(1)
+            await anyio.sleep(0.2)
+            return len(calls)
+
+        async def get_or_set(timeout=2.0):
+            return await cache.async_get_or_set(
+                test_key, factory, timeout=timeout, soft_timeout=0.5
+            )
+
+        async def read_stale(expected_value, run_background_refresh):
+            async def read():
+                start_time = anyio.current_time()
+                assert await get_or_set() == expected_value
+                durations.append(anyio.current_time() - start_time)
+
+            durations = []
+            async with anyio.create_task_group() as task_group:
+                if run_background_refresh:
+                    task_group.start_soon(cache.async_run_background_refresh)
+                    await anyio.sleep(0.01)
+
+                async with anyio.create_task_group() as readers:
+                    for _ in range(10):
+                        readers.start_soon(read)
+
+                await anyio.sleep(0.25)
+                task_group.cancel_scope.cancel()
+
+            # Readers never wait for refresh
+            assert len(durations) == 10
+            assert max(durations) < 0.1
+
+        assert await_(get_or_set()) == 1
+        time.sleep(0.6)
+        # Without background refresh, stale value is not refreshed
+        await_(read_stale(1, run_background_refresh=False))
+        assert len(calls) == 1
+        assert await_(get_or_set()) == 1
+
+        await_(read_stale(1, run_background_refresh=True))
+        assert len(calls) == 2
+        assert await_(get_or_set()) == 2
+
+        # After hard timeout value is recomputed
+        await_(cache.async_delete(test_key))
+        assert await_(get_or_set(timeout=0.5)) == 3
+        time.sleep(0.6)
+        assert await_(get_or_set()) == 4
+        assert len(calls) == 4
+        await_(cache.async_delete(test_key))
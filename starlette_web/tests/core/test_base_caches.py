@@ -1,4 +1,25 @@
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import anyio
+import pytest
+
 from starlette_web.common.caches import caches
+from starlette_web.common.caches.base import CacheLockError
+from starlette_web.common.caches.local_memory import (
+    LocalMemoryCache,
+    _AsyncLocalMemoryLock,
+    _lock_waiters,
+)
+from starlette_web.common.files import cache as file_cache_module
+from starlette_web.common.files.cache import FileCache
+from starlette_web.common.files.filelock import FcntlFileLock
+from starlette_web.tests.helpers import await_
 from starlette_web.tests.core.helpers.base_cache_tester import BaseCacheTester
 
 
@@ -21,6 +42,320 @@ class TestFileCache(BaseCacheTester):
     def test_file_lock_cancellation(self):
         self._run_base_lock_cancellation(caches["files"])
 
+    def test_file_lock_contention(self):
+        self._run_lock_contention_test(caches["files"])
+
+    @pytest.mark.skipif(os.name == "nt", reason="fcntl is not available on Windows")
+    def test_file_rw_lock(self):
+        self._run_rw_lock_test(caches["files"])
+
+    @pytest.mark.skipif(os.name == "nt", reason="fcntl is not available on Windows")
+    def test_file_lock_expiration_and_distinct_names(self):
+        lock_dir = Path(tempfile.mkdtemp())
+        lock_name = str(lock_dir / "expired.lock")
+
+        async def run():
+            holder = FcntlFileLock(lock_name, timeout=0.1)
+            await holder.__aenter__()
+            # Locks with other names do not contend
+            async with FcntlFileLock(str(lock_dir / "other.lock"), blocking_timeout=0.05):
+                pass
+
+            await anyio.sleep(0.2)
+            # Expired holder is replaced by a waiter
+            async with FcntlFileLock(lock_name, timeout=5, blocking_timeout=0.1):
+                # Release of expired holder does not release a new one
+                await holder.__aexit__(None, None, None)
+                with pytest.raises(CacheLockError):
+                    async with FcntlFileLock(lock_name, blocking_timeout=0.05):
+                        pass
+
+        await_(run())
+
+        # Lock files are removed on release
+        assert not os.listdir(lock_dir)
+        os.rmdir(lock_dir)
+
+    @pytest.mark.skipif(os.name == "nt", reason="fcntl is not available on Windows")
+    def test_file_lock_removes_guard_files(self):
+        lock_dir = Path(tempfile.mkdtemp())
+        locks = [FcntlFileLock(str(lock_dir / f"guard_{idx}.lock")) for idx in range(20)]
+
+        async def run():
+            async with anyio.create_task_group() as nursery:
+                for lock in locks * 3:
+                    nursery.start_soon(acquire, lock)
+
+        async def acquire(lock):
+            async with FcntlFileLock(lock._name, timeout=5, blocking_timeout=5):
+                await anyio.sleep(0)
+
+        await_(run())
+        assert not [lock._guard_path for lock in locks if os.path.exists(lock._guard_path)]
+        assert not os.listdir(lock_dir)
+        os.rmdir(lock_dir)
+
+    @pytest.mark.skipif(os.name == "nt", reason="fcntl is not available on Windows")
+    def test_file_lock_is_released_on_process_exit(self):
+        lock_name = str(Path(tempfile.gettempdir()) / "test_process_exit.lock")
+        script = (
+            "import sys, time, anyio\n"
+            "from starlette_web.common.files.filelock import FcntlFileLock\n"
+            "async def main():\n"
+            f"    async with FcntlFileLock({lock_name!r}, timeout=None):\n"
+            "        print('locked', flush=True)\n"
+            "        time.sleep(60)\n"
+            "anyio.run(main)\n"
+        )
+        process = subprocess.Popen([sys.executable, "-c", script], stdout=subprocess.PIPE)
+        try:
+            assert process.stdout.readline() == b"locked\n"
+
+            async def acquire(blocking_timeout: float):
+                async with FcntlFileLock(lock_name, timeout=5, blocking_timeout=blocking_timeout):
+                    pass
+
+            with pytest.raises(CacheLockError):
+                await_(acquire(0.1))
+
+            process.kill()
+            process.wait()
+            # Lock of dead holder is released by kernel, not by timeout
+            start_time = time.time()
+            await_(acquire(1.0))
+            assert time.time() - start_time < 0.2
+        finally:
+            process.kill()
+            process.wait()
+
+    def test_file_cache_get_or_set(self):
+        self._run_get_or_set_test(caches["files"])
+        self._run_get_or_set_test(caches["files"], use_lock=True)
+        self._run_get_or_set_early_recompute_test(caches["files"])
+
+    def test_file_cache_atomic_ops(self):
+        self._run_atomic_ops_test(caches["files"])
+
+    def test_file_cache_tags_and_namespaces(self):
+        self._run_tags_and_namespaces_test(caches["files"])
+
+    def test_file_cache_iter_keys(self):
+        self._run_iter_keys_test(caches["files"])
+
+    def test_file_cache_long_keys(self):
+        cache = caches["files"]
+        long_key = "long_key_" + "x" * 300
+        await_(cache.async_set(long_key, 1, timeout=5))
+        await_(cache.async_set("long_key_short", 2, timeout=5))
+
+        assert await_(cache.async_get(long_key)) == 1
+        assert sorted(await_(cache.async_keys("long_key_*"))) == ["long_key_short", long_key]
+        assert await_(cache.async_keys("long_key_x*")) == [long_key]
+
+        path = cache._key_path(long_key)
+        assert len(path.name) < 100
+        assert path.parent.parent == Path(cache.base_dir)
+
+        await_(cache.async_delete(long_key))
+        assert await_(cache.async_get(long_key)) is None
+        await_(cache.async_delete("long_key_short"))
+
+    def test_file_cache_concurrent_writes(self):
+        cache = caches["files"]
+        values = [{"value": i, "payload": "x" * 100_000} for i in range(10)]
+        errors = []
+
+        async def writer():
+            for value in values:
+                await cache.async_set("concurrent_key", value, timeout=5)
+                await anyio.sleep(0)
+
+        async def reader():
+            for _ in range(50):
+                value = await cache.async_get("concurrent_key")
+                if value is not None and value not in values:
+                    errors.append(value)
+                await anyio.sleep(0)
+
+        async def run_workers():
+            async with anyio.create_task_group() as task_group:
+                for _ in range(3):
+                    task_group.start_soon(writer)
+                    task_group.start_soon(reader)
+
+        await_(run_workers())
+        assert not errors
+        assert await_(cache.async_get("concurrent_key")) in values
+
+        shard = cache._key_path("concurrent_key").parent
+        assert not [name for name in os.listdir(shard) if name.startswith(".")]
+        await_(cache.async_delete("concurrent_key"))
+
+    def test_file_cache_does_not_block_event_loop(self, monkeypatch):
+        cache = caches["files"]
+        payload = os.urandom(1 << 20)
+        io_threads = set()
+
+        def record_thread(func):
+            def wrapper(*args, **kwargs):
+                io_threads.add(threading.get_ident())
+                return func(*args, **kwargs)
+
+            return wrapper
+
+        # Disk I/O of FileCache runs in worker threads, not in event loop thread
+        monkeypatch.setattr(file_cache_module, "open", record_thread(open), raising=False)
+        monkeypatch.setattr(os, "replace", record_thread(os.replace))
+
+        async def writer(task_id: int):
+            for idx in range(5):
+                await cache.async_set(f"storm_key_{task_id}_{idx}", payload, timeout=5)
+                assert await cache.async_get(f"storm_key_{task_id}_{idx}") == payload
+
+        async def run_storm():
+            async with anyio.create_task_group() as storm_task_group:
+                for task_id in range(20):
+                    storm_task_group.start_soon(writer, task_id)
+
+        await_(run_storm())
+        assert io_threads
+        assert threading.get_ident() not in io_threads
+
+        await_(cache.async_delete_many([f"storm_key_{i}_{j}" for i in range(20) for j in range(5)]))
+
+    def test_file_cache_thread_safe_access_times(self, monkeypatch):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = FileCache({"CACHE_DIR": cache_dir})
+            cache._access_flush_size = 3
+            await_(cache.async_set_many({f"key_{i}": i for i in range(20)}))
+
+            # Index is checked once, even if many threads access it at the same time
+            cache._index_checked = False
+            index_checks = []
+            stats = cache._index.stats
+
+            def count_stats():
+                index_checks.append(threading.get_ident())
+                time.sleep(0.01)
+                return stats()
+
+            monkeypatch.setattr(cache._index, "stats", count_stats)
+
+            def read_keys():
+                for _ in range(10):
+                    for i in range(20):
+                        assert cache._sync_get(f"key_{i}") == i
+
+            threads = [threading.Thread(target=read_keys) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            assert len(index_checks) == 1
+            assert len(cache._accessed) < cache._access_flush_size
+            cache._sync_flush_accessed()
+            assert not cache._accessed
+
+    def test_file_cache_culling(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = FileCache({"CACHE_DIR": cache_dir, "MAX_ENTRIES": 100, "CULL_FRACTION": 0.2})
+
+            await_(cache.async_set_many({f"key_{i}": i for i in range(100)}))
+            # Reading key keeps it from eviction
+            assert await_(cache.async_get("key_0")) == 0
+            await_(cache.async_set("key_100", 100))
+
+            keys = await_(cache.async_keys("key_*"))
+            assert len(keys) == 80
+            assert "key_0" in keys and "key_100" in keys and "key_1" not in keys
+            assert len(list(Path(cache_dir).glob("*/*"))) == 80
+
+            cache = FileCache({"CACHE_DIR": cache_dir, "MAX_BYTES": 100_000})
+            await_(cache.async_clear())
+            for i in range(20):
+                await_(cache.async_set(f"key_{i}", "x" * 10_000))
+            assert cache._index.stats()[1] <= 100_000
+            assert len(await_(cache.async_keys("key_*"))) < 10
+
+    def test_file_cache_remove_expired(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = FileCache({"CACHE_DIR": cache_dir})
+            await_(cache.async_set_many({f"key_{i}": i for i in range(10)}, timeout=0.1))
+            await_(cache.async_set("persistent_key", 1, timeout=None))
+            assert len(await_(cache.async_keys("*"))) == 11
+
+            time.sleep(0.2)
+            assert await_(cache.async_keys("*")) == ["persistent_key"]
+            await_(cache.async_remove_expired())
+            assert len(list(Path(cache_dir).glob("*/*"))) == 1
+            assert cache._index.stats()[0] == 1
+
+            # Index is rebuilt from files, if it is missing
+            cache._index._connection.close()
+            for path in Path(cache_dir).glob("index.sqlite3*"):
+                path.unlink()
+            cache = FileCache({"CACHE_DIR": cache_dir})
+            assert await_(cache.async_keys("*")) == ["persistent_key"]
+
+
+class TestSQLiteCache(BaseCacheTester):
+    def test_sqlite_cache_base_ops(self):
+        self._run_base_cache_test(caches["sqlite"])
+
+    def test_sqlite_cache_many_ops(self):
+        self._run_cache_many_ops_test(caches["sqlite"])
+
+    def test_sqlite_lock(self):
+        self._run_cache_lock_test(caches["sqlite"])
+
+    def test_sqlite_lock_race_condition(self):
+        self._run_cache_mutual_lock_test(caches["sqlite"])
+
+    def test_sqlite_lock_correct_task_blocking(self):
+        self._run_locks_timeouts_test(caches["sqlite"])
+
+    def test_sqlite_lock_cancellation(self):
+        self._run_base_lock_cancellation(caches["sqlite"])
+
+    def test_sqlite_lock_contention(self):
+        self._run_lock_contention_test(caches["sqlite"])
+
+    def test_sqlite_cache_get_or_set(self):
+        self._run_get_or_set_test(caches["sqlite"])
+        self._run_get_or_set_test(caches["sqlite"], use_lock=True)
+        self._run_get_or_set_early_recompute_test(caches["sqlite"])
+
+    def test_sqlite_cache_atomic_ops(self):
+        self._run_atomic_ops_test(caches["sqlite"])
+
+    def test_sqlite_cache_tags_and_namespaces(self):
+        self._run_tags_and_namespaces_test(caches["sqlite"])
+
+    def test_sqlite_cache_iter_keys(self):
+        self._run_iter_keys_test(caches["sqlite"])
+
+    def test_sqlite_cache_keys_glob(self):
+        cache = caches["sqlite"]
+        await_(cache.async_set_many({"glob[1]:a": 1, "glob[1]:b": 2, "glob[2]:a": 3}, timeout=5))
+        assert sorted(await_(cache.async_keys("glob\\[1\\]:*"))) == ["glob[1]:a", "glob[1]:b"]
+        assert sorted(await_(cache.async_keys("glob*:a"))) == ["glob[1]:a", "glob[2]:a"]
+
+        await_(cache.async_set("glob_expired", 1, timeout=0.1))
+        time.sleep(0.2)
+        assert await_(cache.async_keys("glob_*")) == []
+        await_(cache.async_remove_expired())
+        rows = cache._sync_execute("SELECT key FROM cache WHERE key = 'glob_expired'")
+        assert rows == []
+
+        many = {f"glob_many_{i}": i for i in range(2000)}
+        await_(cache.async_set_many(many, timeout=5))
+        assert await_(cache.async_get_many(list(many) + ["glob_missing"])) == {
+            **many,
+            "glob_missing": None,
+        }
+        await_(cache.async_delete_many(list(many) + ["glob[1]:a", "glob[1]:b", "glob[2]:a"]))
+
 
 class TestInMemoryCache(BaseCacheTester):
     def test_locmem_cache_base_ops(self):
@@ -40,3 +375,224 @@ class TestInMemoryCache(BaseCacheTester):
 
     def test_file_lock_cancellation(self):
         self._run_base_lock_cancellation(caches["locmem"])
+
+    def test_locmem_lock_contention(self):
+        self._run_lock_contention_test(caches["locmem"])
+
+    def test_locmem_lock_blocking_timeout_does_not_limit_body(self):
+        async def run():
+            async with caches["locmem"].lock("test_lock_body", timeout=5, blocking_timeout=0.05):
+                await anyio.sleep(0.1)
+
+        await_(run())
+
+    def test_locmem_rw_lock(self):
+        self._run_rw_lock_test(caches["locmem"])
+
+    def test_locmem_get_or_set(self):
+        self._run_get_or_set_test(caches["locmem"])
+        self._run_get_or_set_test(caches["locmem"], use_lock=True)
+        self._run_get_or_set_early_recompute_test(caches["locmem"])
+
+    def test_locmem_get_or_set_stale_while_revalidate(self):
+        self._run_get_or_set_stale_while_revalidate_test(caches["locmem"])
+
+    def test_locmem_atomic_ops(self):
+        self._run_atomic_ops_test(caches["locmem"])
+
+    def test_locmem_tags_and_namespaces(self):
+        self._run_tags_and_namespaces_test(caches["locmem"])
+
+    def test_locmem_iter_keys(self):
+        self._run_iter_keys_test(caches["locmem"])
+
+    def test_locmem_lru_eviction(self):
+        cache = LocalMemoryCache({"name": "locmem_lru", "MAX_ENTRIES": 3})
+
+        async def fill_cache():
+            await cache.async_set_many({"a": 1, "b": 2, "c": 3})
+            await cache.async_get("a")
+            await cache.async_set("d", 4)
+
+        await_(fill_cache())
+        assert await_(cache.async_get_many(["a", "b", "c", "d"])) == {
+            "a": 1,
+            "b": None,
+            "c": 3,
+            "d": 4,
+        }
+        assert cache.eviction_stats()["evictions"] == 1
+
+    def test_locmem_lfu_eviction(self):
+        cache = LocalMemoryCache({"name": "locmem_lfu", "MAX_ENTRIES": 3, "EVICTION_POLICY": "lfu"})
+
+        async def fill_cache():
+            await cache.async_set_many({"a": 1, "b": 2, "c": 3})
+            await cache.async_get_many(["a", "a", "b", "c", "c"])
+            await cache.async_delete("b")
+            await cache.async_set_many({"b": 2, "d": 4})
+
+        await_(fill_cache())
+        assert await_(cache.async_get_many(["a", "b", "c", "d"])) == {
+            "a": 1,
+            "b": None,
+            "c": 3,
+            "d": 4,
+        }
+        assert cache.eviction_stats()["evictions"] == 1
+
+    def test_locmem_bounded_memory(self):
+        max_entries = 1000
+        max_bytes = 64 * 1024
+        cache = LocalMemoryCache(
+            {"name": "locmem_bounded", "MAX_ENTRIES": max_entries, "MAX_BYTES": max_bytes}
+        )
+
+        async def fill_cache():
+            for i in range(50000):
+                await cache.async_set(f"unique_key_{i}", b"x" * (i % 256))
+
+        await_(fill_cache())
+        stats = cache.eviction_stats()
+        assert stats["entries"] <= max_entries
+        assert stats["bytes"] <= max_bytes
+        assert stats["evictions"] == 50000 - stats["entries"]
+        assert await_(cache.async_get("unique_key_49999")) == b"x" * (49999 % 256)
+
+    def test_locmem_keys_by_prefix(self):
+        cache = LocalMemoryCache({"name": "locmem_prefix"})
+
+        async def fill_cache():
+            await cache.async_set_many({f"prefix:{i}": i for i in range(2000)})
+            await cache.async_set_many({"prefiy:1": 1, "other:1": 1, "prefix": 1})
+            await cache.async_delete_many([f"prefix:{i}" for i in range(1000, 2000)])
+
+        await_(fill_cache())
+        assert len(await_(cache.async_keys("prefix:*"))) == 1000
+        assert len(await_(cache.async_keys("prefix:1*"))) == 111
+        assert sorted(await_(cache.async_keys("prefi?:1"))) == ["prefix:1", "prefiy:1"]
+        assert await_(cache.async_keys("prefix")) == ["prefix"]
+        assert await_(cache.async_keys("*:1")) == ["prefix:1", "prefiy:1", "other:1"]
+
+    def test_locmem_expiry_sweeper(self):
+        cache = LocalMemoryCache({"name": "locmem_sweeper", "SWEEP_INTERVAL": 0.05})
+
+        async def run_sweeper():
+            await cache.async_set_many({f"expiring:{i}": i for i in range(100)}, timeout=0.1)
+            await cache.async_set_many({f"persistent:{i}": i for i in range(10)}, timeout=None)
+
+            with anyio.move_on_after(0.3):
+                await cache.async_run_expiry_sweeper()
+
+        await_(run_sweeper())
+        assert sorted(cache._cache.keys()) == [f"persistent:{i}" for i in range(10)]
+        assert len(cache._expire_heap) == 0
+
+    def test_locmem_concurrent_access(self):
+        cache = LocalMemoryCache({"name": "locmem_concurrent"})
+        number_of_tasks = 1000
+        results = {}
+
+        async def worker(task_id: int):
+            await cache.async_set(f"task:{task_id}", task_id)
+            await cache.async_set_many({f"task:{task_id}:{i}": i for i in range(10)})
+            values = await cache.async_get_many([f"task:{task_id}:{i}" for i in range(10)])
+            results[task_id] = (await cache.async_get(f"task:{task_id}"), list(values.values()))
+
+        async def run_workers():
+            async with anyio.create_task_group() as task_group:
+                for task_id in range(number_of_tasks):
+                    task_group.start_soon(worker, task_id)
+
+        await_(run_workers())
+
+        assert results == {
+            task_id: (task_id, list(range(10))) for task_id in range(number_of_tasks)
+        }
+        assert len(cache._cache) == number_of_tasks * 11
+
+    def test_locmem_object_mode(self):
+        value = {"nested": {"items": [1, 2, 3]}}
+
+        cache = LocalMemoryCache({"name": "locmem_objects", "STORE_OBJECTS": True})
+        await_(cache.async_set("key", value))
+        assert await_(cache.async_get("key")) is value
+
+        cache = LocalMemoryCache(
+            {"name": "locmem_objects_shallow", "STORE_OBJECTS": True, "COPY_ON_READ": "shallow"}
+        )
+        await_(cache.async_set("key", value))
+        cached_value = await_(cache.async_get("key"))
+        assert cached_value == value and cached_value is not value
+        assert cached_value["nested"] is value["nested"]
+
+        cache = LocalMemoryCache(
+            {"name": "locmem_objects_deep", "STORE_OBJECTS": True, "COPY_ON_READ": "deepcopy"}
+        )
+        await_(cache.async_set("key", value))
+        cached_value = await_(cache.async_get("key"))
+        assert cached_value == value and cached_value["nested"] is not value["nested"]
+
+    def test_locmem_object_mode_bounded(self):
+        max_bytes = 64 * 1024
+        cache = LocalMemoryCache(
+            {"name": "locmem_objects_bounded", "STORE_OBJECTS": True, "MAX_BYTES": max_bytes}
+        )
+
+        async def fill_cache():
+            for i in range(1000):
+                await cache.async_set(f"key:{i}", {"payload": [str(j) for j in range(100)]})
+
+        await_(fill_cache())
+        stats = cache.eviction_stats()
+        assert 0 < stats["entries"] < 1000
+        assert stats["bytes"] <= max_bytes
+
+    def test_locmem_lock_fifo_wakeup(self, monkeypatch):
+        cache = caches["locmem"]
+        number_of_tasks = 200
+        acquire_order = []
+        attempts = []
+
+        original_try_acquire = _AsyncLocalMemoryLock._try_acquire
+
+        def try_acquire(lock):
+            attempts.append(lock)
+            return original_try_acquire(lock)
+
+        monkeypatch.setattr(_AsyncLocalMemoryLock, "_try_acquire", try_acquire)
+
+        async def task_with_lock(task_id: int):
+            async with cache.lock("test_lock_fifo", blocking_timeout=10.0, timeout=10.0):
+                acquire_order.append(task_id)
+                await anyio.sleep(0)
+
+        async def gather_coroutines():
+            holder = cache.lock("test_lock_fifo", timeout=10.0)
+            await holder.__aenter__()
+
+            async with anyio.create_task_group() as task_group:
+                for task_id in range(number_of_tasks):
+                    task_group.start_soon(task_with_lock, task_id)
+                    # Guarantee order of arrival
+                    await anyio.sleep(0)
+
+                await anyio.sleep(0.05)
+                waiters = _lock_waiters[cache.name]["test_lock_fifo"]
+                assert len(waiters) == number_of_tasks
+                assert not any(waiter._acquire_event.is_set() for waiter in waiters)
+
+                # Waiters do not poll: only the first one has checked expiration of the lock
+                number_of_attempts = len(attempts)
+                await anyio.sleep(0.05)
+                assert len(attempts) == number_of_attempts
+                assert set(attempts[1:]) == {waiters[0]}
+
+                await holder.__aexit__(None, None, None)
+
+            # Each waiter checks the lock, when it becomes first in queue, and on release
+            assert len(attempts) <= number_of_attempts + 2 * number_of_tasks
+
+        await_(gather_coroutines())
+        assert acquire_order == list(range(number_of_tasks))
+        assert "test_lock_fifo" not in _lock_waiters[cache.name]
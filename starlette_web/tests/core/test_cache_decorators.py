@@ -0,0 +1,121 @@
+import dataclasses
+
+import anyio
+import pytest
+
+from starlette_web.common.caches import cached, cached_many, caches
+from starlette_web.common.caches.base import CacheError
+from starlette_web.tests.helpers import await_
+
+
+@dataclasses.dataclass
+class Filters:
+    status: str
+    tags: frozenset
+
+
+class Unhashable:
+    pass
+
+
+def test_cached_derives_stable_keys():
+    calls = []
+
+    @cached(alias="locmem", timeout=10)
+    async def search(query: str, filters: Filters, options: dict = None):
+        calls.append(query)
+        await anyio.sleep(0.05)
+        return [query, filters.status]
+
+    filters_1 = Filters(status="active", tags=frozenset({"a", "b", "c"}))
+    filters_2 = Filters(status="active", tags=frozenset({"c", "b", "a"}))
+    key = search.make_key("x", filters_1, options={"b": 2, "a": 1})
+    assert key.startswith("cached:starlette_web.tests.core.test_cache_decorators.")
+    assert key == search.make_key("x", filters_2, {"a": 1, "b": 2})
+    assert key != search.make_key("y", filters_1, {"a": 1, "b": 2})
+
+    async def call_concurrently():
+        async with anyio.create_task_group() as task_group:
+            for _ in range(10):
+                task_group.start_soon(search, "z", filters_1)
+
+    await_(search.invalidate_all())
+    await_(call_concurrently())
+    assert calls == ["z"]
+    assert await_(search("z", filters_2)) == ["z", "active"]
+    assert calls == ["z"]
+
+    await_(search.invalidate("z", filters_1))
+    assert await_(search("z", filters_1)) == ["z", "active"]
+    assert calls == ["z", "z"]
+
+    await_(search("w", filters_1))
+    await_(search.invalidate_all())
+    await_(search("w", filters_1))
+    await_(search("z", filters_1))
+    assert calls == ["z", "z", "w", "w", "z"]
+
+    with pytest.raises(CacheError):
+        search.make_key("x", Unhashable())
+
+
+def test_cached_with_key_template():
+    calls = []
+
+    @cached(alias="locmem", timeout=10, key="decorators:user:{user_id}")
+    async def get_user(user_id: int, fields=("name",)):
+        calls.append(user_id)
+        return {"id": user_id}
+
+    await_(get_user.invalidate(1))
+    assert await_(get_user(1)) == {"id": 1}
+    assert await_(get_user(user_id=1)) == {"id": 1}
+    assert await_(caches["locmem"].async_get("decorators:user:1")) == {"id": 1}
+    assert calls == [1]
+
+    with pytest.raises(CacheError):
+        await_(get_user.invalidate_all())
+
+
+def test_cached_does_not_store_none():
+    calls = []
+
+    @cached(alias="locmem", timeout=10, key="decorators:missing:{user_id}", soft_timeout=5)
+    async def get_missing_user(user_id: int):
+        calls.append(user_id)
+        return None
+
+    await_(get_missing_user.invalidate(1))
+    assert await_(get_missing_user(1)) is None
+    assert await_(caches["locmem"].async_get("decorators:missing:1")) is None
+    assert await_(get_missing_user(1)) is None
+    assert calls == [1, 1]
+
+
+def test_cached_many():
+    calls = []
+
+    @cached_many(alias="locmem", timeout=10)
+    async def get_prices(product_ids, currency="USD"):
+        calls.append(list(product_ids))
+        await anyio.sleep(0.05)
+        return [f"{product_id}:{currency}" for product_id in product_ids]
+
+    await_(get_prices.invalidate([1, 2, 3, 4]))
+    assert await_(get_prices([1, 2])) == ["1:USD", "2:USD"]
+    assert await_(get_prices([2, 3, 1])) == ["2:USD", "3:USD", "1:USD"]
+    assert calls == [[1, 2], [3]]
+
+    async def call_concurrently():
+        async with anyio.create_task_group() as task_group:
+            task_group.start_soon(get_prices, [4, 1])
+            task_group.start_soon(get_prices, [4, 1])
+
+    await_(call_concurrently())
+    assert calls == [[1, 2], [3], [4]]
+
+    assert await_(get_prices([1], currency="EUR")) == ["1:EUR"]
+    await_(get_prices.invalidate([1]))
+    assert await_(get_prices([1, 2])) == ["1:USD", "2:USD"]
+    assert calls == [[1, 2], [3], [4], [1], [1]]
+    await_(get_prices.invalidate_all())
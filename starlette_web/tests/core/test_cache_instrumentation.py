@@ -0,0 +1,138 @@
+import anyio
+
+from starlette_web.common.caches.instrumentation import (
+    InstrumentedCache,
+    SpaceSavingSketch,
+    merge_snapshots,
+)
+from starlette_web.common.caches.local_memory import LocalMemoryCache
+from starlette_web.tests.helpers import await_
+
+
+def _create_cache(**options) -> InstrumentedCache:
+    return InstrumentedCache(
+        LocalMemoryCache({"name": "instrumented"}),
+        "instrumented",
+        {"TOP_K": 3, **options},
+    )
+
+
+def test_instrumented_cache_records_operations():
+    cache = _create_cache(TRACK_BYTES=True)
+
+    async def run():
+        await cache.async_clear()
+        cache.reset_stats()
+
+        await cache.async_set("user:1", {"name": "John"})
+        await cache.async_set_many({"user:2": 2, "product:1": 1})
+        for _ in range(5):
+            assert await cache.async_get("user:1") == {"name": "John"}
+        assert await cache.async_get("user:3") is None
+        assert await cache.async_get_many(["user:2", "product:2"]) == {
+            "user:2": 2,
+            "product:2": None,
+        }
+
+        calls = []
+
+        async def factory():
+            calls.append(1)
+            await anyio.sleep(0.01)
+            return "value"
+
+        for _ in range(3):
+            assert await cache.async_get_or_set("computed:1", factory) == "value"
+        assert len(calls) == 1
+
+        # Backend-specific attributes are forwarded
+        assert cache.name == "instrumented"
+
+    await_(run())
+
+    snapshot = cache.snapshot()
+    get_stats = snapshot["operations"]["get"]
+    assert get_stats["calls"] == 6
+    assert get_stats["hits"] == 5
+    assert get_stats["misses"] == 1
+    assert get_stats["bytes_read"] > 0
+    assert sum(get_stats["latency"]["counts"]) == 6
+    assert snapshot["operations"]["set"]["bytes_written"] > 0
+
+    get_many_stats = snapshot["prefixes"]["product"]["get_many"]
+    assert (get_many_stats["hits"], get_many_stats["misses"]) == (0, 1)
+    assert snapshot["operations"]["get_many"]["calls"] == 2  # once per prefix
+    assert snapshot["operations"]["set_many"]["calls"] == 2
+
+    get_or_set_stats = snapshot["prefixes"]["computed"]["get_or_set"]
+    assert (get_or_set_stats["hits"], get_or_set_stats["misses"]) == (2, 1)
+
+    assert snapshot["hot_keys"][0] == ("user:1", 5, 0)
+    assert len(snapshot["hot_keys"]) == 3
+
+    cache.reset_stats()
+    assert cache.snapshot()["operations"] == {}
+
+
+def test_instrumented_cache_limits_prefixes():
+    cache = _create_cache(MAX_PREFIXES=2)
+
+    async def run():
+        for idx in range(5):
+            await cache.async_set(f"prefix_{idx}:key", idx)
+
+    await_(run())
+
+    snapshot = cache.snapshot()
+    assert set(snapshot["prefixes"]) == {"prefix_0", "prefix_1", "__other__"}
+    assert snapshot["prefixes"]["__other__"]["set"]["calls"] == 3
+    assert snapshot["operations"]["set"]["bytes_written"] == 0
+
+
+def test_space_saving_sketch_keeps_heavy_hitters():
+    sketch = SpaceSavingSketch(capacity=4)
+    for idx in range(1000):
+        sketch.add("hot")
+        if idx % 2:
+            sketch.add("warm")
+        sketch.add(f"cold:{idx}")
+
+    (hot_key, hot_count, _), (warm_key, warm_count, warm_error) = sketch.top(2)
+    assert (hot_key, warm_key) == ("hot", "warm")
+    assert hot_count == 1000
+    assert warm_count - warm_error <= 500 <= warm_count
+
+    # Evicted key has the smallest count, and sum of counts equals number of additions
+    sketch = SpaceSavingSketch(capacity=3)
+    for key, count in [("a", 5), ("b", 2), ("c", 3), ("d", 1), ("a", 1), ("e", 1)]:
+        sketch.add(key, count)
+    assert sketch.top(3) == [("a", 6, 0), ("e", 4, 3), ("d", 3, 2)]
+    assert len(sketch._heap) == 3
+
+
+def test_published_stats_are_merged():
+    cache = _create_cache()
+
+    async def run():
+        await cache.async_clear()
+        cache.reset_stats()
+        await cache.async_set("user:1", 1)
+        await cache.async_get("user:1")
+        await cache.async_publish_stats()
+
+        # Imitate another process
+        other_snapshot = {**cache.snapshot(), "pid": -1}
+        await cache.cache.async_set(
+            f"{cache.stats_key_prefix}{cache.alias}:other:-1", other_snapshot
+        )
+        return await cache.async_get_published_stats()
+
+    snapshots = await_(run())
+    assert len(snapshots) == 2
+
+    report = merge_snapshots(snapshots, top_k=5)
+    assert report["processes"] == 2
+    assert report["operations"]["get"]["hits"] == 2
+    assert report["prefixes"]["user"]["set"]["calls"] == 2
+    assert sum(report["operations"]["get"]["latency"]["counts"]) == 2
+    assert report["hot_keys"] == [("user:1", 2, 0)]
@@ -2,6 +2,7 @@ import time
 import os
 from pathlib import Path
 
+import anyio
 import pytest
 
 from starlette_web.common.conf import settings
@@ -110,6 +111,34 @@ class TestFileSystemStorage:
         assert "file3.txt" in listdir
         assert size == 12
 
+    def test_utils_functions_use_access_lock(self):
+        rel_path = "dir1/dir3/file3.txt"
+        lock_modes = []
+
+        class TrackingStorage(FilesystemStorage):
+            def get_access_lock(self, path: str, mode="r"):
+                lock_modes.append((path, mode))
+                return super().get_access_lock(path, mode)
+
+        async def utils_task():
+            async with TrackingStorage(BASE_DIR=self.base_dir) as storage:
+                async with storage.writer(rel_path, "b") as writer:
+                    await writer.write(b"Test content")
+
+                lock_modes.clear()
+                await storage.get_mtime(rel_path)
+                await storage.exists(rel_path)
+                await storage.listdir(os.path.dirname(rel_path))
+                await storage.size(rel_path)
+
+        await_(utils_task())
+        assert lock_modes == [
+            (rel_path, "r"),
+            (rel_path, "r"),
+            (os.path.dirname(rel_path), "r"),
+            (rel_path, "r"),
+        ]
+
     def test_cant_delete_non_empty_dir(self):
         rel_path = "dir1/dir2/file1.txt"
 
@@ -122,3 +151,43 @@ class TestFileSystemStorage:
 
         with pytest.raises(OSError):
             await_(write_and_delete_task())
+
+    @pytest.mark.skipif(os.name == "nt", reason="fcntl is not available on Windows")
+    def test_concurrent_readers_and_writers(self):
+        rel_path = "dir1/dir4/file6.txt"
+        number_of_tasks = 10
+        iterations = 10
+        holders = {"r": 0, "w": 0}
+        max_readers = 0
+
+        async def task(storage, task_idx):
+            nonlocal max_readers
+            for idx in range(iterations):
+                if (task_idx * iterations + idx) % 10 == 0:
+                    async with storage.writer(rel_path, "b") as writer:
+                        holders["w"] += 1
+                        assert holders == {"r": 0, "w": 1}
+                        await writer.write(b"Test content")
+                        await anyio.sleep(0.01)
+                        holders["w"] -= 1
+                else:
+                    async with storage.reader(rel_path, "b") as reader:
+                        holders["r"] += 1
+                        max_readers = max(max_readers, holders["r"])
+                        assert holders["w"] == 0
+                        assert await reader.read() == b"Test content"
+                        await anyio.sleep(0.01)
+                        holders["r"] -= 1
+
+        async def read_heavy_mix():
+            async with FilesystemStorage(BASE_DIR=self.base_dir) as storage:
+                async with storage.writer(rel_path, "b") as writer:
+                    await writer.write(b"Test content")
+
+                async with anyio.create_task_group() as nursery:
+                    for task_idx in range(number_of_tasks):
+                        nursery.start_soon(task, storage, task_idx)
+
+        await_(read_heavy_mix())
+        assert max_readers > 1
+        assert holders == {"r": 0, "w": 0}
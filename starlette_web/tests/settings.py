@@ -79,6 +79,31 @@ CACHES = {
             "CACHE_DIR": FILECACHE_DIR,
         },
     },
+    "sqlite": {
+        "BACKEND": "starlette_web.common.caches.sqlite.SQLiteCache",
+        "OPTIONS": {
+            "PATH": FILECACHE_DIR / "cache.sqlite3",
+        },
+    },
+    "postgres": {
+        "BACKEND": "starlette_web.contrib.postgres.cache.PostgreSQLCache",
+        "OPTIONS": {},
+    },
+    "two_tier": {
+        "BACKEND": "starlette_web.common.caches.two_tier.TwoTierCache",
+        "OPTIONS": {
+            "L2": "default",
+            "L1_OPTIONS": {"name": "two_tier", "MAX_ENTRIES": 1000},
+            "CHANNEL_LAYER": {
+                "BACKEND": "starlette_web.contrib.redis.channel_layers.RedisPubSubChannelLayer",
+                "OPTIONS": {
+                    "host": config("REDIS_HOST", default="localhost"),
+                    "port": config("REDIS_PORT", default=6379),
+                    "db": config("REDIS_DB", default=0),
+                },
+            },
+        },
+    },
 }
 
 CHANNEL_LAYERS = {
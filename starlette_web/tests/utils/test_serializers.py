@@ -1,4 +1,17 @@
-from starlette_web.common.utils.serializers import JSONSerializer, PickleSerializer
+import os
+import pickle
+
+import pytest
+
+from starlette_web.common.utils.serializers import (
+    JSONSerializer,
+    PickleSerializer,
+    CompressedPickleSerializer,
+    DeserializeError,
+    LZMACompressor,
+    make_serializer,
+)
+from starlette_web.common.http.exceptions import ImproperlyConfigured
 
 
 def test_json_serializer():
@@ -35,3 +48,57 @@ def test_pickle_serializer():
 
     decoded = serializer.deserialize(encoded)
     assert obj == decoded
+
+
+@pytest.mark.parametrize("compressor", ["zlib", "lzma"])
+def test_compressed_pickle_serializer(compressor):
+    serializer = CompressedPickleSerializer(compressor=compressor)
+
+    # Small payloads are plain pickle, compatible with PickleSerializer in both directions
+    obj = {"list_1": [{"bool_key": True, "int_key": 1}]}
+    encoded = serializer.serialize(obj)
+    assert PickleSerializer().deserialize(encoded) == obj
+    assert serializer.deserialize(PickleSerializer().serialize(obj)) == obj
+
+    obj = [{"id": i, "name": f"user_{i}", "email": f"user_{i}@test.com"} for i in range(1000)]
+    encoded = serializer.serialize(obj)
+    assert len(encoded) * 4 < len(PickleSerializer().serialize(obj))
+    assert serializer.deserialize(encoded) == obj
+    assert serializer.deserialize(serializer.serialize(None)) is None
+
+
+def test_compressed_pickle_serializer_out_of_band_buffers():
+    serializer = CompressedPickleSerializer()
+
+    # Incompressible out-of-band bytes are stored without compression
+    for obj in [os.urandom(100_000), bytearray(os.urandom(100_000))]:
+        encoded = serializer.serialize(obj)
+        assert len(encoded) < len(obj) + 100
+        decoded = serializer.deserialize(encoded)
+        assert decoded == obj
+        assert type(decoded) is type(obj)
+
+    obj = {"buffer": pickle.PickleBuffer(b"abcdefgh" * 100_000), "key": "value"}
+    decoded = serializer.deserialize(serializer.serialize(obj))
+    assert bytes(decoded["buffer"]) == bytes(obj["buffer"].raw())
+    assert decoded["key"] == "value"
+
+    encoded = serializer.serialize(b"abcdefgh" * 100_000)
+    with pytest.raises(DeserializeError):
+        serializer.deserialize(encoded[:100])
+
+
+def test_make_serializer_from_options():
+    assert type(make_serializer(PickleSerializer, {})) is PickleSerializer
+
+    serializer = make_serializer(
+        PickleSerializer, {"COMPRESSION": "lzma", "COMPRESS_THRESHOLD": 10}
+    )
+    assert type(serializer) is CompressedPickleSerializer
+    assert serializer.serialize("x" * 100)[0] == LZMACompressor.header
+    assert serializer.deserialize(serializer.serialize("x" * 100)) == "x" * 100
+
+    with pytest.raises(ImproperlyConfigured):
+        make_serializer(PickleSerializer, {"COMPRESSION": "unknown"})
+    with pytest.raises(ImproperlyConfigured):
+        make_serializer(JSONSerializer, {"COMPRESSION": "zlib"})